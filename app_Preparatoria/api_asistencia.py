@@ -0,0 +1,145 @@
+import hmac
+import json
+from datetime import date, datetime
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+from .asistencias import guardar_asistencias
+from .models import Asistencia, Inscripcion, LoteAsistencia
+
+# --------------------------------------------------------------------------
+# API JSON DE ASISTENCIA POR LOTES (TABLETAS)
+# --------------------------------------------------------------------------
+# El cliente envía solo los cambios de un curso y una fecha:
+#   {"clave_lote": "...", "fecha": "YYYY-MM-DD",
+#    "registros": [{"inscripcion_id": 1, "presente": false, "justificada": true,
+#                   "observaciones": "..."}, ...]}
+# Los campos omitidos de cada registro conservan el valor ya guardado.
+# Todo el lote se aplica en una transacción y la respuesta contiene solo el
+# resultado por fila. La clave del lote hace idempotentes los reintentos: un
+# lote repetido devuelve el resultado guardado sin volver a escribir.
+# Las tabletas no usan sesión ni cookie CSRF: se autentican con un token
+# (settings.API_ASISTENCIA_TOKENS) en 'Authorization: Token <token>'.
+
+MAX_REGISTROS_LOTE = 500
+MAX_LONGITUD_CLAVE = 64
+CAMPOS_BOOLEANOS = ('presente', 'justificada')
+
+
+class LoteInvalido(ValueError):
+    """El cuerpo de la petición no tiene el formato esperado (HTTP 400)."""
+
+
+class ConflictoLote(ValueError):
+    """La clave ya se usó para otro curso o fecha (HTTP 409)."""
+
+
+def token_valido(encabezado):
+    """True si 'encabezado' (Authorization) trae uno de los tokens configurados."""
+    tipo, _, token = (encabezado or '').partition(' ')
+    if tipo != 'Token' or not token.strip():
+        return False
+    # compare_digest contra todos, para no revelar por tiempo cuál coincide en parte
+    coincidencias = [hmac.compare_digest(token.strip(), t) for t in settings.API_ASISTENCIA_TOKENS]
+    return any(coincidencias)
+
+
+def leer_lote(cuerpo):
+    """Valida el JSON recibido y devuelve (clave, fecha, registros)."""
+    try:
+        datos = json.loads(cuerpo)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise LoteInvalido("El cuerpo no es JSON válido.") from exc
+    if not isinstance(datos, dict):
+        raise LoteInvalido("Se esperaba un objeto JSON.")
+
+    clave = datos.get('clave_lote')
+    if not isinstance(clave, str) or not clave.strip() or len(clave) > MAX_LONGITUD_CLAVE:
+        raise LoteInvalido(f"'clave_lote' es obligatoria (máximo {MAX_LONGITUD_CLAVE} caracteres).")
+
+    try:
+        fecha = datetime.strptime(str(datos.get('fecha', '')), '%Y-%m-%d').date()
+    except ValueError as exc:
+        raise LoteInvalido("'fecha' debe tener el formato YYYY-MM-DD.") from exc
+    if fecha > date.today():
+        raise LoteInvalido("No se puede registrar asistencia en una fecha futura.")
+
+    registros = datos.get('registros')
+    if not isinstance(registros, list) or not registros:
+        raise LoteInvalido("'registros' debe ser una lista no vacía.")
+    if len(registros) > MAX_REGISTROS_LOTE:
+        raise LoteInvalido(f"Máximo {MAX_REGISTROS_LOTE} registros por lote.")
+    return clave.strip(), fecha, registros
+
+
+def _validar_registro(registro, inscripciones_curso):
+    """Devuelve (inscripcion_id, mensaje_de_error); el error es None si el registro es válido."""
+    if not isinstance(registro, dict):
+        return None, "Registro inválido."
+    inscripcion_id = registro.get('inscripcion_id')
+    if not isinstance(inscripcion_id, int) or isinstance(inscripcion_id, bool):
+        return None, "'inscripcion_id' debe ser un entero."
+    if inscripcion_id not in inscripciones_curso:
+        return inscripcion_id, "La inscripción no está activa en este curso."
+    for campo in CAMPOS_BOOLEANOS:
+        if campo in registro and not isinstance(registro[campo], bool):
+            return inscripcion_id, f"'{campo}' debe ser true o false."
+    if 'observaciones' in registro and not isinstance(registro['observaciones'], (str, type(None))):
+        return inscripcion_id, "'observaciones' debe ser texto."
+    return inscripcion_id, None
+
+
+def procesar_lote(curso_id, clave, fecha, registros):
+    """
+    Aplica un lote en una sola transacción. Devuelve (resultados, repetido), donde
+    'resultados' es una lista de {inscripcion_id, estado[, error]} con estado
+    'guardado', 'sin_cambios' o 'error'.
+    """
+    with transaction.atomic():
+        try:
+            # La fila del lote se inserta primero: un reintento concurrente con la
+            # misma clave espera aquí y después lee el resultado ya confirmado.
+            with transaction.atomic():
+                lote = LoteAsistencia.objects.create(clave=clave, curso_id=curso_id, fecha=fecha)
+        except IntegrityError:
+            lote = LoteAsistencia.objects.get(clave=clave)
+            if lote.curso_id != curso_id or lote.fecha != fecha:
+                raise ConflictoLote("La clave de lote ya se usó para otro curso o fecha.")
+            return lote.resultado, True
+
+        inscripciones_curso = set(
+            Inscripcion.objects.filter(curso_id=curso_id, esta_activo=True).values_list('id', flat=True)
+        )
+        validos = {}
+        resultados = []
+        for registro in registros:
+            inscripcion_id, error = _validar_registro(registro, inscripciones_curso)
+            if error:
+                resultados.append({'inscripcion_id': inscripcion_id, 'estado': 'error', 'error': error})
+            else:
+                # Si el mismo alumno viene dos veces, gana el último registro.
+                validos[inscripcion_id] = registro
+                resultados.append({'inscripcion_id': inscripcion_id, 'estado': 'sin_cambios'})
+
+        existentes = {
+            a.inscripcion_id: a
+            for a in Asistencia.objects.filter(inscripcion_id__in=validos.keys(), fecha=fecha)
+        }
+        por_guardar = {}
+        for inscripcion_id, registro in validos.items():
+            actual = existentes.get(inscripcion_id)
+            por_guardar[inscripcion_id] = (
+                registro.get('presente', actual.presente if actual else True),
+                registro.get('observaciones', actual.observaciones if actual else '') or '',
+                registro.get('justificada', actual.justificacion_aprobada if actual else False),
+            )
+
+        escritos = set(guardar_asistencias(fecha, por_guardar, existentes=existentes, curso_id=curso_id))
+        for resultado in resultados:
+            if resultado['estado'] == 'sin_cambios' and resultado['inscripcion_id'] in escritos:
+                resultado['estado'] = 'guardado'
+
+        lote.resultado = resultados
+        lote.save(update_fields=['resultado'])
+    return resultados, False
@@ -1,6 +1,15 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class AppPreparatoriaConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'app_Preparatoria'
+
+    def ready(self):
+        # Registra las señales que mantienen los datos precalculados
+        from . import signals  # noqa: F401
+
+        # PRAGMA de SQLite (WAL, synchronous, busy_timeout, mmap) en cada conexión nueva
+        from .base_datos import configurar_conexion
+        connection_created.connect(configurar_conexion, dispatch_uid='configurar_conexion_preparatoria')
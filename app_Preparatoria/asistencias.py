@@ -0,0 +1,63 @@
+from django.db import transaction
+
+from .models import Asistencia
+from .rollups_asistencia import marcar_pendientes
+
+# --------------------------------------------------------------------------
+# GUARDADO EN BLOQUE DE ASISTENCIAS
+# --------------------------------------------------------------------------
+
+CAMPOS_ASISTENCIA = ('presente', 'observaciones', 'justificacion_aprobada')
+
+
+def _cambio(asistencia, presente, observaciones, justificada):
+    """Indica si los valores recibidos difieren del registro ya guardado."""
+    return (
+        asistencia.presente != presente
+        or (asistencia.observaciones or '') != (observaciones or '')
+        or asistencia.justificacion_aprobada != justificada
+    )
+
+
+def guardar_asistencias(fecha, registros, existentes=None, curso_id=None):
+    """
+    Guarda la asistencia de una fecha con un único upsert.
+
+    'registros' es un diccionario {inscripcion_id: (presente, observaciones, justificada)}.
+    'existentes' es un diccionario {inscripcion_id: Asistencia} con lo ya guardado para
+    esa fecha; si no se proporciona se consulta en una sola query.
+    'curso_id' (opcional) evita una consulta al marcar los acumulados pendientes.
+    Solo se escriben las filas nuevas o las que realmente cambiaron. Devuelve la lista
+    de inscripcion_id escritos.
+    """
+    if existentes is None:
+        existentes = {
+            a.inscripcion_id: a
+            for a in Asistencia.objects.filter(inscripcion_id__in=registros.keys(), fecha=fecha)
+        }
+
+    por_escribir = []
+    for inscripcion_id, (presente, observaciones, justificada) in registros.items():
+        actual = existentes.get(inscripcion_id)
+        if actual is not None and not _cambio(actual, presente, observaciones, justificada):
+            continue
+        por_escribir.append(Asistencia(
+            inscripcion_id=inscripcion_id,
+            fecha=fecha,
+            presente=presente,
+            observaciones=observaciones,
+            justificacion_aprobada=justificada,
+        ))
+
+    if por_escribir:
+        # unique_together ('inscripcion', 'fecha') permite el INSERT ... ON CONFLICT DO UPDATE.
+        with transaction.atomic():
+            Asistencia.objects.bulk_create(
+                por_escribir,
+                update_conflicts=True,
+                unique_fields=['inscripcion', 'fecha'],
+                update_fields=list(CAMPOS_ASISTENCIA),
+            )
+            # bulk_create no envía señales: se marcan a mano los acumulados afectados.
+            marcar_pendientes([a.inscripcion_id for a in por_escribir], fecha, curso_id)
+    return [a.inscripcion_id for a in por_escribir]
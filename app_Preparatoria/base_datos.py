@@ -0,0 +1,36 @@
+from django.conf import settings
+
+# --------------------------------------------------------------------------
+# AJUSTES POR CONEXIÓN DE LA BASE DE DATOS
+# --------------------------------------------------------------------------
+# Se conecta a la señal connection_created en apps.py. Para SQLite aplica los
+# PRAGMA de settings.SQLITE_PRAGMAS a cada conexión nueva:
+#   - journal_mode=WAL: los lectores no se bloquean mientras alguien escribe.
+#   - synchronous=NORMAL: seguro con WAL y con muchos menos fsync.
+#   - busy_timeout: espera (ms) antes de fallar si la base está ocupada.
+#   - mmap_size: lecturas por memoria mapeada.
+# Con CONN_MAX_AGE la conexión se reutiliza entre peticiones, así que el costo
+# se paga una vez por conexión y no por petición.
+
+PRAGMAS_VERIFICABLES = ('busy_timeout', 'journal_mode', 'synchronous', 'mmap_size', 'cache_size', 'temp_store')
+
+
+def configurar_conexion(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    # Se aplican en el orden de settings: busy_timeout va primero porque cambiar
+    # journal_mode necesita el bloqueo de la base.
+    with connection.cursor() as cursor:
+        for nombre, valor in getattr(settings, 'SQLITE_PRAGMAS', {}).items():
+            cursor.execute(f'PRAGMA {nombre} = {valor}')
+
+
+def pragmas_actuales(connection, nombres=PRAGMAS_VERIFICABLES):
+    """Valores efectivos de los PRAGMA en 'connection' (útil para verificar el perfil)."""
+    valores = {}
+    with connection.cursor() as cursor:
+        for nombre in nombres:
+            cursor.execute(f'PRAGMA {nombre}')
+            fila = cursor.fetchone()
+            valores[nombre] = fila[0] if fila else None
+    return valores
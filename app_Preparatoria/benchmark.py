@@ -0,0 +1,242 @@
+import json
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .boletas import crear_trabajo
+from .cupos import reconciliar_inscritos
+from .horarios import generar_sesiones
+from .listas_cache import invalidar_listas
+from .models import Profesor, Curso, Estudiante, Inscripcion, Calificacion, Asistencia
+from .resumenes import recalcular_resumenes
+from .rollups_asistencia import reconstruir_todo
+
+# --------------------------------------------------------------------------
+# BENCHMARK DE CONSULTAS Y TIEMPOS POR RUTA
+# --------------------------------------------------------------------------
+# Genera datos sintéticos de distintos tamaños, recorre todas las rutas con
+# nombre de app_Preparatoria/urls.py con el cliente de pruebas y registra por
+# ruta: número de consultas, tiempo total de SQL y tiempo de respuesta.
+# Una ruta cuyo número de consultas crece con el tamaño de los datos es un
+# N+1 y se reporta como regresión.
+
+TAMANO_LOTE_GENERADOR = 1000
+
+# Consultas por ruta registradas con --guardar-base (tamaño mayor de la corrida).
+ARCHIVO_BASE = Path(__file__).resolve().with_name('benchmark_base.json')
+
+# Parámetros de query string necesarios para algunas rutas
+PARAMETROS_EXTRA = {
+    'exportar_calificaciones': 'curso={curso_id}',
+    'exportar_asistencias': 'curso={curso_id}',
+    'estadisticas_calificaciones': 'curso={curso_id}',
+}
+
+
+# ------------------------------------------
+# GENERADOR DE DATOS SINTÉTICOS
+# ------------------------------------------
+
+def generar_datos(num_estudiantes, num_cursos=None, cursos_por_estudiante=5,
+                  calificaciones_por_inscripcion=3, dias_asistencia=5, prefijo='BM'):
+    """
+    Crea profesores, cursos, estudiantes, inscripciones, calificaciones y asistencias
+    con bulk_create por lotes de estudiantes (memoria acotada). Devuelve los IDs de
+    muestra usados para construir las URLs.
+
+    bulk_create no envía señales: los resúmenes de calificaciones, los acumulados
+    de asistencia, los contadores de inscritos y las sesiones del horario se
+    calculan aquí, para que las rutas lean los mismos datos que en producción.
+    """
+    num_cursos = num_cursos or max(2, num_estudiantes // 40)
+    num_profesores = max(1, num_cursos // 3)
+    cursos_por_estudiante = min(cursos_por_estudiante, num_cursos)
+    tipos = ['PARCIAL_1', 'PARCIAL_2', 'PROYECTO', 'FINAL', 'OTRO']
+    hoy = date.today()
+
+    profesores = Profesor.objects.bulk_create([
+        Profesor(
+            nombre_profesor=f'Prof{i}', apellido_profesor=f'{prefijo}{i}',
+            correo_profesor=f'prof{i}@{prefijo.lower()}.mx', telefono='5550000',
+            especialidad='General'
+        )
+        for i in range(num_profesores)
+    ])
+    cursos = Curso.objects.bulk_create([
+        Curso(
+            nombre_curso=f'Curso {i}', codigo=f'{prefijo}{i:06d}'[:10], descripcion='Sintético',
+            creditos=1 + i % 8, horario='Lunes 08:00-10:00', aula=f'A{i % 50}',
+            profesor=profesores[i % num_profesores]
+        )
+        for i in range(num_cursos)
+    ])
+
+    primer_estudiante = None
+    for inicio in range(0, num_estudiantes, TAMANO_LOTE_GENERADOR):
+        fin = min(inicio + TAMANO_LOTE_GENERADOR, num_estudiantes)
+        estudiantes = Estudiante.objects.bulk_create([
+            Estudiante(
+                nombre_estudiante=f'Alumno{i}', apellido_estudiante=f'{prefijo}{i}',
+                matricula=f'{prefijo}{i:07d}'[:10], correo_estudiante=f'a{i}@{prefijo.lower()}.mx',
+                fecha_nacimiento=date(2008, 1, 1) + timedelta(days=i % 365)
+            )
+            for i in range(inicio, fin)
+        ])
+        primer_estudiante = primer_estudiante or estudiantes[0]
+
+        inscripciones = Inscripcion.objects.bulk_create([
+            Inscripcion(estudiante=estudiante, curso=cursos[(n + k) % num_cursos])
+            for n, estudiante in enumerate(estudiantes, start=inicio)
+            for k in range(cursos_por_estudiante)
+        ])
+        Calificacion.objects.bulk_create([
+            Calificacion(
+                inscripcion=inscripcion, tipo_evaluacion=tipos[k % len(tipos)],
+                puntaje=Decimal(50 + (inscripcion.pk * 7 + k * 13) % 51),
+                porcentaje_peso=100 // calificaciones_por_inscripcion
+            )
+            for inscripcion in inscripciones
+            for k in range(calificaciones_por_inscripcion)
+        ], batch_size=TAMANO_LOTE_GENERADOR)
+        Asistencia.objects.bulk_create([
+            Asistencia(
+                inscripcion=inscripcion, fecha=hoy - timedelta(days=d + 1),
+                presente=(inscripcion.pk + d) % 7 != 0
+            )
+            for inscripcion in inscripciones
+            for d in range(dias_asistencia)
+        ], batch_size=TAMANO_LOTE_GENERADOR)
+        recalcular_resumenes([i.pk for i in inscripciones])
+
+    curso_ids = [curso.pk for curso in cursos]
+    reconciliar_inscritos(curso_ids)
+    reconstruir_todo(curso_ids)
+    generar_sesiones(curso_ids)
+
+    inscripcion = Inscripcion.objects.filter(estudiante=primer_estudiante).first()
+    trabajo = crear_trabajo(inscripcion.periodo_academico, 'html')
+    return {
+        'profesor_id': profesores[0].pk,
+        'curso_id': inscripcion.curso_id,
+        'estudiante_id': primer_estudiante.pk,
+        'inscripcion_id': inscripcion.pk,
+        'trabajo_id': trabajo.pk,
+        'matricula': primer_estudiante.matricula,
+    }
+
+
+# ------------------------------------------
+# MEDICIÓN DE RUTAS
+# ------------------------------------------
+
+def rutas_con_nombre():
+    """Lista (nombre, parámetros) de todas las rutas con nombre de la app."""
+    from .urls import urlpatterns
+    return [
+        (patron.name, list(patron.pattern.converters))
+        for patron in urlpatterns
+        if getattr(patron, 'name', None)
+    ]
+
+
+def medir_ruta(cliente, url):
+    """Hace un GET a 'url' y devuelve (status, consultas, ms_sql, ms_total)."""
+    with CaptureQueriesContext(connection) as consultas:
+        inicio = time.perf_counter()
+        respuesta = cliente.get(url)
+        if respuesta.streaming:
+            for _ in respuesta.streaming_content:
+                pass
+        total = time.perf_counter() - inicio
+    ms_sql = sum(float(q['time']) for q in consultas.captured_queries) * 1000
+    return respuesta.status_code, len(consultas), ms_sql, total * 1000
+
+
+def medir_rutas(ids_muestra, cliente=None):
+    """Mide todas las rutas con nombre usando los IDs de muestra. Devuelve {ruta: métricas}."""
+    cliente = cliente or Client(SERVER_NAME='localhost')
+    resultados = {}
+    # Con DEBUG=False (pruebas, producción) 'localhost' no se acepta por defecto y
+    # todas las rutas responderían 400 sin consultar la base.
+    with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'localhost']):
+        for nombre, parametros in rutas_con_nombre():
+            url = reverse(nombre, kwargs={p: ids_muestra[p] for p in parametros})
+            if nombre in PARAMETROS_EXTRA:
+                url += '?' + PARAMETROS_EXTRA[nombre].format(**ids_muestra)
+            status, num_consultas, ms_sql, ms_total = medir_ruta(cliente, url)
+            resultados[nombre] = {
+                'status': status,
+                'consultas': num_consultas,
+                'ms_sql': round(ms_sql, 2),
+                'ms_total': round(ms_total, 2),
+            }
+    return resultados
+
+
+def ejecutar_benchmark(tamanos, **opciones_generador):
+    """
+    Para cada tamaño genera los datos dentro de una transacción, mide todas las
+    rutas y revierte la transacción, sin dejar datos en la base. Devuelve
+    {tamano: {ruta: métricas}}.
+    """
+    resultados = {}
+    for tamano in sorted(tamanos):
+        with transaction.atomic():
+            ids_muestra = generar_datos(tamano, **opciones_generador)
+            invalidar_listas(inmediato=True)
+            resultados[tamano] = medir_rutas(ids_muestra)
+            transaction.set_rollback(True)
+        # Las listas cacheadas durante la medición apuntan a datos revertidos.
+        invalidar_listas(inmediato=True)
+    return resultados
+
+
+# ------------------------------------------
+# COMPARACIÓN CONTRA LA LÍNEA BASE
+# ------------------------------------------
+
+def rutas_que_crecen(resultados):
+    """Rutas cuyo número de consultas aumenta entre el tamaño menor y el mayor."""
+    tamanos = sorted(resultados)
+    if len(tamanos) < 2:
+        return {}
+    menor, mayor = resultados[tamanos[0]], resultados[tamanos[-1]]
+    return {
+        ruta: (menor[ruta]['consultas'], mayor[ruta]['consultas'])
+        for ruta in mayor
+        if ruta in menor and mayor[ruta]['consultas'] > menor[ruta]['consultas']
+    }
+
+
+def regresiones_contra_base(resultados, base):
+    """Rutas que hacen más consultas que las registradas en la línea base."""
+    regresiones = {}
+    for metricas in resultados.values():
+        for ruta, datos in metricas.items():
+            esperado = base.get(ruta)
+            if esperado is not None and datos['consultas'] > esperado:
+                regresiones[ruta] = (esperado, datos['consultas'])
+    return regresiones
+
+
+def cargar_base(ruta_archivo):
+    try:
+        with open(ruta_archivo, encoding='utf-8') as archivo:
+            return json.load(archivo).get('consultas', {})
+    except FileNotFoundError:
+        return {}
+
+
+def guardar_base(ruta_archivo, resultados):
+    mayor = resultados[max(resultados)]
+    datos = {'consultas': {ruta: m['consultas'] for ruta, m in sorted(mayor.items())}}
+    with open(ruta_archivo, 'w', encoding='utf-8') as archivo:
+        json.dump(datos, archivo, indent=4, ensure_ascii=False)
+        archivo.write('\n')
@@ -0,0 +1,327 @@
+import importlib.util
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Count, F, Prefetch, Q, Sum
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.text import slugify
+
+from .calificaciones import promedios_inscripcion
+from .models import AsistenciaTotalInscripcion, Calificacion, Estudiante, Inscripcion, TareaBoleta, TrabajoBoletas
+
+# --------------------------------------------------------------------------
+# BOLETAS POR PERIODO: COLA DE TRABAJOS EN LA BASE DE DATOS
+# --------------------------------------------------------------------------
+# Un TrabajoBoletas tiene una TareaBoleta por estudiante. El comando
+# procesar_boletas toma lotes de tareas pendientes (marcándolas con su
+# identificador en un UPDATE condicional, así varios workers no toman la
+# misma tarea) y los reparte entre un pool de procesos. Cada proceso carga los
+# datos del lote con prefetch agrupados, escribe un archivo por estudiante y
+# actualiza los contadores del trabajo con F(). El avance se consulta en la
+# vista de estado.
+
+TAMANO_LOTE_BOLETAS = 50
+MINUTOS_TAREA_COLGADA = 30
+
+
+def directorio_boletas():
+    return Path(getattr(settings, 'BOLETAS_DIR', Path(settings.BASE_DIR) / 'boletas'))
+
+
+def pdf_disponible():
+    """Las boletas en PDF requieren reportlab; sin él solo se ofrece HTML."""
+    return importlib.util.find_spec('reportlab') is not None
+
+
+def formatos_disponibles():
+    return ['pdf', 'html'] if pdf_disponible() else ['html']
+
+
+# ------------------------------------------
+# ALTA DE TRABAJOS Y TOMA DE TAREAS
+# ------------------------------------------
+
+def crear_trabajo(periodo_academico, formato=None):
+    """Crea el trabajo y una tarea por cada estudiante con inscripciones en el periodo."""
+    formato = formato or formatos_disponibles()[0]
+    if formato not in formatos_disponibles():
+        raise ValueError(f"Formato no disponible: {formato}")
+
+    estudiante_ids = (
+        Inscripcion.objects.filter(periodo_academico=periodo_academico, estudiante__eliminado_en__isnull=True)
+        .order_by('estudiante_id').values_list('estudiante_id', flat=True).distinct()
+    )
+    with transaction.atomic():
+        trabajo = TrabajoBoletas.objects.create(periodo_academico=periodo_academico, formato=formato)
+        tareas = TareaBoleta.objects.bulk_create(
+            (TareaBoleta(trabajo=trabajo, estudiante_id=pk) for pk in estudiante_ids.iterator()),
+            batch_size=1000,
+        )
+        trabajo.total = len(tareas)
+        if not tareas:
+            trabajo.estado = 'TERMINADO'
+            trabajo.fecha_fin = timezone.now()
+        trabajo.save(update_fields=['total', 'estado', 'fecha_fin'])
+    return trabajo
+
+
+def siguiente_trabajo():
+    """El trabajo más antiguo que todavía tiene tareas pendientes."""
+    return (
+        TrabajoBoletas.objects.filter(estado__in=['PENDIENTE', 'EN_PROCESO'], tareas__estado='PENDIENTE')
+        .order_by('fecha_creacion', 'id').first()
+    )
+
+
+def tomar_lote(trabajo, trabajador, tamano=TAMANO_LOTE_BOLETAS):
+    """
+    Marca como EN_PROCESO hasta 'tamano' tareas pendientes del trabajo y devuelve sus IDs.
+    El UPDATE solo afecta a las que siguen PENDIENTE, así que dos workers nunca
+    se quedan con la misma tarea.
+    """
+    candidatas = list(
+        TareaBoleta.objects.filter(trabajo=trabajo, estado='PENDIENTE')
+        .order_by('id').values_list('id', flat=True)[:tamano]
+    )
+    if not candidatas:
+        return []
+    TareaBoleta.objects.filter(id__in=candidatas, estado='PENDIENTE').update(
+        estado='EN_PROCESO', trabajador=trabajador, fecha_tomada=timezone.now()
+    )
+    if trabajo.estado == 'PENDIENTE':
+        TrabajoBoletas.objects.filter(pk=trabajo.pk, estado='PENDIENTE').update(
+            estado='EN_PROCESO', fecha_inicio=timezone.now()
+        )
+    return list(
+        TareaBoleta.objects.filter(id__in=candidatas, trabajador=trabajador, estado='EN_PROCESO')
+        .values_list('id', flat=True)
+    )
+
+
+def liberar_tareas_colgadas(minutos=MINUTOS_TAREA_COLGADA):
+    """Devuelve a PENDIENTE las tareas tomadas por un worker que no terminó a tiempo."""
+    limite = timezone.now() - timedelta(minutes=minutos)
+    return TareaBoleta.objects.filter(estado='EN_PROCESO', fecha_tomada__lt=limite).update(
+        estado='PENDIENTE', trabajador='', fecha_tomada=None
+    )
+
+
+def cerrar_trabajo_si_termino(trabajo_id):
+    """Marca el trabajo como terminado cuando ya no le quedan tareas por procesar."""
+    conteo = TareaBoleta.objects.filter(trabajo_id=trabajo_id).aggregate(
+        abiertas=Count('id', filter=Q(estado__in=['PENDIENTE', 'EN_PROCESO'])),
+        con_error=Count('id', filter=Q(estado='ERROR')),
+    )
+    if conteo['abiertas']:
+        return False
+    TrabajoBoletas.objects.filter(pk=trabajo_id, estado__in=['PENDIENTE', 'EN_PROCESO']).update(
+        estado='ERROR' if conteo['con_error'] else 'TERMINADO', fecha_fin=timezone.now()
+    )
+    return True
+
+
+# ------------------------------------------
+# DATOS Y RENDER DE LAS BOLETAS
+# ------------------------------------------
+
+def datos_boletas(estudiante_ids, periodo_academico):
+    """
+    Datos de las boletas de un lote de estudiantes en 4 consultas (estudiantes,
+    inscripciones con curso, profesor y resumen, calificaciones, totales de asistencia).
+    Devuelve {estudiante_id: {'estudiante': ..., 'cursos': [...], 'promedio_general': ...}}.
+    """
+    calificaciones = Calificacion.objects.only(
+        'id', 'inscripcion_id', 'tipo_evaluacion', 'puntaje', 'porcentaje_peso', 'fecha_evaluacion'
+    ).order_by('inscripcion_id', 'fecha_evaluacion', 'id')
+    inscripciones = list(
+        Inscripcion.objects.filter(estudiante_id__in=estudiante_ids, periodo_academico=periodo_academico)
+        .select_related('curso__profesor', 'resumen')
+        .prefetch_related(Prefetch('calificaciones', queryset=calificaciones, to_attr='calificaciones_ordenadas'))
+        .order_by('estudiante_id', 'curso__nombre_curso')
+    )
+    asistencia = {
+        fila['inscripcion_id']: fila
+        for fila in AsistenciaTotalInscripcion.objects.filter(inscripcion__in=[i.id for i in inscripciones])
+        .values('inscripcion_id').annotate(total=Sum('total'), presentes=Sum('presentes'))
+    }
+
+    # 'todos': un estudiante eliminado después de encolar el trabajo conserva su
+    # tarea y sus inscripciones; con 'objects' su fila faltaría en 'datos'.
+    datos = {
+        estudiante.pk: {'estudiante': estudiante, 'cursos': []}
+        for estudiante in Estudiante.todos.filter(pk__in=estudiante_ids)
+    }
+    for inscripcion in inscripciones:
+        _, _, ponderado = promedios_inscripcion(inscripcion)
+        totales = asistencia.get(inscripcion.id, {})
+        total = totales.get('total') or 0
+        datos[inscripcion.estudiante_id]['cursos'].append({
+            'curso': inscripcion.curso,
+            'calificaciones': inscripcion.calificaciones_ordenadas,
+            'final': ponderado,
+            'asistencia': round(100.0 * totales['presentes'] / total, 1) if total else None,
+        })
+    for dato in datos.values():
+        finales = [c['final'] for c in dato['cursos'] if c['final'] is not None]
+        dato['promedio_general'] = sum(finales) / len(finales) if finales else None
+    return datos
+
+
+def _escribir_pdf(ruta, dato, periodo_academico):
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+    estilos = getSampleStyleSheet()
+    estudiante = dato['estudiante']
+    filas = [['Curso', 'Código', 'Evaluaciones', 'Final ponderado', 'Asistencia']]
+    for curso in dato['cursos']:
+        filas.append([
+            curso['curso'].nombre_curso,
+            curso['curso'].codigo,
+            str(len(curso['calificaciones'])),
+            f"{curso['final']:.2f}" if curso['final'] is not None else '-',
+            f"{curso['asistencia']}%" if curso['asistencia'] is not None else '-',
+        ])
+    tabla = Table(filas, repeatRows=1)
+    tabla.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+    ]))
+    promedio = dato['promedio_general']
+    SimpleDocTemplate(str(ruta), pagesize=letter).build([
+        Paragraph(f"Boleta de calificaciones {periodo_academico}", estilos['Title']),
+        Paragraph(
+            f"{estudiante.nombre_estudiante} {estudiante.apellido_estudiante} ({estudiante.matricula})",
+            estilos['Heading2'],
+        ),
+        Spacer(1, 12),
+        tabla,
+        Spacer(1, 12),
+        Paragraph(f"Promedio general: {promedio:.2f}" if promedio is not None else "Sin calificaciones",
+                  estilos['Normal']),
+    ])
+
+
+def escribir_boleta(directorio, dato, periodo_academico, formato):
+    """Escribe la boleta de un estudiante y devuelve la ruta del archivo."""
+    estudiante = dato['estudiante']
+    ruta = directorio / f"{slugify(estudiante.matricula) or estudiante.pk}.{formato}"
+    if formato == 'pdf':
+        _escribir_pdf(ruta, dato, periodo_academico)
+    else:
+        html = render_to_string('boletas/boleta.html', {'periodo': periodo_academico, **dato})
+        ruta.write_text(html, encoding='utf-8')
+    return ruta
+
+
+def procesar_lote(trabajo_id, tarea_ids, trabajador):
+    """
+    Genera las boletas de un lote de tareas tomado por 'trabajador' (se ejecuta
+    dentro de un proceso del pool). Devuelve (listas, con_error).
+
+    Si una tarea tardó tanto que se liberó y otro worker la tomó, este worker ya
+    no la registra: el resultado y los contadores solo se escriben para las
+    tareas que siguen EN_PROCESO a su nombre.
+    """
+    trabajo = TrabajoBoletas.objects.get(pk=trabajo_id)
+    tareas = list(TareaBoleta.objects.filter(pk__in=tarea_ids, estado='EN_PROCESO', trabajador=trabajador))
+    directorio = directorio_boletas() / f'trabajo_{trabajo.pk}'
+    directorio.mkdir(parents=True, exist_ok=True)
+
+    datos = datos_boletas([t.estudiante_id for t in tareas], trabajo.periodo_academico)
+    for tarea in tareas:
+        try:
+            tarea.archivo = str(escribir_boleta(directorio, datos[tarea.estudiante_id],
+                                                trabajo.periodo_academico, trabajo.formato))
+            tarea.estado, tarea.error = 'LISTA', ''
+        except Exception as exc:  # Un error en una boleta no detiene el lote
+            tarea.estado, tarea.error = 'ERROR', f'{type(exc).__name__}: {exc}'
+
+    with transaction.atomic():
+        retenidas = set(
+            TareaBoleta.objects.select_for_update()
+            .filter(pk__in=[t.pk for t in tareas], estado='EN_PROCESO', trabajador=trabajador)
+            .values_list('id', flat=True)
+        )
+        tareas = [t for t in tareas if t.pk in retenidas]
+        listas = sum(1 for t in tareas if t.estado == 'LISTA')
+        TareaBoleta.objects.bulk_update(tareas, ['estado', 'archivo', 'error'])
+        TrabajoBoletas.objects.filter(pk=trabajo.pk).update(
+            procesadas=F('procesadas') + listas,
+            con_error=F('con_error') + (len(tareas) - listas),
+        )
+    return listas, len(tareas) - listas
+
+
+# ------------------------------------------
+# WORKER CON POOL DE PROCESOS
+# ------------------------------------------
+
+def _inicializar_proceso():
+    # Cada proceso abre sus propias conexiones; nunca se comparten las del padre.
+    import django
+    django.setup()
+    connections.close_all()
+
+
+def _procesar_en_proceso(trabajo_id, tarea_ids, trabajador):
+    try:
+        return procesar_lote(trabajo_id, tarea_ids, trabajador)
+    finally:
+        connections.close_all()
+
+
+def ejecutar_worker(procesos=None, tamano_lote=TAMANO_LOTE_BOLETAS, una_vez=False, esperar=None, salida=None):
+    """
+    Procesa trabajos pendientes repartiendo lotes entre 'procesos' procesos.
+    Con una_vez=True termina cuando no quedan tareas; si no, espera 'esperar'
+    segundos y vuelve a buscar. Devuelve el número de boletas procesadas.
+    """
+    procesos = procesos or os.cpu_count() or 1
+    trabajador = f'{os.getpid()}-{uuid.uuid4().hex[:8]}'
+    total = 0
+    with ProcessPoolExecutor(max_workers=procesos, initializer=_inicializar_proceso) as pool:
+        while True:
+            # En cada vuelta: los lotes que fallaron (aquí o en otro worker) vuelven
+            # a PENDIENTE al vencer su plazo, y su trabajo puede terminar.
+            liberar_tareas_colgadas()
+            trabajo = siguiente_trabajo()
+            if trabajo is None:
+                if una_vez:
+                    break
+                time.sleep(esperar or 5)
+                continue
+
+            # Se toman 'procesos' lotes y se procesan en paralelo.
+            lotes = []
+            for _ in range(procesos):
+                tarea_ids = tomar_lote(trabajo, trabajador, tamano_lote)
+                if not tarea_ids:
+                    break
+                lotes.append(tarea_ids)
+            # Los procesos hijos se crean (fork) en el primer submit: no deben
+            # heredar conexiones abiertas.
+            connections.close_all()
+            en_vuelo = [pool.submit(_procesar_en_proceso, trabajo.pk, tarea_ids, trabajador) for tarea_ids in lotes]
+            for futuro in en_vuelo:
+                try:
+                    listas, con_error = futuro.result()
+                    total += listas + con_error
+                except Exception as exc:
+                    # Las tareas del lote quedan EN_PROCESO hasta que liberar_tareas_colgadas las reintenta.
+                    if salida:
+                        salida(trabajo, error=exc)
+            cerrar_trabajo_si_termino(trabajo.pk)
+            if salida:
+                trabajo.refresh_from_db()
+                salida(trabajo)
+    return total
@@ -0,0 +1,128 @@
+from datetime import date
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Prefetch
+
+from .models import Calificacion, Inscripcion, ResumenCalificacion
+from .resumenes import recalcular_resumenes
+
+# --------------------------------------------------------------------------
+# CARGA DE CALIFICACIONES POR CURSO EN UNA SOLA PASADA
+# --------------------------------------------------------------------------
+# Las calificaciones del curso se traen una sola vez (Prefetch ordenado) para
+# listarlas; el conteo y los promedios se leen del resumen materializado
+# (ResumenCalificacion, ver resumenes.py) que viene en el mismo JOIN de las
+# inscripciones, en lugar de un GROUP BY que vuelve a leer las calificaciones.
+
+
+def promedios_inscripcion(inscripcion):
+    """
+    (conteo, promedio_simple, promedio_ponderado) del resumen de 'inscripcion'
+    (cargarlo con select_related('resumen')). Sin resumen aún no hay calificaciones.
+    """
+    try:
+        resumen = inscripcion.resumen
+    except ResumenCalificacion.DoesNotExist:
+        return 0, None, None
+    return resumen.conteo, resumen.promedio_simple, resumen.promedio_ponderado
+
+
+def inscripciones_con_calificaciones(curso):
+    """
+    Inscripciones activas de 'curso' con sus calificaciones ya ordenadas en
+    'calificaciones_ordenadas' y los atributos 'conteo_calificaciones',
+    'promedio_simple' y 'promedio_ponderado'. Siempre son 2 consultas.
+    """
+    # Ordenar primero por inscripción permite leer el índice (inscripcion, fecha_evaluacion)
+    # en orden y evita ordenar en memoria; dentro de cada inscripción el orden es cronológico.
+    calificaciones = Calificacion.objects.select_related('profesor_asignador').order_by(
+        'inscripcion_id', 'fecha_evaluacion', 'id'
+    )
+    inscripciones = list(
+        Inscripcion.objects.filter(curso=curso, esta_activo=True)
+        .select_related('estudiante', 'resumen')
+        .prefetch_related(Prefetch('calificaciones', queryset=calificaciones, to_attr='calificaciones_ordenadas'))
+    )
+    for inscripcion in inscripciones:
+        (
+            inscripcion.conteo_calificaciones,
+            inscripcion.promedio_simple,
+            inscripcion.promedio_ponderado,
+        ) = promedios_inscripcion(inscripcion)
+    return inscripciones
+
+
+# --------------------------------------------------------------------------
+# CAPTURA DE CALIFICACIONES EN BLOQUE (UN CURSO Y UN TIPO DE EVALUACIÓN)
+# --------------------------------------------------------------------------
+# Todos los puntajes del grupo llegan en un solo envío, se validan juntos con
+# el mismo DecimalField del modelo y se insertan con un único bulk_create. Si
+# algún valor es inválido no se guarda nada.
+
+PUNTAJE_MINIMO = Decimal('0')
+PUNTAJE_MAXIMO = Decimal('100')
+
+
+def validar_puntaje(valor):
+    """Convierte 'valor' con el DecimalField(max_digits=5, decimal_places=2) del modelo."""
+    campo = Calificacion._meta.get_field('puntaje')
+    puntaje = campo.clean(valor.strip().replace(',', '.'), None)
+    if not PUNTAJE_MINIMO <= puntaje <= PUNTAJE_MAXIMO:
+        raise ValidationError(f"Debe estar entre {PUNTAJE_MINIMO} y {PUNTAJE_MAXIMO}.")
+    return puntaje
+
+
+def validar_peso(valor):
+    if not str(valor).strip().isdigit() or not 0 < int(valor) <= 100:
+        raise ValidationError("El peso debe ser un entero entre 1 y 100.")
+    return int(valor)
+
+
+def registrar_calificaciones_en_bloque(inscripcion_ids, tipo_evaluacion, puntajes, porcentaje_peso,
+                                       profesor_asignador_id=None, fecha_evaluacion=None, comentarios=None):
+    """
+    Valida y guarda las calificaciones de un grupo.
+
+    'inscripcion_ids' son las inscripciones permitidas (las activas del curso).
+    'puntajes' y 'comentarios' son diccionarios {inscripcion_id: texto}; las celdas
+    vacías se omiten. Devuelve (creadas, errores) donde 'errores' es
+    {inscripcion_id: mensaje}; si hay algún error no se escribe nada.
+    """
+    comentarios = comentarios or {}
+    permitidas = set(inscripcion_ids)
+    validos = {}
+    errores = {}
+    for inscripcion_id, valor in puntajes.items():
+        if not (valor or '').strip():
+            continue
+        if inscripcion_id not in permitidas:
+            errores[inscripcion_id] = "La inscripción no está activa en este curso."
+            continue
+        try:
+            validos[inscripcion_id] = validar_puntaje(valor)
+        except ValidationError as exc:
+            errores[inscripcion_id] = ' '.join(exc.messages)
+
+    if errores or not validos:
+        return [], errores
+
+    nuevas = [
+        Calificacion(
+            inscripcion_id=inscripcion_id,
+            tipo_evaluacion=tipo_evaluacion,
+            puntaje=puntaje,
+            porcentaje_peso=porcentaje_peso,
+            profesor_asignador_id=profesor_asignador_id,
+            fecha_evaluacion=fecha_evaluacion or date.today(),
+            comentarios=(comentarios.get(inscripcion_id) or '').strip() or None,
+        )
+        for inscripcion_id, puntaje in validos.items()
+    ]
+    with transaction.atomic():
+        creadas = Calificacion.objects.bulk_create(nuevas)
+        # bulk_create no envía post_save: el resumen se recalcula para el lote completo.
+        recalcular_resumenes(validos.keys())
+    return creadas, {}
+
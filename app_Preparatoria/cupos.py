@@ -0,0 +1,97 @@
+from collections import Counter
+
+from django.core.exceptions import ValidationError
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Curso, Inscripcion
+
+# --------------------------------------------------------------------------
+# CUPO Y CONTADOR DE INSCRITOS POR CURSO
+# --------------------------------------------------------------------------
+# Curso.inscritos_activos guarda cuántas inscripciones activas tiene el curso,
+# así las pantallas y la validación de cupo no hacen COUNT(*) sobre
+# Inscripcion. El cupo no se divide por periodo: cuenta las inscripciones
+# activas de cualquier periodo, y un lugar solo se libera al dar de baja la
+# inscripción (esta_activo=False). Al terminar un periodo, el comando
+# cerrar_periodo da de baja todas las suyas. Las señales, ajustar_inscritos,
+# reconciliar_inscritos y la migración 0010 cuentan lo mismo. El contador se mueve siempre con UPDATE ... SET n = n + delta
+# (F()), nunca leyendo y escribiendo el valor desde Python:
+#   - save()/delete() de una Inscripcion: señales en signals.py
+#   - bulk_create/update() de inscripciones: quien escribe llama a ajustar_inscritos()
+# Para no rebasar el cupo con muchas peticiones simultáneas, quien inscribe
+# bloquea primero las filas de los cursos (select_for_update; en SQLite la
+# transacción IMMEDIATE ya toma el candado de escritura) y valida el cupo con
+# el contador ya bloqueado. Si el contador se desfasa (cargas directas a la
+# base), el comando reconciliar_inscritos lo recalcula.
+
+
+class CupoLleno(ValueError):
+    """El curso ya no tiene lugares disponibles."""
+
+
+def validar_cupo_maximo(valor):
+    """Cupo capturado en el formulario: vacío es sin límite (None); si no, un entero de al menos 1."""
+    valor = (valor or '').strip()
+    if not valor:
+        return None
+    if not valor.isdigit() or int(valor) < 1:
+        raise ValidationError("El cupo máximo debe ser un entero mayor o igual a 1, o quedar vacío.")
+    return int(valor)
+
+
+def ajustar_inscritos(deltas):
+    """
+    Aplica {curso_id: delta} a los contadores con F(). Los deltas negativos
+    nunca dejan el contador debajo de cero.
+    """
+    for curso_id, delta in deltas.items():
+        if delta > 0:
+            Curso.objects.filter(pk=curso_id).update(inscritos_activos=F('inscritos_activos') + delta)
+        elif delta < 0:
+            Curso.objects.filter(pk=curso_id).update(
+                inscritos_activos=Greatest(F('inscritos_activos') + delta, 0)
+            )
+
+
+def contar_por_curso(inscripciones):
+    """Deltas {curso_id: n} de las inscripciones activas de una lista (para bulk_create)."""
+    return Counter(i.curso_id for i in inscripciones if i.esta_activo)
+
+
+def bloquear_cursos(curso_ids):
+    """
+    Bloquea las filas de los cursos hasta el fin de la transacción y devuelve
+    {curso_id: curso}. Se bloquean en orden de ID para no provocar interbloqueos
+    entre dos inscripciones que compartan cursos. Debe llamarse dentro de
+    transaction.atomic().
+    """
+    cursos = Curso.objects.select_for_update().filter(pk__in=curso_ids).order_by('pk')
+    return {curso.pk: curso for curso in cursos}
+
+
+def tiene_cupo(curso, lugares=1):
+    return curso.cupo_maximo is None or curso.inscritos_activos + lugares <= curso.cupo_maximo
+
+
+def reconciliar_inscritos(curso_ids=None):
+    """
+    Recalcula desde cero los contadores de los cursos indicados (todos si es None).
+    Devuelve {curso_id: (valor_anterior, valor_correcto)} de los que estaban desfasados.
+    """
+    cursos = Curso.objects.all() if curso_ids is None else Curso.objects.filter(pk__in=curso_ids)
+    activos = (
+        Inscripcion.objects.filter(curso=OuterRef('pk'), esta_activo=True)
+        .order_by().values('curso').annotate(n=Count('id')).values('n')
+    )
+    desfasados = {
+        pk: (anterior, correcto)
+        for pk, anterior, correcto in cursos.annotate(correcto=Coalesce(Subquery(activos), 0))
+        .values_list('pk', 'inscritos_activos', 'correcto')
+        if anterior != correcto
+    }
+    if desfasados:
+        # El conteo se repite dentro del UPDATE: una inscripción hecha entre la
+        # lectura y la escritura también queda contada.
+        Curso.objects.filter(pk__in=desfasados).update(inscritos_activos=Coalesce(Subquery(activos), 0))
+    return desfasados
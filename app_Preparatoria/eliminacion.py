@@ -0,0 +1,183 @@
+import time
+from collections import Counter
+from datetime import date
+
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .cupos import ajustar_inscritos
+from .listas_cache import incrementar_version
+from .models import (
+    Asistencia, AsistenciaDiariaCurso, AsistenciaTotalInscripcion, Calificacion, Curso, Estudiante, Inscripcion,
+    LoteAsistencia, Profesor, ResumenCalificacion, SesionCurso, TareaBoleta,
+)
+from .rollups_asistencia import recalcular_curso_fechas
+
+# --------------------------------------------------------------------------
+# BORRADO LÓGICO Y PURGA POR LOTES
+# --------------------------------------------------------------------------
+# Con .delete() el colector de Django carga en memoria todas las
+# inscripciones, calificaciones y asistencias dependientes (y los cursos de un
+# profesor) antes de borrar, todo dentro de una transacción que retiene el
+# candado de escritura de SQLite. Aquí borrar es:
+#   1. Marcar eliminado_en (los managers 'objects' ya no muestran la fila), dar
+#      de baja sus inscripciones activas y quitar sus sesiones del horario:
+#      unas cuantas sentencias UPDATE/DELETE acotadas.
+#   2. Más tarde, el comando purgar_eliminados borra la fila y sus dependientes
+#      de hoja a raíz con DELETE ... WHERE id IN (...) de a lo más
+#      TAMANO_LOTE_PURGA filas, cada lote en su propia transacción corta.
+# El DELETE directo no envía señales ni usa el colector: cada paso mantiene a
+# mano lo que las señales mantendrían (resúmenes, acumulados, contadores).
+
+TAMANO_LOTE_PURGA = 500
+
+
+# ------------------------------------------
+# BORRADO LÓGICO
+# ------------------------------------------
+
+def _dar_de_baja_inscripciones(inscripciones):
+    activas = inscripciones.filter(esta_activo=True)
+    deltas = Counter(activas.values_list('curso_id', flat=True))
+    activas.update(esta_activo=False, fecha_finalizacion=date.today())
+    ajustar_inscritos({curso_id: -n for curso_id, n in deltas.items()})
+
+
+def eliminar_cursos(curso_ids):
+    with transaction.atomic():
+        Curso.objects.filter(pk__in=curso_ids).update(eliminado_en=timezone.now())
+        _dar_de_baja_inscripciones(Inscripcion.objects.filter(curso_id__in=curso_ids))
+        # El aula y el profesor quedan libres para otros cursos desde ya.
+        SesionCurso.objects.filter(curso_id__in=curso_ids).delete()
+    incrementar_version('curso')
+
+
+def eliminar_curso(curso):
+    eliminar_cursos([curso.pk])
+
+
+def eliminar_estudiante(estudiante):
+    with transaction.atomic():
+        Estudiante.objects.filter(pk=estudiante.pk).update(eliminado_en=timezone.now())
+        _dar_de_baja_inscripciones(Inscripcion.objects.filter(estudiante_id=estudiante.pk))
+    incrementar_version('estudiante')
+
+
+def eliminar_profesor(profesor):
+    """Como el CASCADE de Profesor.cursos: también se eliminan sus cursos."""
+    with transaction.atomic():
+        Profesor.objects.filter(pk=profesor.pk).update(eliminado_en=timezone.now())
+        eliminar_cursos(list(Curso.objects.filter(profesor_id=profesor.pk).values_list('id', flat=True)))
+    incrementar_version('profesor')
+
+
+def validar_clave_libre(modelo, campo, valor, excluir_pk=None):
+    """
+    Una fila marcada conserva su matrícula o código (columnas UNIQUE) hasta que
+    se purga, así que la clave se busca en 'todos' y no en 'objects'; de otro
+    modo el INSERT o UPDATE terminaría en IntegrityError.
+    """
+    ocupada = modelo.todos.filter(**{campo: valor})
+    if excluir_pk is not None:
+        ocupada = ocupada.exclude(pk=excluir_pk)
+    eliminado_en = ocupada.values_list('eliminado_en', flat=True).first()
+    if eliminado_en is not None:
+        raise ValidationError(
+            f"'{valor}' es el {campo} de un registro eliminado; "
+            f"queda libre cuando se ejecute purgar_eliminados."
+        )
+    if ocupada.exists():
+        raise ValidationError(f"Ya existe otro registro con {campo} '{valor}'.")
+
+
+# ------------------------------------------
+# PURGA POR LOTES
+# ------------------------------------------
+
+def _borrar_ids(modelo, ids):
+    """DELETE directo por llave primaria, sin colector ni señales."""
+    if not ids:
+        return 0
+    tabla = connection.ops.quote_name(modelo._meta.db_table)
+    columna = connection.ops.quote_name(modelo._meta.pk.column)
+    marcadores = ', '.join(['%s'] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {tabla} WHERE {columna} IN ({marcadores})', list(ids))
+        return cursor.rowcount
+
+
+def _lotes(queryset, tamano):
+    """IDs de 'queryset' en lotes de 'tamano'. Cada lote se lee después de borrar el anterior."""
+    ultimo = 0
+    while True:
+        ids = list(queryset.filter(pk__gt=ultimo).order_by('pk').values_list('pk', flat=True)[:tamano])
+        if not ids:
+            return
+        yield ids
+        ultimo = ids[-1]
+
+
+class Purga:
+    """Borra filas marcadas y sus dependientes por lotes; 'borradas' cuenta filas por tabla."""
+
+    def __init__(self, tamano=TAMANO_LOTE_PURGA, pausa=0):
+        self.tamano = tamano
+        self.pausa = pausa
+        self.borradas = Counter()
+
+    def _borrar(self, modelo, queryset):
+        for ids in _lotes(queryset, self.tamano):
+            with transaction.atomic():
+                self.borradas[modelo._meta.db_table] += _borrar_ids(modelo, ids)
+            if self.pausa:
+                # Deja pasar a otros escritores entre lotes
+                time.sleep(self.pausa)
+
+    def inscripciones(self, queryset, recalcular_acumulados=True):
+        for ids in _lotes(queryset, self.tamano):
+            curso_fechas = set()
+            if recalcular_acumulados:
+                curso_fechas = set(
+                    Asistencia.objects.filter(inscripcion_id__in=ids)
+                    .values_list('inscripcion__curso_id', 'fecha').distinct()
+                )
+            for hijo in (Calificacion, Asistencia, ResumenCalificacion, AsistenciaTotalInscripcion):
+                self._borrar(hijo, hijo.objects.filter(inscripcion_id__in=ids))
+            self._borrar(Inscripcion, Inscripcion.objects.filter(pk__in=ids))
+            # Los acumulados diarios de un curso que sigue vigente dejan de contar estas asistencias.
+            recalcular_curso_fechas(curso_fechas)
+
+    def cursos(self, queryset):
+        for ids in _lotes(queryset, self.tamano):
+            self.inscripciones(Inscripcion.objects.filter(curso_id__in=ids), recalcular_acumulados=False)
+            for hijo in (AsistenciaDiariaCurso, LoteAsistencia, SesionCurso):
+                self._borrar(hijo, hijo.objects.filter(curso_id__in=ids))
+            self._borrar(Curso, Curso.todos.filter(pk__in=ids))
+
+    def estudiantes(self, queryset):
+        for ids in _lotes(queryset, self.tamano):
+            self.inscripciones(Inscripcion.objects.filter(estudiante_id__in=ids))
+            self._borrar(TareaBoleta, TareaBoleta.objects.filter(estudiante_id__in=ids))
+            self._borrar(Estudiante, Estudiante.todos.filter(pk__in=ids))
+
+    def profesores(self, queryset):
+        for ids in _lotes(queryset, self.tamano):
+            self.cursos(Curso.todos.filter(profesor_id__in=ids))
+            # Calificacion.profesor_asignador es SET_NULL
+            for calificacion_ids in _lotes(Calificacion.objects.filter(profesor_asignador_id__in=ids), self.tamano):
+                Calificacion.objects.filter(pk__in=calificacion_ids).update(profesor_asignador=None)
+            self._borrar(Profesor, Profesor.todos.filter(pk__in=ids))
+
+
+def purgar_eliminados(antiguedad=None, tamano=TAMANO_LOTE_PURGA, pausa=0):
+    """
+    Purga los profesores, cursos y estudiantes marcados como eliminados hace más de
+    'antiguedad' (timedelta; None = todos). Devuelve {tabla: filas_borradas}.
+    """
+    limite = timezone.now() - antiguedad if antiguedad else timezone.now()
+    purga = Purga(tamano=tamano, pausa=pausa)
+    purga.profesores(Profesor.todos.filter(eliminado_en__lte=limite))
+    purga.cursos(Curso.todos.filter(eliminado_en__lte=limite))
+    purga.estudiantes(Estudiante.todos.filter(eliminado_en__lte=limite))
+    return dict(purga.borradas)
@@ -0,0 +1,201 @@
+import importlib.util
+
+from django.db.models import F
+
+from .models import Calificacion
+
+# --------------------------------------------------------------------------
+# ESTADÍSTICAS DE CALIFICACIONES: DISTRIBUCIÓN, POSICIÓN Y PERCENTIL
+# --------------------------------------------------------------------------
+# Las calificaciones de un alcance (un curso, o un periodo completo) se leen
+# con un solo values_list y se convierten en arreglos de NumPy; todo lo demás
+# se calcula sobre los arreglos, sin recorrer filas en Python:
+#   - final de cada inscripción: np.bincount de puntaje * peso entre el de los
+#     pesos, agrupando con el índice inverso de np.unique;
+#   - promedio del estudiante en el periodo: lo mismo sobre los finales,
+#     ponderados por Curso.creditos (igual que el kardex);
+#   - distribución: media, mediana, desviación, cuartiles e histograma;
+#   - posición (1 + cuántos tienen un promedio mayor; empates comparten lugar)
+#     y percentil (porcentaje con promedio menor o igual) con np.searchsorted
+#     sobre los promedios ordenados.
+# NumPy es opcional: sin él la página de calificaciones no muestra el bloque
+# de estadísticas y el endpoint JSON responde 503.
+
+LIMITES_HISTOGRAMA = (0, 100)
+CLASES_HISTOGRAMA = 10
+
+COLUMNAS = ('inscripcion_id', 'inscripcion__estudiante_id', 'inscripcion__curso_id', 'curso_creditos', 'puntaje', 'porcentaje_peso')
+
+
+class EstadisticasNoDisponibles(RuntimeError):
+    """NumPy no está instalado."""
+
+
+def numpy_disponible():
+    return importlib.util.find_spec('numpy') is not None
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError as exc:
+        raise EstadisticasNoDisponibles("Las estadísticas de calificaciones requieren instalar 'numpy'.") from exc
+    return numpy
+
+
+def _redondear(valor):
+    return round(float(valor), 2)
+
+
+# ------------------------------------------
+# CÁLCULOS SOBRE ARREGLOS
+# ------------------------------------------
+
+def distribucion(valores):
+    """Resumen de un arreglo de promedios; None si está vacío."""
+    np = _numpy()
+    valores = np.asarray(valores, dtype=np.float64)
+    if not valores.size:
+        return None
+    q1, mediana, q3 = np.percentile(valores, [25, 50, 75])
+    conteos, bordes = np.histogram(valores, bins=CLASES_HISTOGRAMA, range=LIMITES_HISTOGRAMA)
+    return {
+        'n': int(valores.size),
+        'media': _redondear(valores.mean()),
+        'mediana': _redondear(mediana),
+        'desviacion': _redondear(valores.std()),
+        'minimo': _redondear(valores.min()),
+        'maximo': _redondear(valores.max()),
+        'cuartiles': [_redondear(q1), _redondear(mediana), _redondear(q3)],
+        'histograma': [
+            {'desde': _redondear(desde), 'hasta': _redondear(hasta), 'conteo': int(conteo)}
+            for desde, hasta, conteo in zip(bordes[:-1], bordes[1:], conteos)
+        ],
+    }
+
+
+def posiciones(valores):
+    """(posición, percentil) de cada valor dentro del arreglo, como arreglos alineados."""
+    np = _numpy()
+    valores = np.asarray(valores, dtype=np.float64)
+    ordenados = np.sort(valores)
+    mayores = valores.size - np.searchsorted(ordenados, valores, side='right')
+    percentil = 100.0 * np.searchsorted(ordenados, valores, side='right') / max(valores.size, 1)
+    return mayores + 1, np.round(percentil, 1)
+
+
+def _promedios_agrupados(grupos, valores, pesos):
+    """Promedio ponderado de 'valores' por grupo: (claves, promedios)."""
+    np = _numpy()
+    claves, indice = np.unique(grupos, return_inverse=True)
+    suma_pesos = np.bincount(indice, weights=pesos)
+    return claves, np.bincount(indice, weights=valores * pesos) / suma_pesos
+
+
+# ------------------------------------------
+# LECTURA DE UN ALCANCE
+# ------------------------------------------
+
+def leer_arreglos(calificaciones):
+    """Las columnas COLUMNAS de 'calificaciones' como arreglos de NumPy (una consulta)."""
+    np = _numpy()
+    filas = calificaciones.filter(porcentaje_peso__gt=0).values_list(*COLUMNAS)
+    datos = np.array(list(filas), dtype=np.float64).reshape(-1, len(COLUMNAS))
+    return {
+        'inscripcion': datos[:, 0].astype(np.int64),
+        'estudiante': datos[:, 1].astype(np.int64),
+        'curso': datos[:, 2].astype(np.int64),
+        'creditos': datos[:, 3],
+        'puntaje': datos[:, 4],
+        'peso': datos[:, 5],
+    }
+
+
+def finales_por_inscripcion(arreglos):
+    """(inscripciones, estudiantes, cursos, creditos, finales) alineados, uno por inscripción."""
+    np = _numpy()
+    inscripciones, primera, indice = np.unique(arreglos['inscripcion'], return_index=True, return_inverse=True)
+    suma_pesos = np.bincount(indice, weights=arreglos['peso'])
+    finales = np.bincount(indice, weights=arreglos['puntaje'] * arreglos['peso']) / suma_pesos
+    return (
+        inscripciones, arreglos['estudiante'][primera], arreglos['curso'][primera],
+        arreglos['creditos'][primera], finales,
+    )
+
+
+def _clasificacion(llave, ids, promedios):
+    lugares, percentiles = posiciones(promedios)
+    filas = [
+        {llave: int(pk), 'promedio': _redondear(promedio), 'posicion': int(lugar), 'percentil': float(percentil)}
+        for pk, promedio, lugar, percentil in zip(ids, promedios, lugares, percentiles)
+    ]
+    return sorted(filas, key=lambda fila: (fila['posicion'], fila[llave]))
+
+
+def _calificaciones_vigentes():
+    return Calificacion.objects.filter(inscripcion__curso__eliminado_en__isnull=True).annotate(
+        curso_creditos=F('inscripcion__curso__creditos')
+    )
+
+
+def estadisticas_curso(curso_id, periodo=None, solo_activas=True):
+    """Distribución de los finales de un curso y la posición de cada inscripción."""
+    calificaciones = _calificaciones_vigentes().filter(inscripcion__curso_id=curso_id)
+    if solo_activas:
+        calificaciones = calificaciones.filter(inscripcion__esta_activo=True)
+    if periodo:
+        calificaciones = calificaciones.filter(inscripcion__periodo_academico=periodo)
+    inscripciones, estudiantes, _, _, finales = finales_por_inscripcion(leer_arreglos(calificaciones))
+    clasificacion = _clasificacion('inscripcion_id', inscripciones, finales)
+    por_inscripcion = dict(zip(inscripciones.tolist(), estudiantes.tolist()))
+    for fila in clasificacion:
+        fila['estudiante_id'] = por_inscripcion[fila['inscripcion_id']]
+    return {
+        'curso_id': curso_id,
+        'periodo': periodo,
+        'distribucion': distribucion(finales),
+        'clasificacion': clasificacion,
+    }
+
+
+def estadisticas_periodo(periodo):
+    """
+    Distribución de los promedios por estudiante del periodo (finales ponderados por
+    créditos), la posición de cada estudiante y la distribución de cada curso.
+    """
+    np = _numpy()
+    calificaciones = _calificaciones_vigentes().filter(inscripcion__periodo_academico=periodo)
+    _, estudiantes, cursos, creditos, finales = finales_por_inscripcion(leer_arreglos(calificaciones))
+    with np.errstate(invalid='ignore'):
+        ids, promedios = _promedios_agrupados(estudiantes, finales, creditos)
+    # Un estudiante solo con cursos de 0 créditos no tiene promedio del periodo
+    con_promedio = ~np.isnan(promedios)
+    ids, promedios = ids[con_promedio], promedios[con_promedio]
+    # Ordenados por curso, los finales de cada curso quedan en un tramo contiguo
+    orden = np.argsort(cursos, kind='stable')
+    ids_curso, inicios = np.unique(cursos[orden], return_index=True)
+    tramos = np.split(finales[orden], inicios[1:]) if ids_curso.size else []
+    return {
+        'periodo': periodo,
+        'distribucion': distribucion(promedios),
+        'clasificacion': _clasificacion('estudiante_id', ids, promedios),
+        'cursos': {int(curso_id): distribucion(tramo) for curso_id, tramo in zip(ids_curso, tramos)},
+    }
+
+
+def estadisticas_de_inscripciones(inscripciones):
+    """
+    Para la página de calificaciones, que ya tiene los finales calculados
+    ('promedio_ponderado' de calificaciones.inscripciones_con_calificaciones):
+    agrega 'posicion' y 'percentil' a cada inscripción y devuelve la distribución,
+    sin otra consulta. None si NumPy no está instalado.
+    """
+    if not numpy_disponible():
+        return None
+    con_final = [i for i in inscripciones if i.promedio_ponderado is not None]
+    finales = [float(i.promedio_ponderado) for i in con_final]
+    if finales:
+        lugares, percentiles = posiciones(finales)
+        for inscripcion, lugar, percentil in zip(con_final, lugares, percentiles):
+            inscripcion.posicion, inscripcion.percentil = int(lugar), float(percentil)
+    return distribucion(finales)
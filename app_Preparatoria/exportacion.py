@@ -0,0 +1,81 @@
+import csv
+
+from .models import Calificacion, Asistencia, q_inscripcion_vigente
+
+# --------------------------------------------------------------------------
+# EXPORTACIÓN CSV EN FLUJO (STREAMING)
+# --------------------------------------------------------------------------
+# Las filas se leen con values_list(...).iterator(chunk_size=...) y se van
+# escribiendo al cliente conforme se generan, por lo que la memoria usada es
+# constante sin importar cuántas filas tenga la descarga.
+
+TAMANO_BLOQUE_EXPORTACION = 2000
+
+COLUMNAS_CALIFICACIONES = (
+    ('inscripcion__estudiante__matricula', 'Matrícula'),
+    ('inscripcion__estudiante__nombre_estudiante', 'Nombre'),
+    ('inscripcion__estudiante__apellido_estudiante', 'Apellido'),
+    ('inscripcion__curso__codigo', 'Código Curso'),
+    ('inscripcion__curso__nombre_curso', 'Curso'),
+    ('inscripcion__periodo_academico', 'Periodo'),
+    ('tipo_evaluacion', 'Tipo Evaluación'),
+    ('puntaje', 'Puntaje'),
+    ('porcentaje_peso', 'Peso (%)'),
+    ('fecha_evaluacion', 'Fecha Evaluación'),
+    ('comentarios', 'Comentarios'),
+)
+
+COLUMNAS_ASISTENCIAS = (
+    ('inscripcion__estudiante__matricula', 'Matrícula'),
+    ('inscripcion__estudiante__nombre_estudiante', 'Nombre'),
+    ('inscripcion__estudiante__apellido_estudiante', 'Apellido'),
+    ('inscripcion__curso__codigo', 'Código Curso'),
+    ('inscripcion__curso__nombre_curso', 'Curso'),
+    ('inscripcion__periodo_academico', 'Periodo'),
+    ('fecha', 'Fecha'),
+    ('tipo_sesion', 'Tipo Sesión'),
+    ('presente', 'Presente'),
+    ('justificacion_aprobada', 'Justificada'),
+    ('observaciones', 'Observaciones'),
+)
+
+
+class _Eco:
+    """Objeto tipo archivo cuyo write() devuelve el texto en lugar de guardarlo."""
+
+    def write(self, valor):
+        return valor
+
+
+def _filtrar_por_alcance(queryset, curso_id=None, periodo=None):
+    # Sin los cursos y estudiantes eliminados (borrado lógico) que esperan la purga
+    queryset = queryset.filter(q_inscripcion_vigente('inscripcion__'))
+    if curso_id is not None:
+        queryset = queryset.filter(inscripcion__curso_id=curso_id)
+    if periodo:
+        queryset = queryset.filter(inscripcion__periodo_academico=periodo)
+    return queryset
+
+
+def filas_csv(queryset, columnas, chunk_size=TAMANO_BLOQUE_EXPORTACION):
+    """Genera las líneas CSV (encabezado incluido) de 'queryset' sin materializarlo."""
+    escritor = csv.writer(_Eco())
+    # BOM para que Excel reconozca UTF-8
+    yield '\ufeff' + escritor.writerow([titulo for _, titulo in columnas])
+    campos = [campo for campo, _ in columnas]
+    for fila in queryset.values_list(*campos).iterator(chunk_size=chunk_size):
+        yield escritor.writerow(fila)
+
+
+def filas_calificaciones(curso_id=None, periodo=None):
+    queryset = _filtrar_por_alcance(Calificacion.objects.all(), curso_id, periodo).order_by(
+        'inscripcion__curso_id', 'inscripcion_id', 'fecha_evaluacion', 'id'
+    )
+    return filas_csv(queryset, COLUMNAS_CALIFICACIONES)
+
+
+def filas_asistencias(curso_id=None, periodo=None):
+    queryset = _filtrar_por_alcance(Asistencia.objects.all(), curso_id, periodo).order_by(
+        'inscripcion__curso_id', 'inscripcion_id', 'fecha'
+    )
+    return filas_csv(queryset, COLUMNAS_ASISTENCIAS)
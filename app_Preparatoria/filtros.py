@@ -0,0 +1,81 @@
+from django.db.models import Q
+
+# --------------------------------------------------------------------------
+# FILTROS POR QUERY STRING PARA LOS LISTADOS
+# --------------------------------------------------------------------------
+# Las búsquedas por prefijo se traducen a un rango (campo >= 'Gar' AND
+# campo < 'Gas') en lugar de LIKE, para que la base de datos pueda usar el
+# índice compuesto (apellido_estudiante, nombre_estudiante) en cualquier motor.
+
+
+def _siguiente_prefijo(prefijo):
+    """Menor cadena mayor que todas las que empiezan con 'prefijo' ('Gar' -> 'Gas')."""
+    return prefijo[:-1] + chr(ord(prefijo[-1]) + 1)
+
+
+def q_prefijo(campo, prefijo):
+    """Q que selecciona las filas cuyo 'campo' empieza con 'prefijo' (también en Mayúscula Inicial)."""
+    variantes = {prefijo, prefijo[:1].upper() + prefijo[1:]}
+    q = Q()
+    for variante in variantes:
+        q |= Q(**{f'{campo}__gte': variante, f'{campo}__lt': _siguiente_prefijo(variante)})
+    return q
+
+
+def _texto(params, nombre):
+    return (params.get(nombre) or '').strip()
+
+
+def filtrar_estudiantes(queryset, params):
+    """
+    Filtros admitidos: apellido (prefijo), nombre (prefijo), matricula (prefijo).
+    Devuelve (queryset, filtros_aplicados).
+    """
+    filtros = {}
+    apellido = _texto(params, 'apellido')
+    nombre = _texto(params, 'nombre')
+    matricula = _texto(params, 'matricula')
+
+    if apellido:
+        queryset = queryset.filter(q_prefijo('apellido_estudiante', apellido))
+        filtros['apellido'] = apellido
+    if nombre:
+        queryset = queryset.filter(q_prefijo('nombre_estudiante', nombre))
+        filtros['nombre'] = nombre
+    if matricula:
+        queryset = queryset.filter(q_prefijo('matricula', matricula.upper()) | q_prefijo('matricula', matricula))
+        filtros['matricula'] = matricula
+    return queryset, filtros
+
+
+def filtrar_inscripciones(queryset, params):
+    """
+    Filtros admitidos: curso (ID), periodo (exacto), activo ('1' por defecto, '0', 'todos'),
+    matricula (prefijo) y apellido (prefijo del estudiante).
+    Devuelve (queryset, filtros_aplicados).
+    """
+    filtros = {}
+    curso = _texto(params, 'curso')
+    periodo = _texto(params, 'periodo')
+    activo = _texto(params, 'activo') or '1'
+    matricula = _texto(params, 'matricula')
+    apellido = _texto(params, 'apellido')
+
+    if curso.isdigit():
+        queryset = queryset.filter(curso_id=int(curso))
+        filtros['curso'] = int(curso)
+    if activo in ('1', '0'):
+        queryset = queryset.filter(esta_activo=(activo == '1'))
+    filtros['activo'] = activo
+    if periodo:
+        queryset = queryset.filter(periodo_academico=periodo)
+        filtros['periodo'] = periodo
+    if matricula:
+        queryset = queryset.filter(
+            q_prefijo('estudiante__matricula', matricula.upper()) | q_prefijo('estudiante__matricula', matricula)
+        )
+        filtros['matricula'] = matricula
+    if apellido:
+        queryset = queryset.filter(q_prefijo('estudiante__apellido_estudiante', apellido))
+        filtros['apellido'] = apellido
+    return queryset, filtros
@@ -0,0 +1,85 @@
+from datetime import datetime
+
+from django.db.models import Count, Q
+
+from .models import Asistencia
+from .paginacion import codificar_cursor, decodificar_cursor
+
+# --------------------------------------------------------------------------
+# HISTORIAL DE ASISTENCIA POR BLOQUES
+# --------------------------------------------------------------------------
+# Una inscripción de varios ciclos puede acumular cientos de asistencias. El
+# historial se lee por bloques del más reciente al más antiguo, continuando
+# desde la última fecha vista (token "cargar más"), dentro de un rango de
+# fechas opcional. Solo se leen las columnas que muestra la plantilla y los
+# totales (presentes, ausentes, justificadas) salen de una sola consulta con
+# agregación condicional.
+
+TAMANO_BLOQUE_HISTORIAL = 50
+
+CAMPOS_HISTORIAL = (
+    'id', 'fecha', 'presente', 'tipo_sesion', 'hora_registro', 'observaciones', 'justificacion_aprobada',
+)
+
+
+def _fecha_param(valor):
+    """Fecha YYYY-MM-DD o None; el valor del cursor puede no ser una cadena."""
+    if not isinstance(valor, str) or not valor:
+        return None
+    try:
+        return datetime.strptime(valor, '%Y-%m-%d').date()
+    except ValueError:
+        return None
+
+
+def rango_fechas(params):
+    """Lee 'desde' y 'hasta' (YYYY-MM-DD) del query string; los inválidos se ignoran."""
+    desde, hasta = _fecha_param(params.get('desde')), _fecha_param(params.get('hasta'))
+    if desde and hasta and desde > hasta:
+        desde, hasta = hasta, desde
+    return desde, hasta
+
+
+def _asistencias(inscripcion_id, desde=None, hasta=None):
+    queryset = Asistencia.objects.filter(inscripcion_id=inscripcion_id)
+    if desde:
+        queryset = queryset.filter(fecha__gte=desde)
+    if hasta:
+        queryset = queryset.filter(fecha__lte=hasta)
+    return queryset
+
+
+def resumen_asistencia(inscripcion_id, desde=None, hasta=None):
+    """Totales del rango en una sola consulta: total, presentes, ausentes, justificadas y porcentaje."""
+    resumen = _asistencias(inscripcion_id, desde, hasta).aggregate(
+        total=Count('id'),
+        presentes=Count('id', filter=Q(presente=True)),
+        ausentes=Count('id', filter=Q(presente=False)),
+        justificadas=Count('id', filter=Q(presente=False, justificacion_aprobada=True)),
+    )
+    total = resumen['total']
+    resumen['porcentaje'] = round(100.0 * resumen['presentes'] / total, 1) if total else None
+    return resumen
+
+
+def bloque_historial(inscripcion_id, desde=None, hasta=None, token=None, tamano=TAMANO_BLOQUE_HISTORIAL):
+    """
+    Devuelve (registros, token_siguiente) con hasta 'tamano' asistencias, de la más
+    reciente a la más antigua, a partir del token recibido. El token es None cuando
+    ya no hay más registros.
+    """
+    queryset = _asistencias(inscripcion_id, desde, hasta).only(*CAMPOS_HISTORIAL).order_by('-fecha', '-id')
+    cursor = decodificar_cursor(token)
+    if cursor:
+        fecha = _fecha_param(cursor[0])
+        if fecha:
+            queryset = queryset.filter(Q(fecha__lt=fecha) | Q(fecha=fecha, id__lt=cursor[1]))
+
+    # Una fila extra solo para saber si hay otro bloque.
+    registros = list(queryset[:tamano + 1])
+    siguiente = None
+    if len(registros) > tamano:
+        registros = registros[:tamano]
+        ultimo = registros[-1]
+        siguiente = codificar_cursor(ultimo.fecha.isoformat(), ultimo.pk, 'sig')
+    return registros, siguiente
@@ -0,0 +1,260 @@
+import heapq
+import re
+import unicodedata
+from datetime import time
+
+from django.db import transaction
+
+from .models import DIAS_SEMANA, Curso, SesionCurso
+
+# --------------------------------------------------------------------------
+# HORARIO ESTRUCTURADO: SESIONES, CHOQUES Y AULAS LIBRES
+# --------------------------------------------------------------------------
+# Curso.horario sigue siendo texto libre ("Lunes y Miércoles 08:00-10:00"),
+# pero al guardar un curso se interpreta como sesiones (día, inicio, fin, aula)
+# en SesionCurso. Dos sesiones chocan si son el mismo día y
+# inicio_a < fin_b y inicio_b < fin_a:
+#   - al guardar un curso se buscan choques de aula y de profesor con una
+#     consulta por sesión sobre los índices (aula, día, inicio) y
+#     (curso, día, inicio), sin recorrer el horario completo;
+#   - el reporte de todo el horario ordena las sesiones una vez y las recorre
+#     con una línea de barrido (un montículo de sesiones abiertas por aula y
+#     por profesor), en lugar de comparar todas contra todas.
+
+NOMBRES_DIA = dict(DIAS_SEMANA)
+
+# Incluye las iniciales de los horarios ya capturados: "L a V", "L a Mi", "M y J"
+_DIAS = {
+    'lunes': 0, 'lun': 0, 'lu': 0, 'l': 0,
+    'martes': 1, 'mar': 1, 'ma': 1, 'm': 1,
+    'miercoles': 2, 'mie': 2, 'mi': 2, 'x': 2,
+    'jueves': 3, 'jue': 3, 'ju': 3, 'j': 3,
+    'viernes': 4, 'vie': 4, 'vi': 4, 'v': 4,
+    'sabado': 5, 'sab': 5, 'sa': 5, 's': 5,
+    'domingo': 6, 'dom': 6, 'do': 6, 'd': 6,
+}
+_CONECTORES = {'y', 'e', 'de', 'el', 'los'}
+# 'a' y '-' entre dos días indican un rango: "Lunes a Viernes", "Lun-Vie"
+_RANGO_DIAS = {'a', '-'}
+
+# 8-10, 08:00-10:00, 8:30 a 10, 14.00-16.00
+_RANGO_HORAS = re.compile(r'(\d{1,2})(?:[:.](\d{2}))?\s*(?:-|a)\s*(\d{1,2})(?:[:.](\d{2}))?(?:\s*h(?:rs?)?\b)?')
+
+FORMATO_HORARIO = "Día(s) y horas, p. ej. 'Lunes y Miércoles 08:00-10:00; Viernes 12-14' o 'L a V 9:30-11:00'"
+
+
+class HorarioInvalido(ValueError):
+    """El texto del horario no se pudo interpretar como sesiones."""
+
+
+# ------------------------------------------
+# INTERPRETACIÓN DEL TEXTO
+# ------------------------------------------
+
+def _normalizar(texto):
+    texto = texto.replace('–', '-').replace('—', '-')
+    sin_acentos = unicodedata.normalize('NFKD', texto).encode('ascii', 'ignore').decode('ascii')
+    return sin_acentos.lower()
+
+
+def _hora(horas, minutos):
+    horas, minutos = int(horas), int(minutos or 0)
+    if horas == 24 and minutos == 0:
+        return time(23, 59)
+    if horas > 23 or minutos > 59:
+        raise HorarioInvalido(f"Hora inválida: {horas}:{minutos:02d}")
+    return time(horas, minutos)
+
+
+def _dias(texto):
+    """Días mencionados antes de un rango de horas; admite 'lunes a viernes' y 'lun-vie'."""
+    palabras = [p for p in re.findall(r'[a-z]+|-', texto) if p not in _CONECTORES]
+    dias = []
+    for i, palabra in enumerate(palabras):
+        if palabra in _RANGO_DIAS and dias and i + 1 < len(palabras) and palabras[i + 1] in _DIAS:
+            # Rango de días: se completan los intermedios
+            dias.extend(range(dias[-1] + 1, _DIAS[palabras[i + 1]]))
+            continue
+        if palabra == '-':
+            continue
+        if palabra not in _DIAS:
+            raise HorarioInvalido(f"Día no reconocido: '{palabra}'")
+        dias.append(_DIAS[palabra])
+    return dias
+
+
+def interpretar_horario(texto):
+    """
+    Convierte el texto de un horario en una lista ordenada de (dia, hora_inicio, hora_fin).
+    Cada rango de horas aplica a los días escritos antes de él; si no hay días
+    entre dos rangos ("Lunes 8-10 y 12-14") se repiten los del rango anterior.
+    Lanza HorarioInvalido si sobra texto, falta el día o el intervalo es vacío.
+    """
+    normalizado = _normalizar(texto or '')
+    sesiones = set()
+    anterior = 0
+    dias_previos = []
+    for rango in _RANGO_HORAS.finditer(normalizado):
+        dias = _dias(normalizado[anterior:rango.start()]) or dias_previos
+        if not dias:
+            raise HorarioInvalido(f"Falta el día antes de '{rango.group(0)}'")
+        dias_previos = dias
+        inicio, fin = _hora(rango.group(1), rango.group(2)), _hora(rango.group(3), rango.group(4))
+        if fin <= inicio:
+            raise HorarioInvalido(f"La hora final debe ser posterior a la inicial: '{rango.group(0)}'")
+        sesiones.update((dia, inicio, fin) for dia in dias)
+        anterior = rango.end()
+    if re.search(r'[a-z0-9]', normalizado[anterior:]):
+        raise HorarioInvalido(f"No se reconoce el horario '{texto}'. Formato: {FORMATO_HORARIO}")
+    return sorted(sesiones)
+
+
+def construir_sesiones(horario, aula):
+    """SesionCurso sin guardar (ni curso asignado) para un horario y un aula."""
+    return [
+        SesionCurso(dia_semana=dia, hora_inicio=inicio, hora_fin=fin, aula=aula or '')
+        for dia, inicio, fin in interpretar_horario(horario)
+    ]
+
+
+# ------------------------------------------
+# CHOQUES AL GUARDAR UN CURSO
+# ------------------------------------------
+
+def _se_traslapan(a, b):
+    return a.dia_semana == b.dia_semana and a.hora_inicio < b.hora_fin and b.hora_inicio < a.hora_fin
+
+
+def _traslape(queryset, sesion):
+    return queryset.filter(
+        dia_semana=sesion.dia_semana, hora_inicio__lt=sesion.hora_fin, hora_fin__gt=sesion.hora_inicio
+    )
+
+
+def buscar_conflictos(sesiones, profesor_id, excluir_curso_id=None):
+    """
+    Choques de las sesiones nuevas de un curso con el horario guardado y entre sí.
+    Devuelve una lista de (tipo, sesion_nueva, sesion_existente) con tipo 'aula' o
+    'profesor'; sesion_existente trae su curso cargado.
+    """
+    conflictos = []
+    for i, sesion in enumerate(sesiones):
+        for otra in sesiones[i + 1:]:
+            if _se_traslapan(sesion, otra):
+                conflictos.append(('profesor', sesion, otra))
+
+    existentes = SesionCurso.objects.select_related('curso')
+    if excluir_curso_id:
+        existentes = existentes.exclude(curso_id=excluir_curso_id)
+    for sesion in sesiones:
+        if sesion.aula:
+            conflictos.extend(('aula', sesion, s) for s in _traslape(existentes.filter(aula=sesion.aula), sesion))
+        if profesor_id:
+            conflictos.extend(
+                ('profesor', sesion, s) for s in _traslape(existentes.filter(curso__profesor_id=profesor_id), sesion)
+            )
+    return conflictos
+
+
+def describir_conflicto(tipo, sesion, existente):
+    dia = NOMBRES_DIA[sesion.dia_semana]
+    curso = existente.curso if existente.curso_id else None
+    otro = f"{curso.codigo} " if curso else ""
+    motivo = f"el aula {sesion.aula}" if tipo == 'aula' else "el profesor"
+    return (
+        f"{dia} {sesion.hora_inicio:%H:%M}-{sesion.hora_fin:%H:%M}: {motivo} ya está ocupado por "
+        f"{otro}({existente.hora_inicio:%H:%M}-{existente.hora_fin:%H:%M})"
+    )
+
+
+def guardar_sesiones(curso, sesiones):
+    """Reemplaza las sesiones del curso por 'sesiones'."""
+    with transaction.atomic():
+        SesionCurso.objects.filter(curso=curso).delete()
+        for sesion in sesiones:
+            sesion.curso = curso
+        SesionCurso.objects.bulk_create(sesiones)
+
+
+def generar_sesiones(curso_ids=None):
+    """
+    Interpreta el horario de los cursos indicados (todos si es None) y reemplaza sus
+    sesiones. Devuelve (sesiones_creadas, {curso_id: error}) de los que no se pudieron leer.
+    """
+    cursos = Curso.objects.only('id', 'horario', 'aula').order_by('id')
+    if curso_ids is not None:
+        cursos = cursos.filter(pk__in=curso_ids)
+    creadas, invalidos = 0, {}
+    for curso in cursos.iterator():
+        try:
+            sesiones = construir_sesiones(curso.horario, curso.aula)
+        except HorarioInvalido as exc:
+            invalidos[curso.pk] = str(exc)
+            continue
+        guardar_sesiones(curso, sesiones)
+        creadas += len(sesiones)
+    return creadas, invalidos
+
+
+# ------------------------------------------
+# CONSULTAS SOBRE EL HORARIO COMPLETO
+# ------------------------------------------
+
+def aulas_libres(dia_semana, hora_inicio, hora_fin):
+    """Aulas con alguna sesión registrada que están libres en el intervalo dado."""
+    ocupadas = _traslape(SesionCurso.objects.all(), SesionCurso(
+        dia_semana=dia_semana, hora_inicio=hora_inicio, hora_fin=hora_fin
+    )).values('aula')
+    return list(
+        SesionCurso.objects.exclude(aula='').exclude(aula__in=ocupadas)
+        .order_by('aula').values_list('aula', flat=True).distinct()
+    )
+
+
+def reporte_conflictos():
+    """
+    Todos los choques de aula y de profesor del horario en una pasada de línea de
+    barrido: una consulta ordenada por (día, inicio) y, por cada aula y cada
+    profesor, un montículo con las sesiones aún abiertas ordenadas por hora de
+    fin. Costo O(n log n + choques). Devuelve una lista de diccionarios.
+    """
+    filas = SesionCurso.objects.order_by('dia_semana', 'hora_inicio', 'id').values(
+        'id', 'dia_semana', 'hora_inicio', 'hora_fin', 'aula',
+        'curso_id', 'curso__codigo', 'curso__profesor_id',
+        'curso__profesor__nombre_profesor', 'curso__profesor__apellido_profesor',
+    )
+    conflictos = []
+    dia_actual = None
+    abiertas = {}
+    for fila in filas.iterator():
+        if fila['dia_semana'] != dia_actual:
+            dia_actual, abiertas = fila['dia_semana'], {}
+        llaves = [('profesor', fila['curso__profesor_id'])]
+        if fila['aula']:
+            llaves.append(('aula', fila['aula']))
+        for llave in llaves:
+            monticulo = abiertas.setdefault(llave, [])
+            # Se cierran las sesiones que terminaron antes de que empiece esta
+            while monticulo and monticulo[0][0] <= fila['hora_inicio']:
+                heapq.heappop(monticulo)
+            for _, _, otra in monticulo:
+                if otra['curso_id'] != fila['curso_id']:
+                    conflictos.append(_fila_conflicto(llave[0], otra, fila))
+            heapq.heappush(monticulo, (fila['hora_fin'], fila['id'], fila))
+    return conflictos
+
+
+def _fila_conflicto(tipo, a, b):
+    if tipo == 'aula':
+        recurso = f"Aula {a['aula']}"
+    else:
+        recurso = f"{a['curso__profesor__nombre_profesor']} {a['curso__profesor__apellido_profesor']}"
+    return {
+        'tipo': tipo,
+        'recurso': recurso,
+        'dia': NOMBRES_DIA[a['dia_semana']],
+        'inicio': max(a['hora_inicio'], b['hora_inicio']),
+        'fin': min(a['hora_fin'], b['hora_fin']),
+        'curso_a': a['curso__codigo'],
+        'curso_b': b['curso__codigo'],
+    }
@@ -0,0 +1,373 @@
+import csv
+import io
+import zipfile
+from collections import Counter
+from datetime import datetime
+from itertools import islice
+
+from django.db import transaction
+
+from .cupos import ajustar_inscritos, bloquear_cursos, contar_por_curso, tiene_cupo
+from .horarios import HorarioInvalido, construir_sesiones
+from .listas_cache import incrementar_version
+from .models import Profesor, Curso, Estudiante, Inscripcion, SesionCurso
+
+# --------------------------------------------------------------------------
+# IMPORTACIÓN MASIVA DESDE CSV / XLSX
+# --------------------------------------------------------------------------
+# El archivo se lee como un flujo de filas y se procesa en lotes de tamaño
+# fijo: cada lote se valida, se filtran los duplicados contra la base de datos
+# con una sola consulta y se inserta con bulk_create dentro de una transacción.
+# Las llaves foráneas (profesor de un curso, cursos de un estudiante) se
+# resuelven con un diccionario construido una sola vez por importación, así
+# que la memoria usada no depende del tamaño del archivo.
+
+TAMANO_LOTE_DEFAULT = 1000
+MAX_ERRORES_REPORTADOS = 50
+
+# Llave con el número de celdas con valor que sobran a la derecha del encabezado
+CELDAS_SOBRANTES = '__celdas_sobrantes__'
+
+
+class ResultadoImportacion:
+    """Conteo de filas creadas, omitidas (ya existentes) y con error."""
+
+    def __init__(self):
+        self.creados = 0
+        self.omitidos = 0
+        self.con_error = 0
+        self.errores = []  # [(numero_linea, mensaje)], acotado a MAX_ERRORES_REPORTADOS
+
+    def registrar_error(self, linea, mensaje):
+        self.con_error += 1
+        if len(self.errores) < MAX_ERRORES_REPORTADOS:
+            self.errores.append((linea, mensaje))
+
+
+# ------------------------------------------
+# LECTURA DEL ARCHIVO
+# ------------------------------------------
+# Un archivo ilegible se reporta siempre como ValueError (la vista y el comando
+# importar_datos solo atrapan ese tipo), sin importar qué lector falló.
+
+def _marcar_sobrantes(fila, sobrantes):
+    """Anota en 'fila' las celdas con valor más allá del encabezado (las vacías se ignoran)."""
+    con_valor = [c for c in sobrantes if c is not None and str(c).strip()]
+    if con_valor:
+        fila[CELDAS_SOBRANTES] = len(con_valor)
+    return fila
+
+
+def leer_filas_csv(archivo_binario, encoding='utf-8-sig'):
+    """Genera diccionarios {columna: valor} desde un archivo CSV binario."""
+    texto = io.TextIOWrapper(archivo_binario, encoding=encoding, newline='')
+    try:
+        for fila in csv.DictReader(texto, restkey=CELDAS_SOBRANTES):
+            sobrantes = fila.pop(CELDAS_SOBRANTES, [])
+            limpia = {(k or '').strip(): (v or '').strip() for k, v in fila.items()}
+            yield _marcar_sobrantes(limpia, sobrantes)
+    except csv.Error as exc:
+        raise ValueError(f"El archivo CSV no se pudo leer: {exc}") from exc
+    finally:
+        # Evita que el wrapper cierre el archivo subido al ser recolectado.
+        texto.detach()
+
+
+def leer_filas_xlsx(archivo_binario):
+    """Genera diccionarios desde la primera hoja de un XLSX (requiere openpyxl)."""
+    try:
+        from openpyxl import load_workbook
+        from openpyxl.utils.exceptions import InvalidFileException
+    except ImportError as exc:
+        raise ValueError("Para importar archivos XLSX se requiere instalar 'openpyxl'.") from exc
+
+    try:
+        libro = load_workbook(archivo_binario, read_only=True, data_only=True)
+    except (zipfile.BadZipFile, InvalidFileException, KeyError) as exc:
+        # KeyError: un ZIP válido al que le faltan las partes de un libro de Excel
+        raise ValueError(f"El archivo no es un XLSX válido: {exc}") from exc
+    try:
+        filas = libro.worksheets[0].iter_rows(values_only=True)
+        encabezados = [str(c or '').strip() for c in next(filas, [])]
+        # Todas las filas llegan rellenadas hasta la última columna usada en la
+        # hoja; las columnas sin encabezado al final cuentan como sobrantes.
+        while encabezados and not encabezados[-1]:
+            encabezados.pop()
+        for valores in filas:
+            yield _marcar_sobrantes({
+                col: ('' if valor is None else str(valor).strip())
+                for col, valor in zip(encabezados, valores)
+            }, valores[len(encabezados):])
+    finally:
+        libro.close()
+
+
+def leer_filas(archivo_binario, formato):
+    if formato == 'csv':
+        return leer_filas_csv(archivo_binario)
+    if formato == 'xlsx':
+        return leer_filas_xlsx(archivo_binario)
+    raise ValueError(f"Formato no soportado: {formato}")
+
+
+def formato_por_nombre(nombre):
+    """Deduce el formato ('csv' o 'xlsx') por la extensión del archivo."""
+    return 'xlsx' if str(nombre).lower().endswith('.xlsx') else 'csv'
+
+
+# ------------------------------------------
+# CONVERSIÓN DE VALORES
+# ------------------------------------------
+
+def _requerido(fila, columna):
+    valor = fila.get(columna, '')
+    if not valor:
+        raise ValueError(f"Falta la columna '{columna}'")
+    return valor
+
+
+def _booleano(valor, default=True):
+    if valor == '':
+        return default
+    return valor.lower() in ('1', 'si', 'sí', 'true', 'verdadero', 'x')
+
+
+def _fecha(valor):
+    # openpyxl entrega fechas como 'YYYY-MM-DD HH:MM:SS'
+    for formato in ('%Y-%m-%d', '%d/%m/%Y', '%Y-%m-%d %H:%M:%S'):
+        try:
+            return datetime.strptime(valor, formato).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Fecha inválida: '{valor}'")
+
+
+# ------------------------------------------
+# IMPORTADORES POR MODELO
+# ------------------------------------------
+
+class Importador:
+    """Base: construye instancias por fila y las inserta por lotes."""
+    modelo = None
+    campo_unico = None  # Campo usado para omitir filas ya existentes
+
+    def preparar(self):
+        """Construye una sola vez las tablas de búsqueda necesarias."""
+
+    def construir(self, fila):
+        raise NotImplementedError
+
+    def antes_de_insertar(self, construidos, resultado):
+        """
+        Dentro de la transacción del lote, justo antes del bulk_create. Recibe y
+        devuelve [(objeto, fila, linea)]; puede descartar filas registrando su error.
+        """
+        return construidos
+
+    def despues_de_insertar(self, objetos, filas):
+        """Permite insertar relaciones de los objetos recién creados."""
+
+    def importar(self, filas, tamano_lote=TAMANO_LOTE_DEFAULT):
+        self.preparar()
+        resultado = ResultadoImportacion()
+        # La línea 1 es el encabezado
+        numeradas = enumerate(filas, start=2)
+        while True:
+            lote = list(islice(numeradas, tamano_lote))
+            if not lote:
+                break
+            self._importar_lote(lote, resultado)
+        return resultado
+
+    def _importar_lote(self, lote, resultado):
+        construidos = []
+        for linea, fila in lote:
+            if fila.get(CELDAS_SOBRANTES):
+                resultado.registrar_error(
+                    linea, f"La fila tiene {fila[CELDAS_SOBRANTES]} celda(s) con valor fuera de las columnas del encabezado"
+                )
+                continue
+            try:
+                construidos.append((self.construir(fila), fila, linea))
+            except ValueError as exc:
+                resultado.registrar_error(linea, str(exc))
+
+        if self.campo_unico:
+            claves = [getattr(obj, self.campo_unico) for obj, _, _ in construidos]
+            # _base_manager incluye los eliminados (borrado lógico): su código sigue ocupado hasta la purga
+            existentes = set(
+                self.modelo._base_manager.filter(**{f'{self.campo_unico}__in': claves})
+                .values_list(self.campo_unico, flat=True)
+            )
+            vistos = set()
+            filtrados = []
+            for obj, fila, linea in construidos:
+                clave = getattr(obj, self.campo_unico)
+                if clave in existentes or clave in vistos:
+                    resultado.omitidos += 1
+                    continue
+                vistos.add(clave)
+                filtrados.append((obj, fila, linea))
+            construidos = filtrados
+
+        if not construidos:
+            return
+
+        with transaction.atomic():
+            construidos = self.antes_de_insertar(construidos, resultado)
+            if not construidos:
+                return
+            objetos = [obj for obj, _, _ in construidos]
+            self.modelo.objects.bulk_create(objetos)
+            self.despues_de_insertar(objetos, [fila for _, fila, _ in construidos])
+        # bulk_create no envía post_save: se invalida la caché de listas a mano.
+        incrementar_version(self.modelo._meta.model_name)
+        resultado.creados += len(objetos)
+
+
+class ImportadorProfesor(Importador):
+    """Columnas: nombre_profesor, apellido_profesor, correo_profesor, telefono, especialidad, activo."""
+    modelo = Profesor
+
+    def construir(self, fila):
+        return Profesor(
+            nombre_profesor=_requerido(fila, 'nombre_profesor'),
+            apellido_profesor=_requerido(fila, 'apellido_profesor'),
+            correo_profesor=_requerido(fila, 'correo_profesor'),
+            telefono=fila.get('telefono', ''),
+            especialidad=fila.get('especialidad', ''),
+            activo=_booleano(fila.get('activo', '')),
+        )
+
+
+class ImportadorCurso(Importador):
+    """
+    Columnas: nombre_curso, codigo, descripcion, creditos, horario, aula, profesor.
+    'profesor' puede ser el ID o el correo del profesor.
+    """
+    modelo = Curso
+    campo_unico = 'codigo'
+
+    def preparar(self):
+        self.profesores_por_correo = {}
+        self.profesores_ids = set()
+        for pk, correo in Profesor.objects.values_list('id', 'correo_profesor'):
+            self.profesores_ids.add(pk)
+            self.profesores_por_correo.setdefault(correo.lower(), pk)
+
+    def _profesor_id(self, valor):
+        if valor.isdigit() and int(valor) in self.profesores_ids:
+            return int(valor)
+        pk = self.profesores_por_correo.get(valor.lower())
+        if pk is None:
+            raise ValueError(f"Profesor no encontrado: '{valor}'")
+        return pk
+
+    def construir(self, fila):
+        valor_creditos = _requerido(fila, 'creditos')
+        if not valor_creditos.isdigit():
+            raise ValueError(f"Créditos inválidos: '{valor_creditos}'")
+        creditos = int(valor_creditos)
+        return Curso(
+            nombre_curso=_requerido(fila, 'nombre_curso'),
+            codigo=_requerido(fila, 'codigo'),
+            descripcion=fila.get('descripcion', ''),
+            creditos=creditos,
+            horario=fila.get('horario', ''),
+            aula=fila.get('aula', ''),
+            profesor_id=self._profesor_id(_requerido(fila, 'profesor')),
+        )
+
+    def despues_de_insertar(self, objetos, filas):
+        # Sesiones del horario estructurado; un horario que no se reconoce se deja
+        # solo como texto (el comando reporte_horario --generar lo vuelve a intentar).
+        sesiones = []
+        for curso in objetos:
+            try:
+                nuevas = construir_sesiones(curso.horario, curso.aula)
+            except HorarioInvalido:
+                continue
+            for sesion in nuevas:
+                sesion.curso = curso
+            sesiones.extend(nuevas)
+        SesionCurso.objects.bulk_create(sesiones)
+
+
+class ImportadorEstudiante(Importador):
+    """
+    Columnas: nombre_estudiante, apellido_estudiante, matricula, correo_estudiante,
+    fecha_nacimiento y opcionalmente cursos (códigos separados por ';') y periodo_academico.
+    """
+    modelo = Estudiante
+    campo_unico = 'matricula'
+
+    def preparar(self):
+        self.cursos_por_codigo = dict(Curso.objects.values_list('codigo', 'id'))
+
+    @staticmethod
+    def _codigos(fila):
+        return sorted({c.strip() for c in fila.get('cursos', '').split(';') if c.strip()})
+
+    def construir(self, fila):
+        codigos = self._codigos(fila)
+        faltantes = [c for c in codigos if c not in self.cursos_por_codigo]
+        if faltantes:
+            raise ValueError(f"Cursos no encontrados: {', '.join(faltantes)}")
+        return Estudiante(
+            nombre_estudiante=_requerido(fila, 'nombre_estudiante'),
+            apellido_estudiante=_requerido(fila, 'apellido_estudiante'),
+            matricula=_requerido(fila, 'matricula'),
+            correo_estudiante=_requerido(fila, 'correo_estudiante'),
+            fecha_nacimiento=_fecha(_requerido(fila, 'fecha_nacimiento')),
+        )
+
+    def antes_de_insertar(self, construidos, resultado):
+        # Como en inscribir_en_cursos: el cupo se valida con las filas de los
+        # cursos bloqueadas. Una fila que no cabe en alguno de sus cursos no se
+        # importa; los lugares que toman las filas aceptadas del lote se acumulan.
+        cursos = bloquear_cursos({
+            self.cursos_por_codigo[codigo] for _, fila, _ in construidos for codigo in self._codigos(fila)
+        })
+        tomados = Counter()
+        aceptados = []
+        for obj, fila, linea in construidos:
+            ids = [self.cursos_por_codigo[codigo] for codigo in self._codigos(fila)]
+            sin_cupo = [
+                cursos[curso_id].codigo for curso_id in ids
+                if curso_id in cursos and not tiene_cupo(cursos[curso_id], tomados[curso_id] + 1)
+            ]
+            if any(curso_id not in cursos for curso_id in ids):
+                resultado.registrar_error(linea, "Alguno de sus cursos fue eliminado durante la importación")
+            elif sin_cupo:
+                resultado.registrar_error(linea, f"Sin cupo disponible en: {', '.join(sin_cupo)}")
+            else:
+                tomados.update(ids)
+                aceptados.append((obj, fila, linea))
+        return aceptados
+
+    def despues_de_insertar(self, objetos, filas):
+        inscripciones = []
+        for estudiante, fila in zip(objetos, filas):
+            periodo = fila.get('periodo_academico') or None
+            for codigo in self._codigos(fila):
+                inscripcion = Inscripcion(estudiante=estudiante, curso_id=self.cursos_por_codigo[codigo])
+                if periodo:
+                    inscripcion.periodo_academico = periodo
+                inscripciones.append(inscripcion)
+        Inscripcion.objects.bulk_create(inscripciones)
+        ajustar_inscritos(contar_por_curso(inscripciones))
+
+
+IMPORTADORES = {
+    'profesor': ImportadorProfesor,
+    'curso': ImportadorCurso,
+    'estudiante': ImportadorEstudiante,
+}
+
+
+def importar_archivo(modelo, archivo_binario, formato='csv', tamano_lote=TAMANO_LOTE_DEFAULT):
+    """Importa 'archivo_binario' al modelo indicado ('profesor', 'curso' o 'estudiante')."""
+    if modelo not in IMPORTADORES:
+        raise ValueError(f"Modelo no soportado: {modelo}")
+    filas = leer_filas(archivo_binario, formato)
+    return IMPORTADORES[modelo]().importar(filas, tamano_lote=tamano_lote)
@@ -0,0 +1,216 @@
+from collections import Counter
+from datetime import date
+
+from django.db import transaction
+
+from .cupos import ajustar_inscritos, bloquear_cursos, contar_por_curso, tiene_cupo
+from .kardex import invalidar_kardex
+from .models import Inscripcion
+
+# --------------------------------------------------------------------------
+# ESCRITURAS MASIVAS DE INSCRIPCIONES
+# --------------------------------------------------------------------------
+
+
+class ResultadoInscripcion:
+    """Resumen de una inscripción masiva: cursos creados, ya existentes, sin cupo e inválidos."""
+
+    def __init__(self, creadas=None, existentes=None, invalidos=None, sin_cupo=None):
+        self.creadas = creadas or []
+        self.existentes = existentes or []
+        self.invalidos = invalidos or []
+        self.sin_cupo = sin_cupo or []
+
+
+def _normalizar_ids(ids):
+    """Convierte los IDs recibidos del formulario a enteros, descartando basura."""
+    normalizados = set()
+    for valor in ids:
+        try:
+            normalizados.add(int(valor))
+        except (TypeError, ValueError):
+            continue
+    return normalizados
+
+
+def inscribir_en_cursos(estudiante, curso_ids, periodo_academico, es_obligatorio=True):
+    """
+    Inscribe a 'estudiante' en todos los cursos de 'curso_ids' para un periodo.
+    Valida los cursos en una consulta, detecta las inscripciones existentes en
+    otra e inserta las faltantes con un único bulk_create dentro de una transacción.
+    Los cursos sin lugares disponibles se omiten (resultado.sin_cupo).
+    Si algún ID no corresponde a un curso no se escribe nada.
+    """
+    ids = _normalizar_ids(curso_ids)
+    if not ids:
+        return ResultadoInscripcion()
+
+    with transaction.atomic():
+        # Con las filas de los cursos bloqueadas, dos peticiones simultáneas no
+        # pueden tomar el último lugar ni insertar la misma inscripción.
+        cursos = bloquear_cursos(ids)
+        resultado = ResultadoInscripcion(invalidos=sorted(ids - set(cursos)))
+        if resultado.invalidos:
+            return resultado
+
+        ya_inscritos = set(
+            Inscripcion.objects.filter(
+                estudiante=estudiante,
+                periodo_academico=periodo_academico,
+                curso_id__in=cursos.keys(),
+            ).values_list('curso_id', flat=True)
+        )
+        nuevas = []
+        for curso_id, curso in cursos.items():
+            if curso_id in ya_inscritos:
+                continue
+            if not tiene_cupo(curso):
+                resultado.sin_cupo.append(curso)
+                continue
+            nuevas.append(Inscripcion(
+                estudiante=estudiante,
+                curso=curso,
+                periodo_academico=periodo_academico,
+                es_obligatorio=es_obligatorio,
+            ))
+        # Sin ignore_conflicts: la lectura de 'ya_inscritos' ocurre con los cursos
+        # bloqueados, así que ninguna otra transacción puede insertar la misma
+        # inscripción entre esa lectura y este INSERT. Una fila omitida en silencio
+        # por conflicto se contaría igual en ajustar_inscritos e inflaría el cupo;
+        # si aun así hubiera conflicto, el IntegrityError revierte todo el lote.
+        Inscripcion.objects.bulk_create(nuevas)
+        # bulk_create no envía post_save: el contador y el kardex se ajustan aquí.
+        ajustar_inscritos(contar_por_curso(nuevas))
+        invalidar_kardex([estudiante.pk])
+
+    resultado.creadas = [i.curso for i in nuevas]
+    resultado.existentes = [cursos[cid] for cid in sorted(ya_inscritos)]
+    return resultado
+
+
+# ------------------------------------------
+# SINCRONIZACIÓN DE CURSOS DE UN ESTUDIANTE POR PERIODO
+# ------------------------------------------
+# Sustituye a estudiante.cursos.set(): ese camino borra las inscripciones de
+# los cursos deseleccionados (y en cascada sus calificaciones y asistencias) de
+# todos los periodos, y crea las nuevas con el periodo por omisión. Aquí solo
+# se toca el periodo indicado, se calcula la diferencia contra las filas
+# actuales con una consulta, las bajas se marcan inactivas (conservan su
+# historial) y las altas se insertan con un bulk_create. Si la selección no
+# cambió no se escribe nada.
+
+class ResultadoSincronizacion(ResultadoInscripcion):
+    """Además de las altas: inscripciones dadas de baja y reactivadas."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.dadas_de_baja = []
+        self.reactivadas = []
+
+    @property
+    def sin_cambios(self):
+        return not (self.creadas or self.reactivadas or self.dadas_de_baja)
+
+
+def periodo_vigente(estudiante=None):
+    """Periodo más reciente del estudiante, o el periodo por omisión de Inscripcion."""
+    ultimo = None
+    if estudiante is not None:
+        ultimo = (
+            Inscripcion.objects.filter(estudiante=estudiante)
+            .order_by('-periodo_academico').values_list('periodo_academico', flat=True).first()
+        )
+    return ultimo or Inscripcion._meta.get_field('periodo_academico').default
+
+
+def sincronizar_inscripciones(estudiante, curso_ids, periodo_academico, es_obligatorio=True):
+    """
+    Deja a 'estudiante' inscrito (activo) en exactamente los cursos de 'curso_ids'
+    dentro de 'periodo_academico'. Los cursos quitados se dan de baja
+    (esta_activo=False, fecha_finalizacion=hoy); los que vuelven a elegirse se
+    reactivan y los nuevos se insertan. Las altas respetan el cupo de cada curso.
+    Si algún ID no corresponde a un curso no se escribe nada.
+    """
+    deseados = _normalizar_ids(curso_ids)
+    with transaction.atomic():
+        actuales = {
+            curso_id: (pk, activo)
+            for pk, curso_id, activo in Inscripcion.objects.filter(
+                estudiante=estudiante, periodo_academico=periodo_academico
+            ).values_list('id', 'curso_id', 'esta_activo')
+        }
+        activos = {curso_id for curso_id, (_, activo) in actuales.items() if activo}
+        altas, bajas = deseados - activos, activos - deseados
+
+        resultado = ResultadoSincronizacion()
+        if not altas and not bajas:
+            return resultado
+
+        # Solo las altas ocupan lugar: se bloquean los cursos antes de validar el cupo.
+        cursos = bloquear_cursos(altas | bajas)
+        resultado.invalidos = sorted(altas - set(cursos))
+        if resultado.invalidos:
+            return resultado
+
+        por_reactivar, nuevas = [], []
+        for curso_id in sorted(altas):
+            curso = cursos[curso_id]
+            if not tiene_cupo(curso):
+                resultado.sin_cupo.append(curso)
+            elif curso_id in actuales:
+                por_reactivar.append(actuales[curso_id][0])
+                resultado.reactivadas.append(curso)
+            else:
+                nuevas.append(Inscripcion(
+                    estudiante=estudiante,
+                    curso=curso,
+                    periodo_academico=periodo_academico,
+                    es_obligatorio=es_obligatorio,
+                ))
+
+        if bajas:
+            Inscripcion.objects.filter(pk__in=[actuales[c][0] for c in bajas]).update(
+                esta_activo=False, fecha_finalizacion=date.today()
+            )
+        if por_reactivar:
+            Inscripcion.objects.filter(pk__in=por_reactivar).update(esta_activo=True, fecha_finalizacion=None)
+        Inscripcion.objects.bulk_create(nuevas)
+
+        # update()/bulk_create no envían señales: el contador de cada curso se ajusta aquí.
+        deltas = Counter(c.pk for c in resultado.reactivadas) + contar_por_curso(nuevas)
+        deltas.subtract(dict.fromkeys(bajas, 1))
+        ajustar_inscritos(deltas)
+        invalidar_kardex([estudiante.pk])
+
+    resultado.creadas = [i.curso for i in nuevas]
+    resultado.dadas_de_baja = [cursos[c] for c in sorted(bajas)]
+    return resultado
+
+
+# ------------------------------------------
+# CIERRE DE PERIODO
+# ------------------------------------------
+# El cupo cuenta las inscripciones activas del curso de cualquier periodo (ver
+# cupos.py): un lugar se libera al dar de baja la inscripción, no al empezar
+# otro periodo. Al terminar un periodo se dan de baja todas sus inscripciones
+# activas de una vez.
+
+def cerrar_periodo(periodo_academico):
+    """
+    Da de baja (esta_activo=False, fecha_finalizacion=hoy) las inscripciones
+    activas de 'periodo_academico' y libera sus lugares. Devuelve cuántas cerró.
+    """
+    with transaction.atomic():
+        filas = list(
+            Inscripcion.objects.select_for_update()
+            .filter(periodo_academico=periodo_academico, esta_activo=True)
+            .values_list('id', 'curso_id', 'estudiante_id')
+        )
+        Inscripcion.objects.filter(pk__in=[pk for pk, _, _ in filas]).update(
+            esta_activo=False, fecha_finalizacion=date.today()
+        )
+        # update() no envía señales: el contador y el kardex se ajustan aquí.
+        ajustar_inscritos({curso_id: -n for curso_id, n in Counter(c for _, c, _ in filas).items()})
+        invalidar_kardex([e for _, _, e in filas])
+    return len(filas)
+
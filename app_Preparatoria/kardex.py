@@ -0,0 +1,186 @@
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, FloatField, Sum
+from django.db.models.functions import Cast
+
+from .listas_cache import version_modelo
+from .models import Calificacion, Inscripcion
+
+# --------------------------------------------------------------------------
+# KARDEX: CALIFICACIÓN FINAL POR CURSO Y PROMEDIO PONDERADO POR CRÉDITOS
+# --------------------------------------------------------------------------
+# La calificación final de una inscripción es el promedio ponderado de sus
+# calificaciones, suma(puntaje * porcentaje_peso) / suma(porcentaje_peso), que
+# ya está materializado en ResumenCalificacion (ver resumenes.py). Sobre esos
+# finales:
+#   promedio del periodo = suma(final * creditos) / suma(creditos)
+#   promedio acumulado   = lo mismo sobre todos los periodos
+# Solo cuentan las inscripciones con al menos una calificación; los cursos
+# eliminados (borrado lógico) no aparecen.
+#
+# - kardex_estudiante(): una consulta por estudiante, cacheada. La llave
+#   incluye la versión de 'curso' (cambio de créditos, curso eliminado) y se
+#   borra con invalidar_kardex() cuando cambia una calificación o una
+#   inscripción del estudiante (señales y escrituras masivas).
+# - promedios_cohorte(): promedios de muchos estudiantes con un solo GROUP BY
+#   (estudiante, periodo) en la base; el acumulado se obtiene de esas mismas
+#   sumas, sin una consulta por estudiante.
+
+TIMEOUT_KARDEX = 60 * 60
+
+CENTESIMOS = Decimal('0.01')
+
+
+def _redondear(valor):
+    return None if valor is None else Decimal(valor).quantize(CENTESIMOS, rounding=ROUND_HALF_UP)
+
+
+def _llave_kardex(estudiante_id):
+    return f'kardex:{estudiante_id}'
+
+
+def _inscripciones_vigentes():
+    return Inscripcion.objects.filter(curso__eliminado_en__isnull=True)
+
+
+# ------------------------------------------
+# INVALIDACIÓN
+# ------------------------------------------
+
+def invalidar_kardex(estudiante_ids):
+    """Descarta el kardex cacheado de los estudiantes; se aplica al confirmar la transacción."""
+    llaves = [_llave_kardex(pk) for pk in set(estudiante_ids)]
+    if llaves:
+        transaction.on_commit(lambda: cache.delete_many(llaves))
+
+
+def invalidar_kardex_inscripciones(inscripcion_ids):
+    """Como invalidar_kardex(), a partir de inscripciones (una consulta)."""
+    inscripcion_ids = list(inscripcion_ids)
+    if inscripcion_ids:
+        invalidar_kardex(
+            Inscripcion.objects.filter(pk__in=inscripcion_ids).values_list('estudiante_id', flat=True).distinct()
+        )
+
+
+def invalidar_kardex_calificacion(calificacion):
+    """Kardex del estudiante de una calificación; evita la consulta si la inscripción ya está cargada."""
+    if Calificacion.inscripcion.is_cached(calificacion):
+        invalidar_kardex([calificacion.inscripcion.estudiante_id])
+    else:
+        invalidar_kardex_inscripciones([calificacion.inscripcion_id])
+
+
+# ------------------------------------------
+# KARDEX DE UN ESTUDIANTE
+# ------------------------------------------
+
+def _promedio(puntos, creditos):
+    return puntos / creditos if creditos else None
+
+
+def calcular_kardex(estudiante_id):
+    """
+    Kardex de un estudiante en una sola consulta (sin caché):
+    {'periodos': [{'periodo', 'cursos', 'creditos', 'promedio'}], 'creditos', 'promedio'}.
+    Cada curso es un diccionario con codigo, nombre, creditos, calificaciones,
+    final (None si aún no tiene calificaciones) y esta_activo.
+    """
+    filas = (
+        _inscripciones_vigentes().filter(estudiante_id=estudiante_id)
+        .order_by('periodo_academico', 'curso__codigo')
+        .values(
+            'id', 'periodo_academico', 'esta_activo', 'curso_id', 'curso__codigo', 'curso__nombre_curso',
+            'curso__creditos', 'resumen__conteo', 'resumen__suma_ponderada', 'resumen__suma_pesos',
+        )
+    )
+    periodos = {}
+    puntos_total, creditos_total = Decimal('0'), 0
+    for fila in filas:
+        periodo = periodos.setdefault(fila['periodo_academico'], {
+            'periodo': fila['periodo_academico'], 'cursos': [], 'creditos': 0, 'puntos': Decimal('0'),
+        })
+        final = None
+        if fila['resumen__suma_pesos']:
+            final = Decimal(fila['resumen__suma_ponderada']) / fila['resumen__suma_pesos']
+            periodo['creditos'] += fila['curso__creditos']
+            periodo['puntos'] += final * fila['curso__creditos']
+        periodo['cursos'].append({
+            'inscripcion_id': fila['id'],
+            'curso_id': fila['curso_id'],
+            'codigo': fila['curso__codigo'],
+            'nombre': fila['curso__nombre_curso'],
+            'creditos': fila['curso__creditos'],
+            'calificaciones': fila['resumen__conteo'] or 0,
+            'final': _redondear(final),
+            'esta_activo': fila['esta_activo'],
+        })
+
+    for periodo in periodos.values():
+        puntos = periodo.pop('puntos')
+        periodo['promedio'] = _redondear(_promedio(puntos, periodo['creditos']))
+        puntos_total += puntos
+        creditos_total += periodo['creditos']
+    return {
+        'estudiante_id': estudiante_id,
+        'periodos': list(periodos.values()),
+        'creditos': creditos_total,
+        'promedio': _redondear(_promedio(puntos_total, creditos_total)),
+    }
+
+
+def kardex_estudiante(estudiante_id):
+    """calcular_kardex() con caché por estudiante."""
+    llave = _llave_kardex(estudiante_id)
+    version = version_modelo('curso')
+    guardado = cache.get(llave)
+    if guardado is not None and guardado[0] == version:
+        return guardado[1]
+    kardex = calcular_kardex(estudiante_id)
+    cache.set(llave, (version, kardex), TIMEOUT_KARDEX)
+    return kardex
+
+
+# ------------------------------------------
+# PROMEDIOS DE UNA COHORTE
+# ------------------------------------------
+
+def promedios_cohorte(estudiantes=None, periodo=None):
+    """
+    Promedios de todos los estudiantes de 'estudiantes' (queryset; None = todos) con
+    un solo GROUP BY (estudiante, periodo). Con 'periodo' solo se consideran las
+    inscripciones de ese periodo. Devuelve
+    {estudiante_id: {'creditos', 'promedio', 'periodos': {periodo: (creditos, promedio)}}}.
+    """
+    inscripciones = _inscripciones_vigentes().filter(resumen__suma_pesos__gt=0)
+    if estudiantes is not None:
+        inscripciones = inscripciones.filter(estudiante__in=estudiantes.values('pk'))
+    if periodo:
+        inscripciones = inscripciones.filter(periodo_academico=periodo)
+
+    # El cociente se hace en punto flotante: en SQLite un DecimalField entero
+    # dividido entre un entero trunca el resultado.
+    final = Cast('resumen__suma_ponderada', FloatField()) / F('resumen__suma_pesos')
+    grupos = (
+        inscripciones.order_by()
+        .values('estudiante_id', 'periodo_academico')
+        .annotate(creditos=Sum('curso__creditos'), puntos=Sum(final * F('curso__creditos'), output_field=FloatField()))
+        .values_list('estudiante_id', 'periodo_academico', 'creditos', 'puntos')
+    )
+    sumas = {}
+    for estudiante_id, periodo_academico, creditos, puntos in grupos.iterator():
+        acumulado = sumas.setdefault(estudiante_id, {'creditos': 0, 'puntos': 0.0, 'periodos': {}})
+        acumulado['creditos'] += creditos
+        acumulado['puntos'] += puntos
+        acumulado['periodos'][periodo_academico] = (creditos, _redondear(_promedio(puntos, creditos)))
+
+    return {
+        estudiante_id: {
+            'creditos': acumulado['creditos'],
+            'promedio': _redondear(_promedio(acumulado['puntos'], acumulado['creditos'])),
+            'periodos': acumulado['periodos'],
+        }
+        for estudiante_id, acumulado in sumas.items()
+    }
@@ -0,0 +1,124 @@
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Profesor, Curso, Estudiante
+
+# --------------------------------------------------------------------------
+# CACHÉ VERSIONADA DE LISTAS DE SELECCIÓN (<select>)
+# --------------------------------------------------------------------------
+# Cada modelo tiene un contador de versión en la caché. Las listas se guardan
+# con una llave que incluye las versiones de los modelos de los que dependen,
+# así que invalidar es solo incrementar el contador (ver signals.py): las
+# entradas viejas dejan de usarse y expiran solas. Las mismas versiones forman
+# la llave de los fragmentos {% cache %} de las tablas de listado.
+
+TIMEOUT_LISTAS = 60 * 60
+TIMEOUT_FRAGMENTOS = 60 * 60
+
+
+def _llave_version(modelo):
+    return f'version:{modelo}'
+
+
+def version_modelo(modelo):
+    """Versión actual de 'modelo' ('profesor', 'curso', 'estudiante', ...)."""
+    llave = _llave_version(modelo)
+    version = cache.get(llave)
+    if version is None:
+        # Se parte de la hora actual para no reutilizar versiones si el contador fue desalojado.
+        version = int(time.time() * 1000)
+        cache.add(llave, version, timeout=None)
+        version = cache.get(llave, version)
+    return version
+
+
+def _incrementar(modelo):
+    try:
+        cache.incr(_llave_version(modelo))
+    except ValueError:
+        version_modelo(modelo)
+
+
+def incrementar_version(modelo):
+    """
+    Invalida todo lo cacheado que dependa de 'modelo'; se aplica al confirmar la
+    transacción (antes, otra petición podría volver a cachear los datos viejos
+    con la versión nueva, y si hay rollback no hay nada que invalidar).
+    """
+    transaction.on_commit(lambda: _incrementar(modelo))
+
+
+def version_fragmento(*modelos):
+    """Versión combinada de 'modelos' (un solo get_many); cambia si cualquiera de ellos cambia."""
+    llaves = [_llave_version(m) for m in modelos]
+    encontradas = cache.get_many(llaves)
+    return '.'.join(
+        str(encontradas.get(llave) or version_modelo(modelo)) for llave, modelo in zip(llaves, modelos)
+    )
+
+
+def contexto_fragmento(*modelos):
+    """Variables para {% cache timeout_tabla '...' version_tabla ... %} en las plantillas de listado."""
+    return {'version_tabla': version_fragmento(*modelos), 'timeout_tabla': TIMEOUT_FRAGMENTOS}
+
+
+def _lista_cacheada(nombre, modelos, construir):
+    versiones = version_fragmento(*modelos)
+    llave = f'lista:{nombre}:{versiones}'
+    opciones = cache.get(llave)
+    if opciones is None:
+        opciones = construir()
+        cache.set(llave, opciones, TIMEOUT_LISTAS)
+    return opciones
+
+
+def opciones_profesores_activos():
+    """[(id, 'Nombre Apellido (Especialidad)')] de los profesores activos."""
+    return _lista_cacheada('profesores_activos', ['profesor'], lambda: [
+        (pk, f'{nombre} {apellido} ({especialidad})')
+        for pk, nombre, apellido, especialidad in Profesor.objects.filter(activo=True)
+        .order_by('apellido_profesor', 'nombre_profesor')
+        .values_list('id', 'nombre_profesor', 'apellido_profesor', 'especialidad')
+    ])
+
+
+def opciones_cursos():
+    """[(id, 'Nombre (CODIGO)')] de todos los cursos."""
+    return _lista_cacheada('cursos', ['curso'], lambda: [
+        (pk, f'{nombre} ({codigo})')
+        for pk, nombre, codigo in Curso.objects.order_by('nombre_curso', 'codigo')
+        .values_list('id', 'nombre_curso', 'codigo')
+    ])
+
+
+def opciones_cursos_con_profesor():
+    """[(id, 'Nombre (CODIGO) - Prof: Nombre')] de todos los cursos."""
+    return _lista_cacheada('cursos_con_profesor', ['curso', 'profesor'], lambda: [
+        (pk, f'{nombre} ({codigo}) - Prof: {profesor}')
+        for pk, nombre, codigo, profesor in Curso.objects.order_by('nombre_curso', 'codigo')
+        .values_list('id', 'nombre_curso', 'codigo', 'profesor__nombre_profesor')
+    ])
+
+
+def opciones_estudiantes():
+    """[(id, 'MATRICULA - Nombre Apellido')] de todos los estudiantes."""
+    return _lista_cacheada('estudiantes', ['estudiante'], lambda: [
+        (pk, f'{matricula} - {nombre} {apellido}')
+        for pk, matricula, nombre, apellido in Estudiante.objects.order_by('matricula')
+        .values_list('id', 'matricula', 'nombre_estudiante', 'apellido_estudiante')
+    ])
+
+
+def invalidar_listas(inmediato=False):
+    """
+    Invalida todas las listas (útil tras escrituras masivas que no envían señales).
+    Con 'inmediato' no espera a que se confirme la transacción: para datos que se
+    van a revertir a propósito, como los del benchmark.
+    """
+    for modelo in ('profesor', 'curso', 'estudiante'):
+        if inmediato:
+            _incrementar(modelo)
+        else:
+            incrementar_version(modelo)
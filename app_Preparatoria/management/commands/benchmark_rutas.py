@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from app_Preparatoria.benchmark import (
+    ARCHIVO_BASE, cargar_base, ejecutar_benchmark, guardar_base, regresiones_contra_base, rutas_que_crecen,
+)
+
+
+class Command(BaseCommand):
+    help = ("Mide consultas, tiempo SQL y tiempo de respuesta de cada ruta con datos sintéticos "
+            "de varios tamaños. Falla si una ruta crece en consultas o supera la línea base. "
+            "Los datos se generan dentro de una transacción que se revierte.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tamanos', type=int, nargs='+', default=[100, 1000],
+                            help="Número de estudiantes por corrida (ej: 1000 10000 100000).")
+        parser.add_argument('--cursos-por-estudiante', type=int, default=5)
+        parser.add_argument('--calificaciones', type=int, default=3, help="Calificaciones por inscripción.")
+        parser.add_argument('--dias', type=int, default=5, help="Días de asistencia por inscripción.")
+        parser.add_argument('--base', default=str(ARCHIVO_BASE), help="Archivo JSON con la línea base.")
+        parser.add_argument('--guardar-base', action='store_true',
+                            help="Guarda los conteos del tamaño mayor como nueva línea base.")
+
+    def handle(self, *args, **options):
+        resultados = ejecutar_benchmark(
+            options['tamanos'],
+            cursos_por_estudiante=options['cursos_por_estudiante'],
+            calificaciones_por_inscripcion=options['calificaciones'],
+            dias_asistencia=options['dias'],
+        )
+
+        for tamano, metricas in resultados.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\n{tamano} estudiantes"))
+            self.stdout.write(f"{'Ruta':<40} {'HTTP':>4} {'Consultas':>9} {'SQL ms':>9} {'Total ms':>9}")
+            for ruta, m in metricas.items():
+                self.stdout.write(
+                    f"{ruta:<40} {m['status']:>4} {m['consultas']:>9} {m['ms_sql']:>9.2f} {m['ms_total']:>9.2f}"
+                )
+
+        if options['guardar_base']:
+            guardar_base(options['base'], resultados)
+            self.stdout.write(self.style.SUCCESS(f"\nLínea base guardada en {options['base']}"))
+            return
+
+        errores = []
+        for ruta, (menor, mayor) in rutas_que_crecen(resultados).items():
+            errores.append(f"{ruta}: las consultas crecen con los datos ({menor} -> {mayor})")
+        for ruta, (esperado, obtenido) in regresiones_contra_base(resultados, cargar_base(options['base'])).items():
+            errores.append(f"{ruta}: {obtenido} consultas, la línea base permite {esperado}")
+
+        if errores:
+            raise CommandError("Regresiones detectadas:\n" + "\n".join(errores))
+        self.stdout.write(self.style.SUCCESS("\nSin regresiones de consultas."))
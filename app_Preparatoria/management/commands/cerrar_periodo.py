@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from app_Preparatoria.inscripciones import cerrar_periodo
+
+
+class Command(BaseCommand):
+    help = "Da de baja las inscripciones activas de un periodo terminado y libera sus lugares en el cupo."
+
+    def add_arguments(self, parser):
+        parser.add_argument('periodo', help="Periodo académico a cerrar, p. ej. 2025-2.")
+
+    def handle(self, *args, **options):
+        cerradas = cerrar_periodo(options['periodo'])
+        self.stdout.write(self.style.SUCCESS(f"Inscripciones dadas de baja: {cerradas}"))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from app_Preparatoria.importacion import (
+    IMPORTADORES, TAMANO_LOTE_DEFAULT, formato_por_nombre, importar_archivo,
+)
+
+
+class Command(BaseCommand):
+    help = "Importa profesores, cursos o estudiantes desde un archivo CSV o XLSX, por lotes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('modelo', choices=sorted(IMPORTADORES))
+        parser.add_argument('archivo')
+        parser.add_argument('--formato', choices=['csv', 'xlsx'], help="Por defecto se deduce de la extensión.")
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE_DEFAULT, help="Filas por bulk_create.")
+
+    def handle(self, *args, **options):
+        formato = options['formato'] or formato_por_nombre(options['archivo'])
+        try:
+            with open(options['archivo'], 'rb') as archivo:
+                resultado = importar_archivo(options['modelo'], archivo, formato, options['lote'])
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc))
+
+        for linea, mensaje in resultado.errores:
+            self.stderr.write(f"Línea {linea}: {mensaje}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Creados: {resultado.creados} | Omitidos (ya existían): {resultado.omitidos} | "
+            f"Con error: {resultado.con_error}"
+        ))
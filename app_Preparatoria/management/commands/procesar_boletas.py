@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from app_Preparatoria.boletas import TAMANO_LOTE_BOLETAS, ejecutar_worker
+
+
+class Command(BaseCommand):
+    help = ("Worker de la cola de boletas: toma lotes de tareas pendientes y genera los archivos "
+            "en paralelo con un pool de procesos.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--procesos', type=int, default=None, help="Procesos del pool (por omisión, CPUs).")
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE_BOLETAS, help="Boletas por lote.")
+        parser.add_argument('--una-vez', action='store_true',
+                            help="Termina cuando no quedan tareas en lugar de seguir esperando.")
+        parser.add_argument('--espera', type=float, default=5, help="Segundos entre búsquedas de trabajos.")
+
+    def handle(self, *args, **options):
+        def salida(trabajo, error=None):
+            if error is not None:
+                self.stderr.write(self.style.ERROR(f"Trabajo {trabajo.pk}: lote fallido ({error})"))
+                return
+            self.stdout.write(
+                f"Trabajo {trabajo.pk} ({trabajo.periodo_academico}): "
+                f"{trabajo.procesadas + trabajo.con_error}/{trabajo.total} ({trabajo.porcentaje}%)"
+            )
+
+        total = ejecutar_worker(
+            procesos=options['procesos'], tamano_lote=options['lote'],
+            una_vez=options['una_vez'], esperar=options['espera'], salida=salida,
+        )
+        self.stdout.write(self.style.SUCCESS(f"Boletas procesadas: {total}"))
@@ -0,0 +1,21 @@
+import csv
+
+from django.core.management.base import BaseCommand
+
+from app_Preparatoria.kardex import promedios_cohorte
+from app_Preparatoria.models import Estudiante
+
+
+class Command(BaseCommand):
+    help = "Escribe en CSV el promedio ponderado por créditos de todos los estudiantes (un solo GROUP BY)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--periodo', help="Solo las inscripciones de este periodo académico.")
+
+    def handle(self, *args, **options):
+        promedios = promedios_cohorte(Estudiante.objects.all(), periodo=options['periodo'])
+        matriculas = dict(Estudiante.objects.values_list('id', 'matricula').iterator())
+        salida = csv.writer(self.stdout)
+        salida.writerow(['matricula', 'creditos', 'promedio'])
+        for estudiante_id, datos in sorted(promedios.items(), key=lambda item: (-item[1]['promedio'], item[0])):
+            salida.writerow([matriculas[estudiante_id], datos['creditos'], datos['promedio']])
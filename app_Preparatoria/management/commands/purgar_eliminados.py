@@ -0,0 +1,25 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from app_Preparatoria.eliminacion import TAMANO_LOTE_PURGA, purgar_eliminados
+
+
+class Command(BaseCommand):
+    help = ("Borra definitivamente, por lotes, los profesores, cursos y estudiantes eliminados "
+            "(borrado lógico) y todas sus filas dependientes.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, default=0,
+                            help="Solo purga lo eliminado hace al menos estos días (por omisión, todo).")
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE_PURGA, help="Filas por sentencia DELETE.")
+        parser.add_argument('--pausa', type=float, default=0,
+                            help="Segundos de espera entre lotes para no acaparar la base de datos.")
+
+    def handle(self, *args, **options):
+        borradas = purgar_eliminados(
+            antiguedad=timedelta(days=options['dias']), tamano=options['lote'], pausa=options['pausa'],
+        )
+        for tabla, filas in sorted(borradas.items()):
+            self.stdout.write(f"{tabla}: {filas}")
+        self.stdout.write(self.style.SUCCESS(f"Filas purgadas: {sum(borradas.values())}"))
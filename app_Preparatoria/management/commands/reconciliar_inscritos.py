@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from app_Preparatoria.cupos import reconciliar_inscritos
+
+
+class Command(BaseCommand):
+    help = "Recalcula desde cero el contador de inscritos activos de cada curso."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--curso', type=int, action='append', dest='cursos',
+            help="ID de curso a reconciliar (se puede repetir). Por omisión, todos.",
+        )
+
+    def handle(self, *args, **options):
+        desfasados = reconciliar_inscritos(curso_ids=options['cursos'])
+        for curso_id, (anterior, correcto) in sorted(desfasados.items()):
+            self.stdout.write(f"Curso {curso_id}: {anterior} -> {correcto}")
+        self.stdout.write(self.style.SUCCESS(f"Contadores corregidos: {len(desfasados)}"))
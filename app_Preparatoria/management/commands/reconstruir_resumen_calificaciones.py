@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from app_Preparatoria.resumenes import TAMANO_LOTE_RESUMEN, reconstruir_todos
+
+
+class Command(BaseCommand):
+    help = "Recalcula desde cero el resumen materializado de calificaciones de todas las inscripciones."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE_RESUMEN, help="Inscripciones por lote.")
+
+    def handle(self, *args, **options):
+        total = reconstruir_todos(tamano_lote=options['lote'])
+        self.stdout.write(self.style.SUCCESS(f"Resúmenes reconstruidos: {total}"))
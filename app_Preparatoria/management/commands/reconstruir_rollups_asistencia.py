@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from app_Preparatoria.rollups_asistencia import reconstruir_todo
+
+
+class Command(BaseCommand):
+    help = "Recalcula desde cero los acumulados de asistencia (por curso/día y por inscripción)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--curso', type=int, action='append', dest='cursos',
+            help="ID de curso a reconstruir (se puede repetir). Por omisión, todos.",
+        )
+
+    def handle(self, *args, **options):
+        diarias, por_inscripcion = reconstruir_todo(curso_ids=options['cursos'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Acumulados reconstruidos: {diarias} diarios por curso, {por_inscripcion} por inscripción"
+        ))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from app_Preparatoria.horarios import generar_sesiones, reporte_conflictos
+
+
+class Command(BaseCommand):
+    help = "Reporta los choques de aula y de profesor de todo el horario (una pasada de línea de barrido)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--generar', action='store_true',
+            help="Antes del reporte, vuelve a generar las sesiones a partir del texto de Curso.horario.",
+        )
+
+    def handle(self, *args, **options):
+        if options['generar']:
+            creadas, invalidos = generar_sesiones()
+            for curso_id, error in sorted(invalidos.items()):
+                self.stderr.write(f"Curso {curso_id}: {error}")
+            self.stdout.write(f"Sesiones generadas: {creadas} ({len(invalidos)} cursos sin horario reconocible)")
+
+        conflictos = reporte_conflictos()
+        for c in conflictos:
+            self.stdout.write(
+                f"{c['dia']} {c['inicio']:%H:%M}-{c['fin']:%H:%M} {c['tipo']} {c['recurso']}: "
+                f"{c['curso_a']} / {c['curso_b']}"
+            )
+        estilo = self.style.WARNING if conflictos else self.style.SUCCESS
+        self.stdout.write(estilo(f"Choques encontrados: {len(conflictos)}"))
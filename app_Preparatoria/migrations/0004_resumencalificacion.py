@@ -0,0 +1,24 @@
+# Generated by Django 5.1.15 on 2026-10-17 13:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_Preparatoria', '0003_alter_inscripcion_unique_together_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenCalificacion',
+            fields=[
+                ('inscripcion', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='resumen', serialize=False, to='app_Preparatoria.inscripcion')),
+                ('conteo', models.PositiveIntegerField(default=0)),
+                ('suma_puntaje', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('suma_ponderada', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('suma_pesos', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+    ]
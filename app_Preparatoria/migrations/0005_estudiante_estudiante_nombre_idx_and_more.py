@@ -0,0 +1,21 @@
+# Generated by Django 5.1.15 on 2026-10-17 13:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_Preparatoria', '0004_resumencalificacion'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='estudiante',
+            index=models.Index(fields=['apellido_estudiante', 'nombre_estudiante'], name='estudiante_nombre_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inscripcion',
+            index=models.Index(fields=['curso', 'esta_activo', 'periodo_academico'], name='inscripcion_curso_activo_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.15 on 2026-10-17 13:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_Preparatoria', '0005_estudiante_estudiante_nombre_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='calificacion',
+            index=models.Index(fields=['inscripcion', 'fecha_evaluacion'], name='calificacion_inscripcion_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inscripcion',
+            index=models.Index(condition=models.Q(('esta_activo', True)), fields=['curso', 'periodo_academico'], name='inscripcion_activa_curso_idx'),
+        ),
+    ]
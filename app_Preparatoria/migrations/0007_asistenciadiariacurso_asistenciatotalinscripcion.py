@@ -0,0 +1,43 @@
+# Generated by Django 5.1.15 on 2026-10-17 13:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_Preparatoria', '0006_calificacion_calificacion_inscripcion_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AsistenciaDiariaCurso',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('tipo_sesion', models.CharField(max_length=20)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('presentes', models.PositiveIntegerField(default=0)),
+                ('justificadas', models.PositiveIntegerField(default=0)),
+                ('curso', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='asistencia_diaria', to='app_Preparatoria.curso')),
+            ],
+            options={
+                'unique_together': {('curso', 'fecha', 'tipo_sesion')},
+            },
+        ),
+        migrations.CreateModel(
+            name='AsistenciaTotalInscripcion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo_sesion', models.CharField(max_length=20)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('presentes', models.PositiveIntegerField(default=0)),
+                ('justificadas', models.PositiveIntegerField(default=0)),
+                ('inscripcion', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='asistencia_totales', to='app_Preparatoria.inscripcion')),
+            ],
+            options={
+                'unique_together': {('inscripcion', 'tipo_sesion')},
+            },
+        ),
+    ]
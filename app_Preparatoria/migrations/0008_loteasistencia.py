@@ -0,0 +1,25 @@
+# Generated by Django 5.1.15 on 2026-10-17 13:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_Preparatoria', '0007_asistenciadiariacurso_asistenciatotalinscripcion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LoteAsistencia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('clave', models.CharField(max_length=64, unique=True)),
+                ('fecha', models.DateField()),
+                ('resultado', models.JSONField(default=list)),
+                ('fecha_recepcion', models.DateTimeField(auto_now_add=True)),
+                ('curso', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lotes_asistencia', to='app_Preparatoria.curso')),
+            ],
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.1.15 on 2026-10-17 13:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_Preparatoria', '0008_loteasistencia'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrabajoBoletas',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('periodo_academico', models.CharField(max_length=9)),
+                ('formato', models.CharField(default='pdf', max_length=4)),
+                ('estado', models.CharField(choices=[('PENDIENTE', 'Pendiente'), ('EN_PROCESO', 'En proceso'), ('TERMINADO', 'Terminado'), ('ERROR', 'Terminado con errores')], default='PENDIENTE', max_length=10)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('procesadas', models.PositiveIntegerField(default=0)),
+                ('con_error', models.PositiveIntegerField(default=0)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('fecha_inicio', models.DateTimeField(blank=True, null=True)),
+                ('fecha_fin', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TareaBoleta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('estado', models.CharField(choices=[('PENDIENTE', 'Pendiente'), ('EN_PROCESO', 'En proceso'), ('LISTA', 'Lista'), ('ERROR', 'Error')], default='PENDIENTE', max_length=10)),
+                ('trabajador', models.CharField(blank=True, default='', max_length=64)),
+                ('fecha_tomada', models.DateTimeField(blank=True, null=True)),
+                ('archivo', models.CharField(blank=True, default='', max_length=255)),
+                ('error', models.TextField(blank=True, default='')),
+                ('estudiante', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tareas_boleta', to='app_Preparatoria.estudiante')),
+                ('trabajo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tareas', to='app_Preparatoria.trabajoboletas')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['trabajo', 'estado'], name='tareaboleta_trabajo_estado_idx')],
+                'unique_together': {('trabajo', 'estudiante')},
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.1.15 on 2026-10-17 13:32
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def contar_inscritos_activos(apps, schema_editor):
+    Curso = apps.get_model('app_Preparatoria', 'Curso')
+    Inscripcion = apps.get_model('app_Preparatoria', 'Inscripcion')
+    activos = (
+        Inscripcion.objects.filter(curso=OuterRef('pk'), esta_activo=True)
+        .order_by().values('curso').annotate(n=Count('id')).values('n')
+    )
+    Curso.objects.update(inscritos_activos=Coalesce(Subquery(activos), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_Preparatoria', '0009_cola_boletas'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='curso',
+            name='cupo_maximo',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='curso',
+            name='inscritos_activos',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(contar_inscritos_activos, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.15 on 2026-10-17 13:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_Preparatoria', '0010_cupo_curso'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SesionCurso',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dia_semana', models.PositiveSmallIntegerField(choices=[(0, 'Lunes'), (1, 'Martes'), (2, 'Miércoles'), (3, 'Jueves'), (4, 'Viernes'), (5, 'Sábado'), (6, 'Domingo')])),
+                ('hora_inicio', models.TimeField()),
+                ('hora_fin', models.TimeField()),
+                ('aula', models.CharField(max_length=20)),
+                ('curso', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sesiones', to='app_Preparatoria.curso')),
+            ],
+            options={
+                'ordering': ['dia_semana', 'hora_inicio'],
+                'indexes': [models.Index(fields=['aula', 'dia_semana', 'hora_inicio'], name='sesion_aula_dia_inicio_idx'), models.Index(fields=['curso', 'dia_semana', 'hora_inicio'], name='sesion_curso_dia_inicio_idx')],
+                'constraints': [models.CheckConstraint(condition=models.Q(('hora_fin__gt', models.F('hora_inicio'))), name='sesion_intervalo_valido')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.15 on 2026-10-17 13:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_Preparatoria', '0011_sesiones_curso'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='curso',
+            name='eliminado_en',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='estudiante',
+            name='eliminado_en',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='profesor',
+            name='eliminado_en',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.15 on 2026-10-17 14:03
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_Preparatoria', '0012_borrado_logico'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='inscripcion',
+            name='inscripcion_activa_curso_idx',
+        ),
+    ]
@@ -0,0 +1,61 @@
+from django.db import migrations
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum
+
+TAMANO_LOTE = 1000
+
+
+def poblar_resumenes(apps, schema_editor):
+    """Resumen de las calificaciones que ya existían, por lotes de inscripciones."""
+    Calificacion = apps.get_model('app_Preparatoria', 'Calificacion')
+    Inscripcion = apps.get_model('app_Preparatoria', 'Inscripcion')
+    ResumenCalificacion = apps.get_model('app_Preparatoria', 'ResumenCalificacion')
+
+    ultimo = 0
+    while True:
+        ids = list(
+            Inscripcion.objects.filter(pk__gt=ultimo).order_by('pk').values_list('pk', flat=True)[:TAMANO_LOTE]
+        )
+        if not ids:
+            return
+        ultimo = ids[-1]
+        totales = {
+            fila['inscripcion_id']: fila
+            for fila in Calificacion.objects.filter(inscripcion_id__in=ids)
+            .values('inscripcion_id')
+            .annotate(
+                conteo=Count('id'),
+                suma_puntaje=Sum('puntaje'),
+                suma_ponderada=Sum(ExpressionWrapper(
+                    F('puntaje') * F('porcentaje_peso'),
+                    output_field=DecimalField(max_digits=14, decimal_places=2),
+                )),
+                suma_pesos=Sum('porcentaje_peso'),
+            )
+        }
+        resumenes = []
+        for inscripcion_id in ids:
+            fila = totales.get(inscripcion_id, {})
+            resumenes.append(ResumenCalificacion(
+                inscripcion_id=inscripcion_id,
+                conteo=fila.get('conteo') or 0,
+                suma_puntaje=fila.get('suma_puntaje') or 0,
+                suma_ponderada=fila.get('suma_ponderada') or 0,
+                suma_pesos=fila.get('suma_pesos') or 0,
+            ))
+        ResumenCalificacion.objects.bulk_create(
+            resumenes,
+            update_conflicts=True,
+            unique_fields=['inscripcion'],
+            update_fields=['conteo', 'suma_puntaje', 'suma_ponderada', 'suma_pesos'],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_Preparatoria', '0013_quitar_indice_inscripcion_activa'),
+    ]
+
+    operations = [
+        migrations.RunPython(poblar_resumenes, migrations.RunPython.noop),
+    ]
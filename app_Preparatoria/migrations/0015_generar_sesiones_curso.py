@@ -0,0 +1,49 @@
+from django.db import migrations
+
+# Solo la interpretación del texto (funciones puras); los modelos son los históricos.
+from app_Preparatoria.horarios import HorarioInvalido, interpretar_horario
+
+TAMANO_LOTE = 500
+
+
+def generar_sesiones(apps, schema_editor):
+    """
+    Sesiones de los cursos capturados antes de 0011. Como en la importación, un
+    horario que no se reconoce se deja solo como texto (reporte_horario --generar
+    lo vuelve a intentar). Los cursos eliminados y los que ya tienen sesiones no se tocan.
+    """
+    Curso = apps.get_model('app_Preparatoria', 'Curso')
+    SesionCurso = apps.get_model('app_Preparatoria', 'SesionCurso')
+    cursos = (
+        Curso.objects.filter(eliminado_en__isnull=True, sesiones__isnull=True)
+        .only('id', 'horario', 'aula').order_by('id')
+    )
+
+    ultimo = 0
+    while True:
+        lote = list(cursos.filter(pk__gt=ultimo)[:TAMANO_LOTE])
+        if not lote:
+            return
+        ultimo = lote[-1].pk
+        sesiones = []
+        for curso in lote:
+            try:
+                intervalos = interpretar_horario(curso.horario)
+            except HorarioInvalido:
+                continue
+            sesiones.extend(
+                SesionCurso(curso_id=curso.pk, dia_semana=dia, hora_inicio=inicio, hora_fin=fin, aula=curso.aula or '')
+                for dia, inicio, fin in intervalos
+            )
+        SesionCurso.objects.bulk_create(sesiones)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_Preparatoria', '0014_poblar_resumen_calificacion'),
+    ]
+
+    operations = [
+        migrations.RunPython(generar_sesiones, migrations.RunPython.noop),
+    ]
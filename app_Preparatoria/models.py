@@ -1,6 +1,32 @@
 from django.db import models
 from datetime import date # Necesario para Asistencia
 
+
+# ------------------------------------------
+# BORRADO LÓGICO (Profesor, Curso, Estudiante)
+# ------------------------------------------
+# Borrar solo marca eliminado_en; 'objects' oculta las filas marcadas y 'todos'
+# las incluye. Las filas y sus dependientes se eliminan después, por lotes, con
+# el comando purgar_eliminados (ver eliminacion.py).
+
+class NoEliminadosManager(models.Manager):
+    def get_queryset(self):
+        return super().get_queryset().filter(eliminado_en__isnull=True)
+
+
+def q_inscripcion_vigente(prefijo=''):
+    """Q de las inscripciones cuyo curso y estudiante no están eliminados ('prefijo' = 'inscripcion__', ...)."""
+    return models.Q(**{
+        f'{prefijo}curso__eliminado_en__isnull': True,
+        f'{prefijo}estudiante__eliminado_en__isnull': True,
+    })
+
+
+class InscripcionQuerySet(models.QuerySet):
+    def vigentes(self):
+        """Las inscripciones no se marcan: quedan ocultas si su curso o su estudiante lo está."""
+        return self.filter(q_inscripcion_vigente())
+
 # ==========================================
 # MODELO: PROFESOR (7 campos existentes)
 # ==========================================
@@ -12,6 +38,10 @@ class Profesor(models.Model):
     especialidad = models.CharField(max_length=50, default="")
     fecha_contratacion = models.DateField(auto_now_add=True)
     activo = models.BooleanField(default=True)
+    eliminado_en = models.DateTimeField(null=True, blank=True, editable=False, db_index=True)
+
+    objects = NoEliminadosManager()
+    todos = models.Manager()
 
     def __str__(self):
         return f"{self.nombre_profesor} {self.apellido_profesor}"
@@ -27,10 +57,24 @@ class Curso(models.Model):
     horario = models.CharField(max_length=50)
     aula = models.CharField(max_length=20)
     profesor = models.ForeignKey(Profesor, related_name="cursos", on_delete=models.CASCADE)
+    # Cupo del grupo; vacío = sin límite
+    cupo_maximo = models.PositiveIntegerField(null=True, blank=True)
+    # Inscripciones activas de cualquier periodo, mantenido con F() (ver cupos.py); no se edita a mano
+    inscritos_activos = models.PositiveIntegerField(default=0, editable=False)
+    eliminado_en = models.DateTimeField(null=True, blank=True, editable=False, db_index=True)
+
+    objects = NoEliminadosManager()
+    todos = models.Manager()
 
     def __str__(self):
         return f"{self.nombre_curso} ({self.codigo})"
 
+    @property
+    def lugares_disponibles(self):
+        if self.cupo_maximo is None:
+            return None
+        return max(self.cupo_maximo - self.inscritos_activos, 0)
+
 # ==========================================
 # MODELO: ESTUDIANTE (7 campos existentes)
 # ==========================================
@@ -43,6 +87,16 @@ class Estudiante(models.Model):
     fecha_inscripcion = models.DateField(auto_now_add=True)
     # Cambiamos la relación para usar Inscripcion como tabla intermedia
     cursos = models.ManyToManyField(Curso, through='Inscripcion', related_name="estudiantes_inscritos")
+    eliminado_en = models.DateTimeField(null=True, blank=True, editable=False, db_index=True)
+
+    objects = NoEliminadosManager()
+    todos = models.Manager()
+
+    class Meta:
+        indexes = [
+            # Búsqueda por apellido (prefijo) y nombre en el listado de estudiantes
+            models.Index(fields=['apellido_estudiante', 'nombre_estudiante'], name='estudiante_nombre_idx'),
+        ]
 
     def __str__(self):
         return f"{self.nombre_estudiante} {self.apellido_estudiante}"
@@ -69,8 +123,15 @@ class Inscripcion(models.Model):
     # 7. Requerido (Indica si el curso es obligatorio)
     es_obligatorio = models.BooleanField(default=True) # Campo nuevo
 
+    objects = InscripcionQuerySet.as_manager()
+
     class Meta:
         unique_together = ('estudiante', 'curso', 'periodo_academico') # Ajuste para permitir reinscripción en otro periodo
+        indexes = [
+            # Inscripciones de un curso filtradas por estado y periodo; también cubre las
+            # de solo inscripciones activas (gestionar_asistencia, calificaciones)
+            models.Index(fields=['curso', 'esta_activo', 'periodo_academico'], name='inscripcion_curso_activo_idx'),
+        ]
 
     def __str__(self):
         return f"Inscripción: {self.estudiante.matricula} en {self.curso.codigo} ({self.periodo_academico})"
@@ -115,6 +176,12 @@ class Calificacion(models.Model):
         related_name='notas_asignadas'
     ) # Campo nuevo
 
+    class Meta:
+        indexes = [
+            # Calificaciones de una inscripción en orden cronológico (sin ordenar en memoria)
+            models.Index(fields=['inscripcion', 'fecha_evaluacion'], name='calificacion_inscripcion_idx'),
+        ]
+
     def __str__(self):
         return f"{self.get_tipo_evaluacion_display()} ({self.puntaje}) para {self.inscripcion.estudiante.matricula}"
     
@@ -152,4 +219,193 @@ class Asistencia(models.Model):
         unique_together = ('inscripcion', 'fecha')
 
     def __str__(self):
-        return f"Asistencia de {self.inscripcion.estudiante.matricula} - {self.fecha} ({'Presente' if self.presente else 'Ausente'})"
\ No newline at end of file
+        return f"Asistencia de {self.inscripcion.estudiante.matricula} - {self.fecha} ({'Presente' if self.presente else 'Ausente'})"
+
+
+# ------------------------------------------
+# MODELO: RESUMEN DE CALIFICACIONES (materializado)
+# ------------------------------------------
+class ResumenCalificacion(models.Model):
+    """Totales precalculados de las calificaciones de una Inscripción.
+    Se mantiene de forma incremental con señales de Calificacion (ver signals.py)."""
+    inscripcion = models.OneToOneField(
+        'Inscripcion',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='resumen'
+    )
+    conteo = models.PositiveIntegerField(default=0)
+    suma_puntaje = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    # Suma de puntaje * porcentaje_peso
+    suma_ponderada = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    suma_pesos = models.PositiveIntegerField(default=0)
+
+    @property
+    def promedio_simple(self):
+        return self.suma_puntaje / self.conteo if self.conteo else None
+
+    @property
+    def promedio_ponderado(self):
+        return self.suma_ponderada / self.suma_pesos if self.suma_pesos else None
+
+    def __str__(self):
+        return f"Resumen de {self.inscripcion_id}: {self.conteo} calificaciones"
+
+
+
+# ------------------------------------------
+# MODELOS: ACUMULADOS DE ASISTENCIA (rollups)
+# ------------------------------------------
+class AsistenciaDiariaCurso(models.Model):
+    """Totales de asistencia de un curso por día y tipo de sesión.
+    Se mantiene con señales de Asistencia (ver rollups_asistencia.py)."""
+    curso = models.ForeignKey(Curso, on_delete=models.CASCADE, related_name='asistencia_diaria')
+    fecha = models.DateField()
+    tipo_sesion = models.CharField(max_length=20)
+    total = models.PositiveIntegerField(default=0)
+    presentes = models.PositiveIntegerField(default=0)
+    # Ausencias con justificación aprobada
+    justificadas = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('curso', 'fecha', 'tipo_sesion')
+
+    def __str__(self):
+        return f"{self.curso_id} {self.fecha} {self.tipo_sesion}: {self.presentes}/{self.total}"
+
+
+class AsistenciaTotalInscripcion(models.Model):
+    """Totales de asistencia acumulados de una Inscripción por tipo de sesión."""
+    inscripcion = models.ForeignKey('Inscripcion', on_delete=models.CASCADE, related_name='asistencia_totales')
+    tipo_sesion = models.CharField(max_length=20)
+    total = models.PositiveIntegerField(default=0)
+    presentes = models.PositiveIntegerField(default=0)
+    justificadas = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('inscripcion', 'tipo_sesion')
+
+    def __str__(self):
+        return f"{self.inscripcion_id} {self.tipo_sesion}: {self.presentes}/{self.total}"
+
+
+class LoteAsistencia(models.Model):
+    """
+    Lote de asistencia recibido por la API JSON. La clave la genera el cliente;
+    si el lote se reenvía se devuelve el resultado guardado sin volver a escribir.
+    """
+    clave = models.CharField(max_length=64, unique=True)
+    curso = models.ForeignKey(Curso, on_delete=models.CASCADE, related_name='lotes_asistencia')
+    fecha = models.DateField()
+    # Resultado por fila tal como se respondió al cliente
+    resultado = models.JSONField(default=list)
+    fecha_recepcion = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Lote {self.clave} ({self.curso_id}, {self.fecha})"
+
+
+# ------------------------------------------
+# COLA DE GENERACIÓN DE BOLETAS
+# ------------------------------------------
+
+ESTADOS_TRABAJO = [
+    ('PENDIENTE', 'Pendiente'),
+    ('EN_PROCESO', 'En proceso'),
+    ('TERMINADO', 'Terminado'),
+    ('ERROR', 'Terminado con errores'),
+]
+
+ESTADOS_TAREA = [
+    ('PENDIENTE', 'Pendiente'),
+    ('EN_PROCESO', 'En proceso'),
+    ('LISTA', 'Lista'),
+    ('ERROR', 'Error'),
+]
+
+
+class TrabajoBoletas(models.Model):
+    """Generación de las boletas de todos los estudiantes de un periodo académico."""
+    periodo_academico = models.CharField(max_length=9)
+    # 'pdf' (requiere reportlab) o 'html'
+    formato = models.CharField(max_length=4, default='pdf')
+    estado = models.CharField(max_length=10, choices=ESTADOS_TRABAJO, default='PENDIENTE')
+    total = models.PositiveIntegerField(default=0)
+    procesadas = models.PositiveIntegerField(default=0)
+    con_error = models.PositiveIntegerField(default=0)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_inicio = models.DateTimeField(null=True, blank=True)
+    fecha_fin = models.DateTimeField(null=True, blank=True)
+
+    @property
+    def porcentaje(self):
+        return round(100 * (self.procesadas + self.con_error) / self.total) if self.total else 100
+
+    def __str__(self):
+        return f"Boletas {self.periodo_academico} ({self.get_estado_display()})"
+
+
+class TareaBoleta(models.Model):
+    """Boleta de un estudiante dentro de un trabajo; es la unidad que toman los workers."""
+    trabajo = models.ForeignKey(TrabajoBoletas, on_delete=models.CASCADE, related_name='tareas')
+    estudiante = models.ForeignKey(Estudiante, on_delete=models.CASCADE, related_name='tareas_boleta')
+    estado = models.CharField(max_length=10, choices=ESTADOS_TAREA, default='PENDIENTE')
+    # Identificador del worker que la tomó y cuándo (para liberar tareas de workers caídos)
+    trabajador = models.CharField(max_length=64, blank=True, default='')
+    fecha_tomada = models.DateTimeField(null=True, blank=True)
+    archivo = models.CharField(max_length=255, blank=True, default='')
+    error = models.TextField(blank=True, default='')
+
+    class Meta:
+        unique_together = ('trabajo', 'estudiante')
+        indexes = [
+            # Tomar el siguiente lote pendiente de un trabajo sin recorrer la tabla
+            models.Index(fields=['trabajo', 'estado'], name='tareaboleta_trabajo_estado_idx'),
+        ]
+
+    def __str__(self):
+        return f"Boleta {self.estudiante_id} ({self.get_estado_display()})"
+
+
+# ------------------------------------------
+# HORARIO ESTRUCTURADO DE LOS CURSOS
+# ------------------------------------------
+
+DIAS_SEMANA = [
+    (0, 'Lunes'),
+    (1, 'Martes'),
+    (2, 'Miércoles'),
+    (3, 'Jueves'),
+    (4, 'Viernes'),
+    (5, 'Sábado'),
+    (6, 'Domingo'),
+]
+
+
+class SesionCurso(models.Model):
+    """
+    Una sesión semanal de un curso: día, intervalo [hora_inicio, hora_fin) y aula.
+    Se genera a partir de Curso.horario (ver horarios.py), que sigue siendo el texto
+    que se muestra.
+    """
+    curso = models.ForeignKey(Curso, on_delete=models.CASCADE, related_name='sesiones')
+    dia_semana = models.PositiveSmallIntegerField(choices=DIAS_SEMANA)
+    hora_inicio = models.TimeField()
+    hora_fin = models.TimeField()
+    aula = models.CharField(max_length=20)
+
+    class Meta:
+        ordering = ['dia_semana', 'hora_inicio']
+        indexes = [
+            # Choques de aula: rango sobre hora_inicio dentro de (aula, día)
+            models.Index(fields=['aula', 'dia_semana', 'hora_inicio'], name='sesion_aula_dia_inicio_idx'),
+            # Choques de profesor: sesiones de sus cursos en un día
+            models.Index(fields=['curso', 'dia_semana', 'hora_inicio'], name='sesion_curso_dia_inicio_idx'),
+        ]
+        constraints = [
+            models.CheckConstraint(condition=models.Q(hora_fin__gt=models.F('hora_inicio')), name='sesion_intervalo_valido'),
+        ]
+
+    def __str__(self):
+        return f"{self.curso_id} {self.get_dia_semana_display()} {self.hora_inicio:%H:%M}-{self.hora_fin:%H:%M} ({self.aula})"
+
@@ -0,0 +1,168 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+# --------------------------------------------------------------------------
+# PAGINACIÓN POR CURSOR (KEYSET)
+# --------------------------------------------------------------------------
+# En lugar de OFFSET (que obliga a la base de datos a recorrer todas las filas
+# anteriores), cada página continúa desde la última fila vista:
+#   WHERE (columna, id) > (valor, id_visto) ORDER BY columna, id LIMIT n+1
+# Así cada página cuesta una sola consulta acotada sin importar el tamaño
+# de la tabla.
+
+TAMANO_PAGINA_DEFAULT = 50
+TAMANO_PAGINA_MAXIMO = 200
+
+
+class PaginaCursor:
+    """Resultado de una página: filas y cursores para avanzar o retroceder."""
+
+    def __init__(self, objetos, siguiente, anterior, orden, tamano, parametros=''):
+        self.objetos = objetos
+        self.cursor_siguiente = siguiente
+        self.cursor_anterior = anterior
+        self.orden = orden
+        self.tamano = tamano
+        # Query string actual sin 'cursor', para conservar orden y filtros en los enlaces.
+        self.parametros = parametros
+
+    def __iter__(self):
+        return iter(self.objetos)
+
+    def __len__(self):
+        return len(self.objetos)
+
+    @property
+    def tiene_siguiente(self):
+        return self.cursor_siguiente is not None
+
+    @property
+    def tiene_anterior(self):
+        return self.cursor_anterior is not None
+
+
+def codificar_cursor(valor, pk, direccion):
+    """Codifica la posición (valor de la columna, pk) en un token para la URL."""
+    datos = json.dumps([valor, pk, direccion], default=str)
+    return base64.urlsafe_b64encode(datos.encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(token):
+    """Devuelve (valor, pk, direccion) o None si el token es inválido."""
+    if not token:
+        return None
+    try:
+        relleno = '=' * (-len(token) % 4)
+        valor, pk, direccion = json.loads(base64.urlsafe_b64decode(token + relleno))
+        if direccion not in ('sig', 'ant'):
+            return None
+        return valor, int(pk), direccion
+    except (ValueError, TypeError):
+        return None
+
+
+def obtener_tamano_pagina(request, default=TAMANO_PAGINA_DEFAULT):
+    """Lee 'por_pagina' del query string, acotado a [1, TAMANO_PAGINA_MAXIMO]."""
+    try:
+        tamano = int(request.GET.get('por_pagina', default))
+    except (TypeError, ValueError):
+        tamano = default
+    return max(1, min(tamano, TAMANO_PAGINA_MAXIMO))
+
+
+def _valor_columna(obj, columna):
+    """Obtiene el valor de 'columna' (admite 'relacion__campo') en un objeto."""
+    valor = obj
+    for parte in columna.split('__'):
+        valor = getattr(valor, parte)
+    return valor
+
+
+def _campo_columna(modelo, columna):
+    """Campo del modelo al que apunta 'columna' (admite 'relacion__campo')."""
+    *relaciones, nombre = columna.split('__')
+    for relacion in relaciones:
+        modelo = modelo._meta.get_field(relacion).related_model
+    return modelo._meta.get_field(nombre)
+
+
+def _valor_cursor(modelo, columna, valor):
+    """
+    Convierte el valor del cursor al tipo de la columna; None si no corresponde
+    (token alterado o de otro orden), para no pasar basura al filtro.
+    """
+    try:
+        valor = _campo_columna(modelo, columna).to_python(valor)
+    except (ValidationError, TypeError, ValueError):
+        return None
+    return valor
+
+
+def paginar_por_cursor(queryset, request, columnas_orden=('id',), orden_default='id'):
+    """
+    Pagina 'queryset' por cursor según los parámetros 'orden', 'cursor' y
+    'por_pagina' del request. 'columnas_orden' es la lista blanca de columnas
+    por las que se permite ordenar; el pk siempre desempata.
+    """
+    tamano = obtener_tamano_pagina(request)
+    orden = request.GET.get('orden', orden_default)
+    if orden not in columnas_orden:
+        orden = orden_default
+
+    cursor = decodificar_cursor(request.GET.get('cursor'))
+    if cursor and orden not in ('id', 'pk'):
+        # Un cursor con un valor que no es del tipo de la columna se ignora: se
+        # muestra la primera página en lugar de fallar al construir el filtro.
+        valor = _valor_cursor(queryset.model, orden, cursor[0])
+        cursor = (valor, *cursor[1:]) if valor is not None else None
+    direccion = cursor[2] if cursor else 'sig'
+
+    if orden in ('id', 'pk'):
+        orden = 'id'
+        orden_campos = ('id',) if direccion == 'sig' else ('-id',)
+    else:
+        orden_campos = (orden, 'id') if direccion == 'sig' else (f'-{orden}', '-id')
+
+    qs = queryset.order_by(*orden_campos)
+
+    if cursor:
+        valor, pk, _ = cursor
+        op = 'gt' if direccion == 'sig' else 'lt'
+        if orden == 'id':
+            qs = qs.filter(**{f'id__{op}': pk})
+        else:
+            qs = qs.filter(
+                Q(**{f'{orden}__{op}': valor}) | Q(**{orden: valor, f'id__{op}': pk})
+            )
+
+    # Se pide una fila extra solo para saber si existe otra página.
+    filas = list(qs[:tamano + 1])
+    hay_mas = len(filas) > tamano
+    filas = filas[:tamano]
+
+    if direccion == 'ant':
+        filas.reverse()
+
+    def _cursor(obj, dir_):
+        valor = obj.pk if orden == 'id' else _valor_columna(obj, orden)
+        return codificar_cursor(valor, obj.pk, dir_)
+
+    siguiente = anterior = None
+    if filas:
+        if direccion == 'sig':
+            if hay_mas:
+                siguiente = _cursor(filas[-1], 'sig')
+            if cursor:
+                anterior = _cursor(filas[0], 'ant')
+        else:
+            siguiente = _cursor(filas[-1], 'sig')
+            if hay_mas:
+                anterior = _cursor(filas[0], 'ant')
+
+    parametros = request.GET.copy()
+    parametros.pop('cursor', None)
+
+    return PaginaCursor(filas, siguiente, anterior, orden, tamano, parametros.urlencode())
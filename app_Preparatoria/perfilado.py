@@ -0,0 +1,153 @@
+import random
+import re
+import threading
+import time
+from collections import Counter, deque
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.template.base import Template
+
+# --------------------------------------------------------------------------
+# PERFILADO POR PETICIÓN: SQL, PLANTILLAS Y TIEMPO TOTAL
+# --------------------------------------------------------------------------
+# Middleware opcional (ver PERFILADO_ACTIVO en settings.py). Para cada petición
+# muestreada registra con connection.execute_wrapper el número de consultas,
+# las consultas repetidas (misma huella) y las más lentas; mide el tiempo de
+# render de plantillas y el total. El resultado se envía en la cabecera
+# Server-Timing y se guarda en un buffer circular en memoria que se consulta
+# en /perfilado/ (solo staff).
+
+MAX_CONSULTAS_LENTAS = 5
+LONGITUD_MAXIMA_SQL = 300
+
+# Buffer circular compartido por el proceso
+_buffer = deque(maxlen=getattr(settings, 'PERFILADO_TAMANO_BUFFER', 200))
+_perfil_actual = ContextVar('perfil_actual', default=None)
+_instalacion_lock = threading.Lock()
+_render_instrumentado = False
+
+_RE_LISTA_IN = re.compile(r'\((?:\s*%s\s*,)+\s*%s\s*\)')
+
+
+def huella_sql(sql):
+    """Normaliza una sentencia para agrupar las que solo difieren en sus parámetros."""
+    return _RE_LISTA_IN.sub('(...)', sql)
+
+
+def registros_recientes():
+    """Copia del buffer circular, del más reciente al más antiguo."""
+    return list(reversed(_buffer))
+
+
+class PerfilPeticion:
+    """Datos acumulados de una petición."""
+
+    def __init__(self, metodo, ruta):
+        self.metodo = metodo
+        self.ruta = ruta
+        self.status = None
+        self.consultas = []  # [(sql, ms)]
+        self.ms_plantillas = 0.0
+        self.ms_total = 0.0
+        self._profundidad_render = 0
+
+    @property
+    def ms_sql(self):
+        return sum(ms for _, ms in self.consultas)
+
+    def duplicadas(self):
+        """Huellas que se ejecutaron más de una vez (posible N+1)."""
+        conteo = Counter(huella_sql(sql) for sql, _ in self.consultas)
+        return [(huella[:LONGITUD_MAXIMA_SQL], n) for huella, n in conteo.most_common() if n > 1]
+
+    def mas_lentas(self):
+        lentas = sorted(self.consultas, key=lambda c: c[1], reverse=True)[:MAX_CONSULTAS_LENTAS]
+        return [(sql[:LONGITUD_MAXIMA_SQL], round(ms, 2)) for sql, ms in lentas]
+
+    def como_dict(self):
+        return {
+            'metodo': self.metodo,
+            'ruta': self.ruta,
+            'status': self.status,
+            'num_consultas': len(self.consultas),
+            'ms_sql': round(self.ms_sql, 2),
+            'ms_plantillas': round(self.ms_plantillas, 2),
+            'ms_total': round(self.ms_total, 2),
+            'duplicadas': self.duplicadas(),
+            'mas_lentas': self.mas_lentas(),
+        }
+
+    def server_timing(self):
+        return (
+            f'sql;dur={self.ms_sql:.2f};desc="{len(self.consultas)} consultas", '
+            f'tpl;dur={self.ms_plantillas:.2f};desc="Plantillas", '
+            f'total;dur={self.ms_total:.2f}'
+        )
+
+
+def _instrumentar_render():
+    """Envuelve Template.render una sola vez para medir el tiempo de plantillas."""
+    global _render_instrumentado
+    with _instalacion_lock:
+        if _render_instrumentado:
+            return
+        render_original = Template.render
+
+        def render_medido(self, context):
+            perfil = _perfil_actual.get()
+            if perfil is None:
+                return render_original(self, context)
+            # Solo se mide la plantilla exterior; include/extends quedan dentro.
+            perfil._profundidad_render += 1
+            inicio = time.perf_counter()
+            try:
+                return render_original(self, context)
+            finally:
+                perfil._profundidad_render -= 1
+                if perfil._profundidad_render == 0:
+                    perfil.ms_plantillas += (time.perf_counter() - inicio) * 1000
+
+        Template.render = render_medido
+        _render_instrumentado = True
+
+
+class PerfiladoMiddleware:
+    """Perfila una fracción (PERFILADO_MUESTREO) de las peticiones."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.muestreo = getattr(settings, 'PERFILADO_MUESTREO', 1.0)
+        _instrumentar_render()
+
+    def __call__(self, request):
+        if request.path.startswith('/perfilado/') or random.random() >= self.muestreo:
+            return self.get_response(request)
+
+        perfil = PerfilPeticion(request.method, request.path)
+
+        def registrar_consulta(execute, sql, params, many, context):
+            inicio = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                perfil.consultas.append((sql, (time.perf_counter() - inicio) * 1000))
+
+        token = _perfil_actual.set(perfil)
+        inicio = time.perf_counter()
+        try:
+            with ExitStack() as pila:
+                for alias in connections:
+                    pila.enter_context(connections[alias].execute_wrapper(registrar_consulta))
+                response = self.get_response(request)
+        finally:
+            _perfil_actual.reset(token)
+        perfil.ms_total = (time.perf_counter() - inicio) * 1000
+
+        perfil.status = response.status_code
+        response['Server-Timing'] = perfil.server_timing()
+        _buffer.append(perfil.como_dict())
+        return response
+
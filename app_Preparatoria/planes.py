@@ -0,0 +1,61 @@
+import re
+from datetime import date
+
+from django.db import connection
+
+from .models import Inscripcion, Asistencia, Calificacion
+
+# --------------------------------------------------------------------------
+# PLANES DE EJECUCIÓN DE LAS CONSULTAS CRÍTICAS
+# --------------------------------------------------------------------------
+# Cada consulta crítica se construye igual que en su vista y se revisa con
+# EXPLAIN (EXPLAIN QUERY PLAN en SQLite) para detectar si la base de datos
+# recurre a un recorrido completo de la tabla en lugar de usar un índice.
+
+# SQLite: "SCAN tabla" sin "USING ... INDEX"; PostgreSQL: "Seq Scan on tabla"
+_RE_ESCANEO_SQLITE = re.compile(r'\bSCAN (\w+)(?! USING)(?!\w)')
+_RE_ESCANEO_POSTGRES = re.compile(r'Seq Scan on (\w+)')
+
+
+def consultas_criticas(curso_id, inscripcion_id, fecha=None):
+    """Devuelve {nombre: queryset} con las consultas de las vistas más usadas."""
+    fecha = fecha or date.today()
+    inscripciones_curso = Inscripcion.objects.filter(curso_id=curso_id, esta_activo=True)
+    return {
+        # gestionar_asistencia / ver_calificaciones_por_curso
+        'inscripciones_activas_del_curso': inscripciones_curso,
+        # gestionar_asistencia
+        'asistencias_del_dia': Asistencia.objects.filter(inscripcion__in=inscripciones_curso, fecha=fecha),
+        # ver_historial_asistencia_estudiante
+        'historial_asistencia': Asistencia.objects.filter(inscripcion_id=inscripcion_id).order_by('-fecha'),
+        # calificaciones.inscripciones_con_calificaciones (Prefetch ordenado)
+        'calificaciones_de_inscripciones': Calificacion.objects.filter(
+            inscripcion_id__in=list(inscripciones_curso.values_list('id', flat=True)[:50])
+        ).order_by('inscripcion_id', 'fecha_evaluacion', 'id'),
+        # ver_inscripciones filtrado por curso, estado y periodo
+        'inscripciones_por_curso_y_periodo': Inscripcion.objects.filter(
+            curso_id=curso_id, esta_activo=True, periodo_academico='2025-2'
+        ),
+    }
+
+
+def tablas_con_escaneo_completo(queryset):
+    """Tablas que el plan de 'queryset' recorre completas (sin índice)."""
+    plan = queryset.explain()
+    if connection.vendor == 'postgresql':
+        return _RE_ESCANEO_POSTGRES.findall(plan)
+    return _RE_ESCANEO_SQLITE.findall(plan)
+
+
+def revisar_planes(curso_id, inscripcion_id, fecha=None):
+    """{nombre_consulta: [tablas con escaneo completo]} solo para las consultas con problemas."""
+    if connection.vendor == 'sqlite':
+        # Estadísticas actualizadas para que el planificador elija como en producción
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+    problemas = {}
+    for nombre, queryset in consultas_criticas(curso_id, inscripcion_id, fecha).items():
+        tablas = tablas_con_escaneo_completo(queryset)
+        if tablas:
+            problemas[nombre] = tablas
+    return problemas
@@ -0,0 +1,91 @@
+from decimal import Decimal
+
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum
+
+from .kardex import invalidar_kardex_inscripciones
+from .models import Calificacion, Inscripcion, ResumenCalificacion
+
+# --------------------------------------------------------------------------
+# RESUMEN MATERIALIZADO DE CALIFICACIONES POR INSCRIPCIÓN
+# --------------------------------------------------------------------------
+# Cada alta, cambio o baja de Calificacion suma/resta su aporte con una
+# sentencia UPDATE ... SET campo = campo + delta (ver signals.py), así la
+# página de calificaciones lee promedios ya calculados en lugar de agrupar
+# toda la tabla en cada visita.
+
+TAMANO_LOTE_RESUMEN = 1000
+
+CAMPOS_RESUMEN = ['conteo', 'suma_puntaje', 'suma_ponderada', 'suma_pesos']
+
+
+def aplicar_delta(inscripcion_id, puntaje, peso, signo=1, recalcular_si_falta=True):
+    """
+    Suma (signo=1) o resta (signo=-1) el aporte de una calificación al resumen.
+    Si el resumen todavía no existe se recalcula desde cero para esa inscripción.
+    """
+    puntaje = Decimal(str(puntaje))
+    peso = int(peso)
+    actualizados = ResumenCalificacion.objects.filter(pk=inscripcion_id).update(
+        conteo=F('conteo') + signo,
+        suma_puntaje=F('suma_puntaje') + signo * puntaje,
+        suma_ponderada=F('suma_ponderada') + signo * puntaje * peso,
+        suma_pesos=F('suma_pesos') + signo * peso,
+    )
+    if not actualizados and recalcular_si_falta:
+        recalcular_resumenes([inscripcion_id])
+
+
+def recalcular_resumenes(inscripcion_ids):
+    """Recalcula con un GROUP BY y un upsert los resúmenes de las inscripciones dadas."""
+    inscripcion_ids = list(inscripcion_ids)
+    if not inscripcion_ids:
+        return 0
+
+    totales = {
+        fila['inscripcion_id']: fila
+        for fila in Calificacion.objects.filter(inscripcion_id__in=inscripcion_ids)
+        .values('inscripcion_id')
+        .annotate(
+            conteo=Count('id'),
+            suma_puntaje=Sum('puntaje'),
+            suma_ponderada=Sum(ExpressionWrapper(
+                F('puntaje') * F('porcentaje_peso'),
+                output_field=DecimalField(max_digits=14, decimal_places=2),
+            )),
+            suma_pesos=Sum('porcentaje_peso'),
+        )
+    }
+
+    resumenes = []
+    for inscripcion_id in inscripcion_ids:
+        fila = totales.get(inscripcion_id, {})
+        resumenes.append(ResumenCalificacion(
+            inscripcion_id=inscripcion_id,
+            conteo=fila.get('conteo') or 0,
+            suma_puntaje=fila.get('suma_puntaje') or 0,
+            suma_ponderada=fila.get('suma_ponderada') or 0,
+            suma_pesos=fila.get('suma_pesos') or 0,
+        ))
+
+    ResumenCalificacion.objects.bulk_create(
+        resumenes,
+        update_conflicts=True,
+        unique_fields=['inscripcion'],
+        update_fields=CAMPOS_RESUMEN,
+    )
+    # Las calificaciones finales cambiaron: el kardex cacheado de esos estudiantes ya no sirve.
+    invalidar_kardex_inscripciones(inscripcion_ids)
+    return len(resumenes)
+
+
+def reconstruir_todos(tamano_lote=TAMANO_LOTE_RESUMEN):
+    """Recalcula el resumen de todas las inscripciones, por lotes de IDs."""
+    total = 0
+    lote = []
+    for inscripcion_id in Inscripcion.objects.order_by('id').values_list('id', flat=True).iterator(chunk_size=tamano_lote):
+        lote.append(inscripcion_id)
+        if len(lote) >= tamano_lote:
+            total += recalcular_resumenes(lote)
+            lote = []
+    total += recalcular_resumenes(lote)
+    return total
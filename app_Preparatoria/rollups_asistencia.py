@@ -0,0 +1,222 @@
+import threading
+
+from django.db import transaction
+from django.db.models import Count, F, FloatField, Q, Sum
+from django.db.models.functions import Cast, TruncWeek
+
+from .models import Asistencia, AsistenciaDiariaCurso, AsistenciaTotalInscripcion, Inscripcion
+
+# --------------------------------------------------------------------------
+# ACUMULADOS (ROLLUPS) DE ASISTENCIA
+# --------------------------------------------------------------------------
+# Dos tablas pequeñas resumen la tabla Asistencia:
+#   - AsistenciaDiariaCurso: (curso, fecha, tipo_sesion) -> total, presentes, justificadas
+#   - AsistenciaTotalInscripcion: (inscripcion, tipo_sesion) -> total, presentes, justificadas
+# Cuando cambia una asistencia solo se recalculan las llaves afectadas (un día de
+# un curso y el total de una inscripción). Las llaves se acumulan durante la
+# transacción y se procesan una sola vez al confirmarla, así un guardado de toda
+# la clase o un borrado en cascada recalcula cada llave una sola vez.
+# El tablero lee exclusivamente de estas tablas.
+
+UMBRAL_RIESGO_DEFAULT = 80
+LIMITE_EN_RIESGO = 100
+TAMANO_LOTE_ROLLUP = 500
+
+_pendientes = threading.local()
+
+
+def _estado_pendiente():
+    if not hasattr(_pendientes, 'inscripciones'):
+        _pendientes.inscripciones = set()
+        _pendientes.curso_fechas = set()
+        _pendientes.curso_de_inscripcion = {}
+    return _pendientes
+
+
+# ------------------------------------------
+# MANTENIMIENTO INCREMENTAL
+# ------------------------------------------
+
+def marcar_pendientes(inscripcion_ids, fecha, curso_id=None):
+    """
+    Registra que cambió la asistencia de 'inscripcion_ids' en 'fecha'; las llaves se
+    recalculan al confirmar la transacción. Si no se da 'curso_id' se resuelve con una
+    sola consulta (y se recuerda para el resto de la transacción).
+    """
+    estado = _estado_pendiente()
+    cursos = estado.curso_de_inscripcion
+    if curso_id is not None:
+        cursos.update(dict.fromkeys(inscripcion_ids, curso_id))
+    faltantes = [i for i in inscripcion_ids if i not in cursos]
+    if faltantes:
+        cursos.update(Inscripcion.objects.filter(pk__in=faltantes).values_list('id', 'curso_id'))
+
+    for inscripcion_id in inscripcion_ids:
+        if inscripcion_id in cursos:
+            estado.inscripciones.add(inscripcion_id)
+            estado.curso_fechas.add((cursos[inscripcion_id], fecha))
+    # Se registra en cada llamada: si una transacción anterior se revirtió sus llaves
+    # siguen pendientes y se recalculan (de forma idempotente) en la siguiente.
+    transaction.on_commit(procesar_pendientes)
+
+
+def procesar_pendientes():
+    estado = _estado_pendiente()
+    inscripciones, curso_fechas = estado.inscripciones, estado.curso_fechas
+    if not inscripciones and not curso_fechas:
+        return
+    estado.inscripciones, estado.curso_fechas = set(), set()
+    estado.curso_de_inscripcion = {}
+    recalcular_inscripciones(inscripciones)
+    recalcular_curso_fechas(curso_fechas)
+
+
+def _agregados():
+    return {
+        'total': Count('id'),
+        'presentes': Count('id', filter=Q(presente=True)),
+        'justificadas': Count('id', filter=Q(presente=False, justificacion_aprobada=True)),
+    }
+
+
+def recalcular_inscripciones(inscripcion_ids):
+    """Recalcula los totales por tipo de sesión de las inscripciones dadas."""
+    inscripcion_ids = list(inscripcion_ids)
+    for inicio in range(0, len(inscripcion_ids), TAMANO_LOTE_ROLLUP):
+        lote = inscripcion_ids[inicio:inicio + TAMANO_LOTE_ROLLUP]
+        filas = (
+            Asistencia.objects.filter(inscripcion_id__in=lote)
+            .values('inscripcion_id', 'tipo_sesion')
+            .annotate(**_agregados())
+        )
+        with transaction.atomic():
+            AsistenciaTotalInscripcion.objects.filter(inscripcion_id__in=lote).delete()
+            AsistenciaTotalInscripcion.objects.bulk_create(
+                [AsistenciaTotalInscripcion(**fila) for fila in filas]
+            )
+
+
+def recalcular_curso_fechas(curso_fechas):
+    """Recalcula los totales diarios de los pares (curso_id, fecha) dados."""
+    por_curso = {}
+    for curso_id, fecha in curso_fechas:
+        por_curso.setdefault(curso_id, set()).add(fecha)
+
+    for curso_id, fechas in por_curso.items():
+        filas = (
+            Asistencia.objects.filter(inscripcion__curso_id=curso_id, fecha__in=fechas)
+            .values('fecha', 'tipo_sesion')
+            .annotate(**_agregados())
+        )
+        with transaction.atomic():
+            AsistenciaDiariaCurso.objects.filter(curso_id=curso_id, fecha__in=fechas).delete()
+            AsistenciaDiariaCurso.objects.bulk_create(
+                [AsistenciaDiariaCurso(curso_id=curso_id, **fila) for fila in filas]
+            )
+
+
+def reconstruir_todo(curso_ids=None):
+    """
+    Reconstruye desde cero los acumulados de los cursos indicados (todos si es None),
+    curso por curso. Devuelve (filas_diarias, filas_por_inscripcion) creadas.
+    """
+    if curso_ids is None:
+        curso_ids = list(Inscripcion.objects.order_by().values_list('curso_id', flat=True).distinct())
+        with transaction.atomic():
+            AsistenciaDiariaCurso.objects.all().delete()
+            AsistenciaTotalInscripcion.objects.all().delete()
+
+    diarias = por_inscripcion = 0
+    for curso_id in curso_ids:
+        filas = (
+            Asistencia.objects.filter(inscripcion__curso_id=curso_id)
+            .values('fecha', 'tipo_sesion')
+            .annotate(**_agregados())
+        )
+        inscripcion_ids = list(Inscripcion.objects.filter(curso_id=curso_id).values_list('id', flat=True))
+        with transaction.atomic():
+            AsistenciaDiariaCurso.objects.filter(curso_id=curso_id).delete()
+            diarias += len(AsistenciaDiariaCurso.objects.bulk_create(
+                [AsistenciaDiariaCurso(curso_id=curso_id, **fila) for fila in filas],
+                batch_size=TAMANO_LOTE_ROLLUP,
+            ))
+            recalcular_inscripciones(inscripcion_ids)
+        por_inscripcion += AsistenciaTotalInscripcion.objects.filter(inscripcion__curso_id=curso_id).count()
+    return diarias, por_inscripcion
+
+
+# ------------------------------------------
+# CONSULTAS DEL TABLERO (solo tablas acumuladas)
+# ------------------------------------------
+
+def _tasa(presentes, total):
+    return round(100.0 * presentes / total, 1) if total else None
+
+
+def _con_tasas(filas):
+    for fila in filas:
+        fila['tasa'] = _tasa(fila['presentes'], fila['total'])
+        fila['tasa_con_justificadas'] = _tasa(fila['presentes'] + fila['justificadas'], fila['total'])
+    return filas
+
+
+def _sumas():
+    return {'total': Sum('total'), 'presentes': Sum('presentes'), 'justificadas': Sum('justificadas')}
+
+
+def tasa_por_curso():
+    return _con_tasas(list(
+        AsistenciaDiariaCurso.objects.filter(curso__eliminado_en__isnull=True)
+        .values('curso_id', 'curso__codigo', 'curso__nombre_curso')
+        .annotate(**_sumas())
+        .order_by('curso__codigo')
+    ))
+
+
+def tasa_por_semana(curso_id=None):
+    queryset = AsistenciaDiariaCurso.objects.filter(curso__eliminado_en__isnull=True)
+    if curso_id:
+        queryset = queryset.filter(curso_id=curso_id)
+    return _con_tasas(list(
+        queryset.annotate(semana=TruncWeek('fecha')).values('semana')
+        .annotate(**_sumas())
+        .order_by('-semana')
+    ))
+
+
+def tasa_por_tipo_sesion(curso_id=None):
+    queryset = AsistenciaDiariaCurso.objects.filter(curso__eliminado_en__isnull=True)
+    if curso_id:
+        queryset = queryset.filter(curso_id=curso_id)
+    return _con_tasas(list(
+        queryset.values('tipo_sesion').annotate(**_sumas()).order_by('tipo_sesion')
+    ))
+
+
+def _por_estudiante(curso_id=None):
+    queryset = AsistenciaTotalInscripcion.objects.filter(inscripcion__esta_activo=True)
+    if curso_id:
+        queryset = queryset.filter(inscripcion__curso_id=curso_id)
+    return (
+        queryset.values(
+            'inscripcion_id',
+            'inscripcion__estudiante__matricula',
+            'inscripcion__estudiante__nombre_estudiante',
+            'inscripcion__estudiante__apellido_estudiante',
+            'inscripcion__curso__codigo',
+        )
+        .annotate(**_sumas())
+        .annotate(porcentaje=100.0 * Cast(F('presentes'), FloatField()) / Cast(F('total'), FloatField()))
+    )
+
+
+def tasa_por_estudiante(curso_id):
+    """Tasa de cada inscripción activa de un curso (acotado al tamaño del grupo)."""
+    return _con_tasas(list(_por_estudiante(curso_id).order_by('inscripcion__estudiante__apellido_estudiante')))
+
+
+def estudiantes_en_riesgo(umbral=UMBRAL_RIESGO_DEFAULT, curso_id=None, limite=LIMITE_EN_RIESGO):
+    """Inscripciones activas con tasa de asistencia menor a 'umbral' (%), de la peor a la mejor."""
+    return _con_tasas(list(
+        _por_estudiante(curso_id).filter(total__gt=0, porcentaje__lt=umbral).order_by('porcentaje')[:limite]
+    ))
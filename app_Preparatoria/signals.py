@@ -0,0 +1,150 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .cupos import ajustar_inscritos
+from .kardex import invalidar_kardex, invalidar_kardex_calificacion, invalidar_kardex_inscripciones
+from .listas_cache import incrementar_version
+from .models import Asistencia, Calificacion, Curso, Estudiante, Inscripcion, Profesor
+from .resumenes import aplicar_delta
+from .rollups_asistencia import marcar_pendientes
+
+# --------------------------------------------------------------------------
+# SEÑALES: MANTENIMIENTO INCREMENTAL DEL RESUMEN DE CALIFICACIONES
+# --------------------------------------------------------------------------
+# Nota: bulk_create/update()/delete() sobre querysets no envían señales;
+# quien los use debe llamar a resumenes.recalcular_resumenes(). Cada cambio
+# también descarta el kardex cacheado del estudiante (ver kardex.py).
+
+
+@receiver(pre_save, sender=Calificacion)
+def guardar_valores_previos_calificacion(sender, instance, **kwargs):
+    """Conserva los valores previos para poder restar su aporte al actualizar."""
+    instance._valores_previos = None
+    if instance.pk:
+        instance._valores_previos = (
+            Calificacion.objects.filter(pk=instance.pk)
+            .values_list('inscripcion_id', 'puntaje', 'porcentaje_peso')
+            .first()
+        )
+
+
+@receiver(post_save, sender=Calificacion)
+def actualizar_resumen_al_guardar(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previos = getattr(instance, '_valores_previos', None)
+    if previos:
+        inscripcion_id, puntaje, peso = previos
+        aplicar_delta(inscripcion_id, puntaje, peso, signo=-1, recalcular_si_falta=False)
+        if inscripcion_id != instance.inscripcion_id:
+            invalidar_kardex_inscripciones([inscripcion_id])
+    aplicar_delta(instance.inscripcion_id, instance.puntaje, instance.porcentaje_peso)
+    invalidar_kardex_calificacion(instance)
+
+
+@receiver(post_delete, sender=Calificacion)
+def actualizar_resumen_al_borrar(sender, instance, **kwargs):
+    # Sin recálculo: en un borrado en cascada el resumen también desaparece.
+    aplicar_delta(
+        instance.inscripcion_id, instance.puntaje, instance.porcentaje_peso,
+        signo=-1, recalcular_si_falta=False,
+    )
+    invalidar_kardex_calificacion(instance)
+
+
+# --------------------------------------------------------------------------
+# SEÑALES: INVALIDACIÓN DE LISTAS CACHEADAS
+# --------------------------------------------------------------------------
+
+_MODELOS_VERSIONADOS = {Profesor: 'profesor', Curso: 'curso', Estudiante: 'estudiante'}
+
+
+def _invalidar_version(sender, **kwargs):
+    incrementar_version(_MODELOS_VERSIONADOS[sender])
+
+
+for _modelo in _MODELOS_VERSIONADOS:
+    post_save.connect(_invalidar_version, sender=_modelo, dispatch_uid=f'version_{_modelo.__name__}_save')
+    post_delete.connect(_invalidar_version, sender=_modelo, dispatch_uid=f'version_{_modelo.__name__}_delete')
+
+
+# --------------------------------------------------------------------------
+# SEÑALES: ACUMULADOS DE ASISTENCIA
+# --------------------------------------------------------------------------
+# Solo se marcan las llaves afectadas; el recálculo ocurre una vez al confirmar
+# la transacción (ver rollups_asistencia.py).
+
+
+@receiver(pre_save, sender=Asistencia)
+def guardar_llave_previa_asistencia(sender, instance, **kwargs):
+    """Si cambia la inscripción o la fecha, también hay que recalcular la llave anterior."""
+    instance._llave_previa = None
+    if instance.pk:
+        instance._llave_previa = (
+            Asistencia.objects.filter(pk=instance.pk).values_list('inscripcion_id', 'fecha').first()
+        )
+
+
+@receiver(post_save, sender=Asistencia)
+def marcar_rollup_al_guardar(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previa = getattr(instance, '_llave_previa', None)
+    if previa and previa != (instance.inscripcion_id, instance.fecha):
+        marcar_pendientes([previa[0]], previa[1])
+    marcar_pendientes([instance.inscripcion_id], instance.fecha)
+
+
+@receiver(post_delete, sender=Asistencia)
+def marcar_rollup_al_borrar(sender, instance, **kwargs):
+    marcar_pendientes([instance.inscripcion_id], instance.fecha)
+
+
+# --------------------------------------------------------------------------
+# SEÑALES: CONTADOR DE INSCRITOS ACTIVOS POR CURSO
+# --------------------------------------------------------------------------
+# Cubre save() y delete() (incluido el borrado en cascada de un estudiante y
+# estudiante.cursos.remove/set) y estudiante.cursos.add(); las demás escrituras
+# masivas ajustan el contador con cupos.ajustar_inscritos().
+
+
+@receiver(pre_save, sender=Inscripcion)
+def guardar_estado_previo_inscripcion(sender, instance, **kwargs):
+    instance._estado_previo = None
+    if instance.pk:
+        instance._estado_previo = (
+            Inscripcion.objects.filter(pk=instance.pk).values_list('curso_id', 'esta_activo').first()
+        )
+
+
+@receiver(post_save, sender=Inscripcion)
+def ajustar_inscritos_al_guardar(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    deltas = {}
+    previo = getattr(instance, '_estado_previo', None)
+    if previo and previo[1]:
+        deltas[previo[0]] = deltas.get(previo[0], 0) - 1
+    if instance.esta_activo:
+        deltas[instance.curso_id] = deltas.get(instance.curso_id, 0) + 1
+    ajustar_inscritos(deltas)
+    invalidar_kardex([instance.estudiante_id])
+
+
+@receiver(post_delete, sender=Inscripcion)
+def ajustar_inscritos_al_borrar(sender, instance, **kwargs):
+    if instance.esta_activo:
+        ajustar_inscritos({instance.curso_id: -1})
+    invalidar_kardex([instance.estudiante_id])
+
+
+@receiver(m2m_changed, sender=Estudiante.cursos.through)
+def ajustar_inscritos_al_agregar_cursos(sender, instance, action, reverse, pk_set, **kwargs):
+    # add() inserta con bulk_create (sin post_save); pk_set solo trae las filas nuevas.
+    # Las quitadas con remove() pasan por post_delete.
+    if action != 'post_add' or not pk_set:
+        return
+    if reverse:
+        ajustar_inscritos({instance.pk: len(pk_set)})
+    else:
+        ajustar_inscritos(dict.fromkeys(pk_set, 1))
@@ -1,3 +1,1351 @@
-from django.test import TestCase
+import csv
+import importlib.util
+import io
+import json
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from unittest import skipUnless
+from decimal import Decimal
+from functools import partial
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import Client, RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .asistencias import guardar_asistencias
+from .base_datos import pragmas_actuales
+from .cupos import reconciliar_inscritos
+from .eliminacion import purgar_eliminados
+from .estadisticas import estadisticas_curso, estadisticas_periodo, numpy_disponible
+from .kardex import calcular_kardex, kardex_estudiante, promedios_cohorte
+from .horarios import HorarioInvalido, interpretar_horario, reporte_conflictos
+from .boletas import (
+    cerrar_trabajo_si_termino, crear_trabajo, ejecutar_worker, liberar_tareas_colgadas, procesar_lote, tomar_lote,
+)
+from .historial import TAMANO_BLOQUE_HISTORIAL
+from .importacion import importar_archivo
+from .inscripciones import cerrar_periodo, inscribir_en_cursos
+from .listas_cache import invalidar_listas, opciones_cursos, opciones_estudiantes
+from .benchmark import (
+    ARCHIVO_BASE, cargar_base, ejecutar_benchmark, generar_datos, regresiones_contra_base, rutas_que_crecen,
+)
+from .filtros import filtrar_estudiantes, filtrar_inscripciones
+from .models import (
+    Profesor, Curso, Estudiante, Inscripcion, Calificacion, Asistencia, AsistenciaDiariaCurso, LoteAsistencia,
+    TareaBoleta, SesionCurso, ResumenCalificacion,
+)
+from .paginacion import codificar_cursor, paginar_por_cursor
+from .perfilado import huella_sql, registros_recientes
+from .planes import revisar_planes
+from .resumenes import recalcular_resumenes
+from .rollups_asistencia import reconstruir_todo
+
+
+def crear_curso_con_alumnos(num_estudiantes, codigo='MAT101'):
+    """Crea un curso con 'num_estudiantes' inscritos y dos calificaciones por inscripción."""
+    profesor = Profesor.objects.create(
+        nombre_profesor='Ana', apellido_profesor='Pérez',
+        correo_profesor=f'ana.{codigo}@prepa.mx', telefono='555'
+    )
+    curso = Curso.objects.create(
+        nombre_curso='Matemáticas', codigo=codigo, descripcion='', creditos=5,
+        horario='Lunes 8-10', aula='A1', profesor=profesor
+    )
+    for i in range(num_estudiantes):
+        estudiante = Estudiante.objects.create(
+            nombre_estudiante=f'Alumno{i}', apellido_estudiante='Prueba',
+            matricula=f'{codigo[:3]}{i:05d}', correo_estudiante=f'a{i}@prepa.mx',
+            fecha_nacimiento=date(2008, 1, 1)
+        )
+        inscripcion = Inscripcion.objects.create(estudiante=estudiante, curso=curso)
+        Calificacion.objects.create(
+            inscripcion=inscripcion, tipo_evaluacion='PARCIAL_1', puntaje=Decimal('8'),
+            porcentaje_peso=25, profesor_asignador=profesor
+        )
+        Calificacion.objects.create(
+            inscripcion=inscripcion, tipo_evaluacion='FINAL', puntaje=Decimal('10'),
+            porcentaje_peso=75, profesor_asignador=profesor
+        )
+    return curso
+
+
+class GestionCalificacionesTests(TestCase):
+
+    def test_consultas_constantes_sin_importar_tamano_del_grupo(self):
+        """La página de calificaciones no debe crecer en consultas con el número de alumnos."""
+        for num_estudiantes, codigo in ((3, 'CHI001'), (30, 'GDE001')):
+            curso = crear_curso_con_alumnos(num_estudiantes, codigo)
+            url = reverse('ver_calificaciones_por_curso', args=[curso.id])
+            # curso + inscripciones + calificaciones (prefetch)
+            with self.assertNumQueries(3):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.context['inscripciones']), num_estudiantes)
+
+    def test_promedios_simple_y_ponderado(self):
+        curso = crear_curso_con_alumnos(1)
+        response = self.client.get(reverse('ver_calificaciones_por_curso', args=[curso.id]))
+        inscripcion = response.context['inscripciones'][0]
+        self.assertEqual(inscripcion.conteo_calificaciones, 2)
+        self.assertEqual(inscripcion.promedio_simple, Decimal('9'))
+        # (8 * 25 + 10 * 75) / 100
+        self.assertEqual(inscripcion.promedio_ponderado, Decimal('9.5'))
+
+    def test_promedios_se_leen_del_resumen(self):
+        curso = crear_curso_con_alumnos(2)
+        inscripcion = Inscripcion.objects.filter(curso=curso).first()
+        ResumenCalificacion.objects.filter(pk=inscripcion.pk).update(suma_ponderada=700)
+        ResumenCalificacion.objects.exclude(pk=inscripcion.pk).delete()
+        response = self.client.get(reverse('ver_calificaciones_por_curso', args=[curso.id]))
+        promedios = {i.pk: (i.conteo_calificaciones, i.promedio_ponderado) for i in response.context['inscripciones']}
+        self.assertEqual(promedios[inscripcion.pk], (2, Decimal('7')))
+        # Sin resumen la inscripción se muestra sin calificaciones contadas
+        otra = next(pk for pk in promedios if pk != inscripcion.pk)
+        self.assertEqual(promedios[otra], (0, None))
+
+
+class PaginacionCursorTests(TestCase):
+
+    def setUp(self):
+        crear_curso_con_alumnos(7)
+        self.queryset = Estudiante.objects.all()
+        self.columnas = ('id', 'matricula', 'fecha_inscripcion')
+
+    def _pagina(self, **parametros):
+        request = RequestFactory().get('/', {'por_pagina': 3, **parametros})
+        return paginar_por_cursor(self.queryset, request, columnas_orden=self.columnas)
+
+    def test_avanzar_y_retroceder(self):
+        # Todas las fechas de inscripción empatan: el id desempata
+        esperado = list(Estudiante.objects.order_by('id').values_list('matricula', flat=True))
+        paginas = [self._pagina(orden='fecha_inscripcion')]
+        while paginas[-1].tiene_siguiente:
+            paginas.append(self._pagina(orden='fecha_inscripcion', cursor=paginas[-1].cursor_siguiente))
+        self.assertEqual([len(p) for p in paginas], [3, 3, 1])
+        self.assertEqual([e.matricula for p in paginas for e in p], esperado)
+        self.assertFalse(paginas[0].tiene_anterior)
+
+        anterior = self._pagina(orden='fecha_inscripcion', cursor=paginas[2].cursor_anterior)
+        self.assertEqual([e.matricula for e in anterior], esperado[3:6])
+        self.assertTrue(anterior.tiene_anterior)
+        primera = self._pagina(orden='fecha_inscripcion', cursor=anterior.cursor_anterior)
+        self.assertEqual([e.matricula for e in primera], esperado[:3])
+        self.assertFalse(primera.tiene_anterior)
+
+    def test_cursor_invalido_muestra_la_primera_pagina(self):
+        primera = [e.pk for e in self._pagina(orden='fecha_inscripcion')]
+        estudiante = Estudiante.objects.order_by('id').first()
+        for cursor in ('no-es-base64!', codificar_cursor('no-es-fecha', estudiante.pk, 'sig'),
+                       codificar_cursor(None, estudiante.pk, 'ant'), codificar_cursor('2024-01-01', 1, 'otra')):
+            pagina = self._pagina(orden='fecha_inscripcion', cursor=cursor)
+            self.assertEqual([e.pk for e in pagina], primera, cursor)
+
+        response = self.client.get(reverse('ver_estudiante'), {
+            'orden': 'fecha_inscripcion', 'cursor': codificar_cursor('no-es-fecha', estudiante.pk, 'sig'),
+        })
+        self.assertEqual(response.status_code, 200)
+
+
+class InscripcionMasivaTests(TestCase):
+
+    def setUp(self):
+        self.curso = crear_curso_con_alumnos(1)
+        self.inscripcion = Inscripcion.objects.get(curso=self.curso)
+        self.estudiante = self.inscripcion.estudiante
+        self.otros = [
+            Curso.objects.create(
+                nombre_curso=f'Optativa {i}', codigo=f'OPT10{i}', descripcion='', creditos=3,
+                horario='', aula='B1', profesor=self.curso.profesor,
+            )
+            for i in range(2)
+        ]
+
+    def _inscribir(self, cursos):
+        return self.client.post(reverse('agregar_inscripcion'), {
+            'estudiante_id': self.estudiante.pk, 'cursos': cursos,
+            'periodo_academico': self.inscripcion.periodo_academico,
+        })
+
+    def test_inscribe_los_faltantes_y_reporta_los_existentes(self):
+        respuesta = self._inscribir([self.curso.pk, *(c.pk for c in self.otros), 'basura'])
+        self.assertRedirects(respuesta, reverse('ver_inscripciones'))
+        self.assertEqual(
+            set(Inscripcion.objects.filter(estudiante=self.estudiante).values_list('curso_id', flat=True)),
+            {self.curso.pk, *(c.pk for c in self.otros)},
+        )
+        mensajes = [str(m) for m in get_messages(respuesta.wsgi_request)]
+        self.assertIn('Ya estaba inscrito en: MAT101', mensajes)
+        # bulk_create no envía señales: el contador se ajusta en la misma transacción
+        for curso in self.otros:
+            curso.refresh_from_db()
+            self.assertEqual(curso.inscritos_activos, 1)
+
+    def test_ids_inexistentes_no_escriben_nada(self):
+        respuesta = self._inscribir([self.otros[0].pk, 999999])
+        self.assertEqual(respuesta.status_code, 404)
+        self.assertEqual(Inscripcion.objects.filter(estudiante=self.estudiante).count(), 1)
+        self.otros[0].refresh_from_db()
+        self.assertEqual(self.otros[0].inscritos_activos, 0)
+
+
+class AsistenciaEnBloqueTests(TestCase):
+
+    def setUp(self):
+        curso = crear_curso_con_alumnos(3)
+        self.ids = list(Inscripcion.objects.filter(curso=curso).order_by('pk').values_list('pk', flat=True))
+        self.fecha = date(2025, 9, 1)
+
+    def test_solo_escribe_filas_nuevas_o_cambiadas(self):
+        registros = {pk: (True, '', False) for pk in self.ids}
+        self.assertEqual(sorted(guardar_asistencias(self.fecha, registros)), self.ids)
+        self.assertEqual(Asistencia.objects.filter(fecha=self.fecha).count(), 3)
+
+        # Sin cambios: solo la consulta de lo ya guardado
+        with self.assertNumQueries(1):
+            self.assertEqual(guardar_asistencias(self.fecha, registros), [])
+
+        existentes = {a.inscripcion_id: a for a in Asistencia.objects.filter(fecha=self.fecha)}
+        # Si se escribiera una fila sin cambios, el upsert pisaría esta observación
+        Asistencia.objects.filter(inscripcion_id=self.ids[1], fecha=self.fecha).update(observaciones='externa')
+        registros[self.ids[0]] = (False, 'Enfermo', True)
+        self.assertEqual(guardar_asistencias(self.fecha, registros, existentes), [self.ids[0]])
+
+        guardadas = {a.inscripcion_id: a for a in Asistencia.objects.filter(fecha=self.fecha)}
+        self.assertEqual(len(guardadas), 3)
+        self.assertEqual(guardadas[self.ids[0]].pk, existentes[self.ids[0]].pk)
+        self.assertEqual(
+            (guardadas[self.ids[0]].presente, guardadas[self.ids[0]].justificacion_aprobada), (False, True)
+        )
+        self.assertEqual(guardadas[self.ids[1]].observaciones, 'externa')
+
+
+class ExportacionCsvTests(TestCase):
+
+    def setUp(self):
+        self.curso = crear_curso_con_alumnos(3)
+        crear_curso_con_alumnos(2, codigo='HIS101')
+
+    def _csv(self, respuesta):
+        self.assertTrue(respuesta.streaming)
+        contenido = b''.join(respuesta.streaming_content).decode('utf-8')
+        self.assertTrue(contenido.startswith('\ufeff'))
+        return list(csv.reader(io.StringIO(contenido[1:])))
+
+    def test_calificaciones_de_un_curso(self):
+        respuesta = self.client.get(reverse('exportar_calificaciones'), {'curso': self.curso.pk})
+        self.assertEqual(respuesta['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertEqual(
+            respuesta['Content-Disposition'], f'attachment; filename="calificaciones_curso{self.curso.pk}.csv"'
+        )
+        filas = self._csv(respuesta)
+        self.assertEqual(filas[0][:4], ['Matrícula', 'Nombre', 'Apellido', 'Código Curso'])
+        # Dos calificaciones por inscripción, solo del curso pedido
+        self.assertEqual(len(filas) - 1, 6)
+        self.assertEqual({fila[3] for fila in filas[1:]}, {'MAT101'})
+        self.assertEqual(filas[1][6:9], ['PARCIAL_1', '8.00', '25'])
+
+    def test_asistencias_de_un_periodo_y_parametros_invalidos(self):
+        fecha = date(2025, 9, 1)
+        guardar_asistencias(fecha, {
+            pk: (False, 'Tarde', False) for pk in Inscripcion.objects.values_list('pk', flat=True)
+        })
+        url = reverse('exportar_asistencias')
+        filas = self._csv(self.client.get(url, {'periodo': '2025-2'}))
+        self.assertEqual(len(filas) - 1, 5)
+        self.assertEqual(filas[1][6:], ['2025-09-01', 'CLASE', 'False', 'False', 'Tarde'])
+
+        self.assertEqual(self.client.get(url).status_code, 400)
+        self.assertEqual(self.client.get(url, {'curso': 'MAT101'}).status_code, 400)
+
+
+class ResumenCalificacionesTests(TestCase):
+
+    def setUp(self):
+        curso = crear_curso_con_alumnos(2)
+        self.primera, self.segunda = Inscripcion.objects.filter(curso=curso).order_by('pk')
+
+    def _resumenes(self):
+        return {
+            r.pk: (r.conteo, r.suma_puntaje, r.suma_ponderada, r.suma_pesos)
+            for r in ResumenCalificacion.objects.filter(pk__in=[self.primera.pk, self.segunda.pk])
+        }
+
+    def _comprobar_contra_recalculo(self):
+        incremental = self._resumenes()
+        recalcular_resumenes([self.primera.pk, self.segunda.pk])
+        self.assertEqual(incremental, self._resumenes())
+
+    def test_deltas_coinciden_con_recalcular(self):
+        self.assertEqual(self._resumenes()[self.primera.pk], (2, Decimal('18'), Decimal('950'), 100))
+
+        nueva = Calificacion.objects.create(
+            inscripcion=self.primera, tipo_evaluacion='PROYECTO', puntaje=Decimal('7.25'), porcentaje_peso=20
+        )
+        self._comprobar_contra_recalculo()
+
+        nueva.puntaje, nueva.porcentaje_peso = Decimal('9.5'), 40
+        nueva.save()
+        self._comprobar_contra_recalculo()
+
+        # Cambiar de inscripción resta en una y suma en la otra
+        nueva.inscripcion = self.segunda
+        nueva.save()
+        self._comprobar_contra_recalculo()
+        self.assertEqual(self._resumenes()[self.segunda.pk][0], 3)
+
+        nueva.delete()
+        Calificacion.objects.filter(inscripcion=self.primera, tipo_evaluacion='FINAL').get().delete()
+        self._comprobar_contra_recalculo()
+        self.assertEqual(self._resumenes()[self.primera.pk], (1, Decimal('8'), Decimal('200'), 25))
+
+
+@override_settings(MIDDLEWARE=['app_Preparatoria.perfilado.PerfiladoMiddleware', *settings.MIDDLEWARE])
+class PerfiladoMiddlewareTests(TestCase):
+
+    def test_cabecera_server_timing_y_registro(self):
+        curso = crear_curso_con_alumnos(3)
+        respuesta = self.client.get(reverse('ver_calificaciones_por_curso', args=[curso.pk]))
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertRegex(
+            respuesta['Server-Timing'],
+            r'^sql;dur=[\d.]+;desc="3 consultas", tpl;dur=[\d.]+;desc="Plantillas", total;dur=[\d.]+$',
+        )
+        registro = registros_recientes()[0]
+        self.assertEqual((registro['ruta'], registro['status']), (respuesta.wsgi_request.path, 200))
+        self.assertEqual((registro['num_consultas'], registro['duplicadas']), (3, []))
+        self.assertGreater(registro['ms_plantillas'], 0)
+
+    def test_huella_agrupa_listas_in(self):
+        self.assertEqual(
+            huella_sql('SELECT * FROM t WHERE id IN (%s, %s, %s)'), huella_sql('SELECT * FROM t WHERE id IN (%s, %s)')
+        )
+
+
+class FiltrosPrefijoTests(TestCase):
+
+    def setUp(self):
+        self.curso = crear_curso_con_alumnos(0)
+        for i, apellido in enumerate(('García', 'Garza', 'Gascón', 'Gómez', 'garay')):
+            estudiante = Estudiante.objects.create(
+                nombre_estudiante='Ana' if i % 2 else 'Beto', apellido_estudiante=apellido,
+                matricula=f'PRE{i:05d}', correo_estudiante=f'f{i}@prepa.mx', fecha_nacimiento=date(2008, 1, 1),
+            )
+            Inscripcion.objects.create(estudiante=estudiante, curso=self.curso, esta_activo=apellido != 'Garza')
+
+    def _apellidos(self, queryset, campo='apellido_estudiante'):
+        return sorted(queryset.values_list(campo, flat=True))
+
+    def test_prefijos_de_estudiantes_como_rango(self):
+        queryset, filtros = filtrar_estudiantes(Estudiante.objects.all(), {'apellido': ' gar '})
+        self.assertEqual(filtros, {'apellido': 'gar'})
+        # 'gar' y 'Gar': sin Gascón ni Gómez
+        self.assertEqual(self._apellidos(queryset), ['García', 'Garza', 'garay'])
+        self.assertNotIn('LIKE', str(queryset.query).upper())
+
+        queryset, _ = filtrar_estudiantes(Estudiante.objects.all(), {'apellido': 'Ga', 'nombre': 'an'})
+        self.assertEqual(self._apellidos(queryset), ['Garza'])
+        queryset, _ = filtrar_estudiantes(Estudiante.objects.all(), {'matricula': 'pre0000'})
+        self.assertEqual(queryset.count(), 5)
+
+    def test_filtros_de_inscripciones(self):
+        todas = Inscripcion.objects.all()
+        queryset, filtros = filtrar_inscripciones(todas, {'apellido': 'Gar'})
+        # Solo activas por defecto
+        self.assertEqual(filtros, {'activo': '1', 'apellido': 'Gar'})
+        self.assertEqual(self._apellidos(queryset, 'estudiante__apellido_estudiante'), ['García'])
+        queryset, _ = filtrar_inscripciones(todas, {'apellido': 'Gar', 'activo': 'todos', 'curso': str(self.curso.pk)})
+        self.assertEqual(self._apellidos(queryset, 'estudiante__apellido_estudiante'), ['García', 'Garza'])
+        queryset, filtros = filtrar_inscripciones(todas, {'activo': '0', 'curso': 'x', 'matricula': 'pre'})
+        self.assertEqual(filtros, {'activo': '0', 'matricula': 'pre'})
+        self.assertEqual(self._apellidos(queryset, 'estudiante__apellido_estudiante'), ['Garza'])
+
+
+class BenchmarkRutasTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.resultados = ejecutar_benchmark([5, 40], dias_asistencia=2)
+
+    def test_ninguna_ruta_crece_en_consultas_con_los_datos(self):
+        """Cada ruta con nombre debe hacer el mismo número de consultas con 5 y con 40 estudiantes."""
+        # Sin NumPy el endpoint de estadísticas responde 503 a propósito
+        sin_servicio = set() if numpy_disponible() else {'estadisticas_calificaciones'}
+        for metricas in self.resultados.values():
+            for ruta, datos in metricas.items():
+                if ruta not in sin_servicio:
+                    self.assertLess(datos['status'], 500, ruta)
+                self.assertNotEqual(datos['status'], 400, ruta)
+        self.assertEqual(rutas_que_crecen(self.resultados), {})
+
+    def test_ninguna_ruta_supera_la_linea_base(self):
+        """Ninguna ruta hace más consultas que las registradas en benchmark_base.json."""
+        base = cargar_base(ARCHIVO_BASE)
+        self.assertTrue(base)
+        self.assertEqual(regresiones_contra_base(self.resultados, base), {})
+
+
+class PlanesDeConsultaTests(TestCase):
+
+    def test_consultas_criticas_usan_indices(self):
+        """Ninguna consulta crítica debe recorrer una tabla completa con datos sembrados."""
+        ids = generar_datos(300, dias_asistencia=3)
+        self.assertEqual(revisar_planes(ids['curso_id'], ids['inscripcion_id']), {})
+
+
+class RollupsAsistenciaTests(TestCase):
+
+    def _filas_diarias(self):
+        return sorted(AsistenciaDiariaCurso.objects.values_list(
+            'curso_id', 'fecha', 'tipo_sesion', 'total', 'presentes', 'justificadas'
+        ))
+
+    def test_mantenimiento_incremental_igual_a_reconstruccion(self):
+        curso = crear_curso_con_alumnos(4)
+        inscripciones = list(Inscripcion.objects.filter(curso=curso).order_by('id'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse('gestionar_asistencia', args=[curso.id]),
+                {'fecha_registro': str(date.today()), f'presente_{inscripciones[0].id}': 'on'},
+            )
+        with self.captureOnCommitCallbacks(execute=True):
+            Asistencia.objects.filter(inscripcion=inscripciones[1]).delete()
+        incremental = self._filas_diarias()
+        self.assertEqual(incremental[0][3:5], (3, 1))
+
+        reconstruir_todo()
+        self.assertEqual(self._filas_diarias(), incremental)
+
+    def test_tablero_no_consulta_la_tabla_asistencia(self):
+        curso = crear_curso_con_alumnos(3)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('gestionar_asistencia', args=[curso.id]), {'fecha_registro': str(date.today())})
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(reverse('dashboard_asistencia'), {'curso': curso.id, 'umbral': 50})
+        self.assertEqual(len(response.context['en_riesgo']), 3)
+        tabla = Asistencia._meta.db_table
+        self.assertFalse([q for q in consultas.captured_queries if f'"{tabla}"' in q['sql']])
+
+    def test_tablero_excluye_cursos_eliminados(self):
+        for curso in (crear_curso_con_alumnos(3), crear_curso_con_alumnos(2, codigo='FIS101')):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(reverse('gestionar_asistencia', args=[curso.id]), {'fecha_registro': str(date.today())})
+        self.client.post(reverse('borrar_curso', args=[curso.id]))
+
+        response = self.client.get(reverse('dashboard_asistencia'))
+        for clave in ('por_curso', 'por_semana', 'por_tipo_sesion'):
+            self.assertEqual(sum(fila['total'] for fila in response.context[clave]), 3, clave)
+
+
+@override_settings(API_ASISTENCIA_TOKENS=['token-tableta'])
+class ApiAsistenciaTests(TestCase):
+    # Como una tableta: sin sesión y con la verificación CSRF activa
+    client_class = partial(Client, enforce_csrf_checks=True, HTTP_AUTHORIZATION='Token token-tableta')
+
+    def setUp(self):
+        self.curso = crear_curso_con_alumnos(3)
+        self.inscripciones = list(Inscripcion.objects.filter(curso=self.curso).order_by('id'))
+        self.url = reverse('api_asistencia_lote', args=[self.curso.id])
+
+    def _enviar(self, clave, registros, fecha=None, **encabezados):
+        cuerpo = {'clave_lote': clave, 'fecha': str(fecha or date.today()), 'registros': registros}
+        return self.client.post(self.url, json.dumps(cuerpo), content_type='application/json', **encabezados)
+
+    def test_requiere_token(self):
+        registros = [{'inscripcion_id': self.inscripciones[0].id, 'presente': False}]
+        for encabezado in ('', 'Token otro', 'Bearer token-tableta'):
+            self.assertEqual(self._enviar('sin-token', registros, HTTP_AUTHORIZATION=encabezado).status_code, 401)
+        self.assertFalse(Asistencia.objects.exists())
+        with override_settings(API_ASISTENCIA_TOKENS=[]):
+            self.assertEqual(self._enviar('sin-tokens', registros).status_code, 401)
+
+    def test_lote_aplica_cambios_y_reporta_por_fila(self):
+        primera, segunda = self.inscripciones[0], self.inscripciones[1]
+        response = self._enviar('tableta-1', [
+            {'inscripcion_id': primera.id, 'presente': False, 'justificada': True},
+            {'inscripcion_id': 999999, 'presente': True},
+        ])
+        self.assertEqual(response.status_code, 200)
+        estados = [(r['inscripcion_id'], r['estado']) for r in response.json()['resultados']]
+        self.assertEqual(estados, [(primera.id, 'guardado'), (999999, 'error')])
+        asistencia = Asistencia.objects.get(inscripcion=primera, fecha=date.today())
+        self.assertFalse(asistencia.presente)
+        self.assertTrue(asistencia.justificacion_aprobada)
+
+        # Campos omitidos conservan el valor guardado; sin cambios no se escribe.
+        response = self._enviar('tableta-2', [
+            {'inscripcion_id': primera.id, 'observaciones': 'Cita médica'},
+            {'inscripcion_id': segunda.id},
+        ])
+        self.assertEqual([r['estado'] for r in response.json()['resultados']], ['guardado', 'guardado'])
+        asistencia.refresh_from_db()
+        self.assertFalse(asistencia.presente)
+        self.assertEqual(asistencia.observaciones, 'Cita médica')
+
+    def test_reintento_con_la_misma_clave_no_vuelve_a_escribir(self):
+        registros = [{'inscripcion_id': self.inscripciones[0].id, 'presente': False}]
+        primera = self._enviar('reintento', registros).json()
+        Asistencia.objects.all().delete()
+        with CaptureQueriesContext(connection) as consultas:
+            segunda = self._enviar('reintento', registros).json()
+        tabla = Asistencia._meta.db_table
+        self.assertFalse([q for q in consultas.captured_queries if f'"{tabla}"' in q['sql']])
+        self.assertTrue(segunda['repetido'])
+        self.assertEqual(segunda['resultados'], primera['resultados'])
+        self.assertFalse(Asistencia.objects.exists())
+        self.assertEqual(LoteAsistencia.objects.count(), 1)
+
+    def test_errores_de_formato_y_conflicto(self):
+        self.assertEqual(self.client.get(self.url).status_code, 405)
+        response = self.client.post(self.url, 'no-json', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self._enviar('', [{'inscripcion_id': 1}]).status_code, 400)
+        self._enviar('clave', [{'inscripcion_id': self.inscripciones[0].id}])
+        otra_fecha = date(2020, 1, 1)
+        self.assertEqual(self._enviar('clave', [{'inscripcion_id': 1}], fecha=otra_fecha).status_code, 409)
+
+
+OPENPYXL_DISPONIBLE = importlib.util.find_spec('openpyxl') is not None
+
+
+class ImportacionTests(TestCase):
+
+    def _csv(self, texto):
+        return io.BytesIO(texto.encode('utf-8'))
+
+    def test_errores_por_fila_y_celdas_sobrantes(self):
+        archivo = self._csv(
+            "nombre_profesor,apellido_profesor,correo_profesor,telefono\n"
+            "Ana,Pérez,ana@prepa.mx,555\n"
+            "Luis,,luis@prepa.mx,555\n"
+            "Eva,Ruiz,eva@prepa.mx,555,sobra\n"
+            "Sol,Díaz,sol@prepa.mx,555,,\n"
+        )
+        resultado = importar_archivo('profesor', archivo)
+        self.assertEqual((resultado.creados, resultado.con_error), (2, 2))
+        self.assertEqual([linea for linea, _ in resultado.errores], [3, 4])
+        self.assertIn('celda', resultado.errores[1][1])
+        self.assertEqual(
+            sorted(Profesor.objects.values_list('correo_profesor', flat=True)), ['ana@prepa.mx', 'sol@prepa.mx']
+        )
+
+    def test_duplicados_en_el_archivo_y_en_la_base(self):
+        curso = crear_curso_con_alumnos(1)
+        existente = Estudiante.objects.get()
+        eliminado = Estudiante.objects.create(
+            nombre_estudiante='Ex', apellido_estudiante='Alumno', matricula='BAJA001',
+            correo_estudiante='ex@prepa.mx', fecha_nacimiento=date(2008, 1, 1),
+        )
+        self.client.post(reverse('borrar_estudiante', args=[eliminado.id]))
+        encabezado = "nombre_estudiante,apellido_estudiante,matricula,correo_estudiante,fecha_nacimiento,cursos\n"
+        filas = [
+            f"Nuevo,Alumno,NUE001,n@prepa.mx,2008-05-01,{curso.codigo}",
+            "Otro,Alumno,NUE001,o@prepa.mx,2008-05-01,",
+            f"Viejo,Alumno,{existente.matricula},v@prepa.mx,01/05/2008,",
+            "Ex,Alumno,BAJA001,ex@prepa.mx,2008-05-01,",
+            "Mal,Fecha,NUE002,m@prepa.mx,mayo,",
+        ]
+        resultado = importar_archivo('estudiante', self._csv(encabezado + "\n".join(filas)), tamano_lote=2)
+        self.assertEqual((resultado.creados, resultado.omitidos, resultado.con_error), (1, 3, 1))
+        nuevo = Estudiante.objects.get(matricula='NUE001')
+        self.assertEqual(nuevo.nombre_estudiante, 'Nuevo')
+        self.assertTrue(Inscripcion.objects.filter(estudiante=nuevo, curso=curso).exists())
+        curso.refresh_from_db()
+        self.assertEqual(curso.inscritos_activos, 2)
+
+    def test_filas_sin_cupo_no_se_importan(self):
+        curso = crear_curso_con_alumnos(1)
+        Curso.objects.filter(pk=curso.pk).update(cupo_maximo=2)
+        encabezado = "nombre_estudiante,apellido_estudiante,matricula,correo_estudiante,fecha_nacimiento,cursos\n"
+        filas = [
+            f"Uno,Alumno,NUE001,u@prepa.mx,2008-05-01,{curso.codigo}",
+            f"Dos,Alumno,NUE002,d@prepa.mx,2008-05-01,{curso.codigo}",
+            "Tres,Alumno,NUE003,t@prepa.mx,2008-05-01,",
+        ]
+        resultado = importar_archivo('estudiante', self._csv(encabezado + "\n".join(filas)))
+        self.assertEqual((resultado.creados, resultado.con_error), (2, 1))
+        self.assertEqual(resultado.errores, [(3, f'Sin cupo disponible en: {curso.codigo}')])
+        self.assertFalse(Estudiante.objects.filter(matricula='NUE002').exists())
+        curso.refresh_from_db()
+        self.assertEqual(curso.inscritos_activos, 2)
+
+    def test_csv_ilegible_es_value_error(self):
+        archivo = self._csv("nombre_profesor,apellido_profesor\n" + 'x' * 200000 + ",Pérez\n")
+        with self.assertRaisesMessage(ValueError, 'CSV'):
+            importar_archivo('profesor', archivo)
+
+        with tempfile.NamedTemporaryFile(suffix='.csv') as temporal:
+            temporal.write(archivo.getvalue())
+            temporal.flush()
+            with self.assertRaisesMessage(CommandError, 'CSV'):
+                call_command('importar_datos', 'profesor', temporal.name)
+
+    def test_vista_reporta_archivo_malformado(self):
+        archivo = SimpleUploadedFile(
+            'cursos.csv', b"nombre_curso,codigo,creditos\nMate,MAT9,4,5,6\n", content_type='text/csv'
+        )
+        response = self.client.post(reverse('importar_datos'), {'modelo': 'curso', 'archivo': archivo})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['resultado'].con_error, 1)
+        self.assertFalse(Curso.objects.exists())
+
+    @skipUnless(OPENPYXL_DISPONIBLE, "Requiere openpyxl")
+    def test_xlsx(self):
+        from openpyxl import Workbook
+        libro = Workbook()
+        hoja = libro.active
+        hoja.append(['nombre_profesor', 'apellido_profesor', 'correo_profesor'])
+        hoja.append(['Ana', 'Pérez', 'ana@prepa.mx'])
+        hoja.append(['Eva', 'Ruiz', 'eva@prepa.mx', 'sobra'])
+        archivo = io.BytesIO()
+        libro.save(archivo)
+        archivo.seek(0)
+        resultado = importar_archivo('profesor', archivo, 'xlsx')
+        self.assertEqual((resultado.creados, resultado.con_error), (1, 1))
+
+    @skipUnless(OPENPYXL_DISPONIBLE, "Requiere openpyxl")
+    def test_xlsx_que_no_es_zip(self):
+        with self.assertRaisesMessage(ValueError, 'XLSX'):
+            importar_archivo('profesor', io.BytesIO(b'nombre_profesor\nAna\n'), 'xlsx')
+
+    @skipUnless(not OPENPYXL_DISPONIBLE, "openpyxl está instalado")
+    def test_xlsx_sin_openpyxl(self):
+        with self.assertRaisesMessage(ValueError, 'openpyxl'):
+            importar_archivo('profesor', io.BytesIO(b''), 'xlsx')
+
+
+class CapturaCalificacionesTests(TestCase):
+
+    def setUp(self):
+        self.curso = crear_curso_con_alumnos(3)
+        self.inscripciones = list(Inscripcion.objects.filter(curso=self.curso).order_by('id'))
+        self.url = reverse('capturar_calificaciones', args=[self.curso.id])
+
+    def test_captura_del_grupo_en_un_solo_envio(self):
+        datos = {'tipo_evaluacion': 'PARCIAL_2', 'porcentaje_peso': '30', 'profesor_asignador': self.curso.profesor_id}
+        datos.update({f'puntaje_{i.id}': '9.5' for i in self.inscripciones[:2]})
+        response = self.client.post(self.url, datos)
+        self.assertRedirects(response, reverse('ver_calificaciones_por_curso', args=[self.curso.id]))
+
+        nuevas = Calificacion.objects.filter(tipo_evaluacion='PARCIAL_2')
+        self.assertEqual(nuevas.count(), 2)
+        self.assertEqual(set(nuevas.values_list('porcentaje_peso', 'profesor_asignador_id')),
+                         {(30, self.curso.profesor_id)})
+        # bulk_create no envía señales: el resumen se recalcula para el lote
+        self.assertEqual(self.inscripciones[0].resumen.conteo, 3)
+
+    def test_un_puntaje_invalido_no_guarda_ninguno(self):
+        datos = {'tipo_evaluacion': 'PARCIAL_2', 'porcentaje_peso': '30',
+                 f'puntaje_{self.inscripciones[0].id}': '9',
+                 f'puntaje_{self.inscripciones[1].id}': '1000.123'}
+        response = self.client.post(self.url, datos)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Calificacion.objects.filter(tipo_evaluacion='PARCIAL_2').exists())
+        errores = [i.error_puntaje for i in response.context['inscripciones'] if i.error_puntaje]
+        self.assertEqual(len(errores), 1)
+
+
+class FragmentosCacheadosTests(TestCase):
+
+    def setUp(self):
+        # Las versiones solo cambian al confirmar, y TestCase nunca confirma
+        cache.clear()
+
+    def test_tabla_de_cursos_se_sirve_de_cache_hasta_que_cambia_el_modelo(self):
+        curso = crear_curso_con_alumnos(1)
+        url = reverse('ver_curso')
+        self.client.get(url)
+        # Con el fragmento en caché no se consulta la base de datos.
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertContains(response, 'MAT101')
+
+        curso.codigo = 'MAT999'
+        with self.captureOnCommitCallbacks(execute=True):
+            curso.save()
+        response = self.client.get(url)
+        self.assertContains(response, 'MAT999')
+        self.assertNotContains(response, 'MAT101')
+
+        # La tabla muestra al profesor: también depende de su versión.
+        profesor = curso.profesor
+        profesor.apellido_profesor = 'Gómez'
+        with self.captureOnCommitCallbacks(execute=True):
+            profesor.save()
+        self.assertContains(self.client.get(url), 'Gómez')
+
+    def test_listas_de_seleccion_se_invalidan_al_confirmar(self):
+        curso = crear_curso_con_alumnos(1)
+        self.assertEqual(opciones_cursos(), [(curso.pk, 'Matemáticas (MAT101)')])
+        self.assertEqual(len(opciones_estudiantes()), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            curso.nombre_curso = 'Álgebra'
+            curso.save()
+            # Antes de confirmar, la lista cacheada sigue vigente
+            self.assertEqual(opciones_cursos(), [(curso.pk, 'Matemáticas (MAT101)')])
+        self.assertEqual(opciones_cursos(), [(curso.pk, 'Álgebra (MAT101)')])
+
+        # Escrituras masivas (sin señales): invalidar_listas() las refleja
+        Estudiante.objects.update(apellido_estudiante='Nuevo')
+        with self.captureOnCommitCallbacks(execute=True):
+            invalidar_listas()
+        self.assertIn('Nuevo', opciones_estudiantes()[0][1])
+
+
+class PerfilBaseDatosTests(TransactionTestCase):
+    """Se ejecuta contra el perfil activo (DB_PERFIL=sqlite o DB_PERFIL=postgresql)."""
+
+    @skipUnless(connection.vendor == 'sqlite', "Solo aplica al perfil SQLite")
+    def test_pragmas_de_sqlite_aplicados(self):
+        pragmas = pragmas_actuales(connection)
+        self.assertEqual(pragmas['journal_mode'], 'wal')
+        self.assertEqual(pragmas['synchronous'], 1)  # NORMAL
+        self.assertGreater(pragmas['busy_timeout'], 0)
+
+    def test_pase_de_lista_concurrente(self):
+        """Varias tabletas guardan asistencia a la vez mientras otros usuarios leen."""
+        cursos = [crear_curso_con_alumnos(10, codigo=f'C{n}N001') for n in range(4)]
+        fechas = [date.today() - timedelta(days=d) for d in range(2)]
+
+        def pasar_lista(curso, fecha):
+            try:
+                datos = {'fecha_registro': str(fecha)}
+                for inscripcion_id in Inscripcion.objects.filter(curso=curso).values_list('id', flat=True):
+                    datos[f'presente_{inscripcion_id}'] = 'on'
+                return Client().post(reverse('gestionar_asistencia', args=[curso.id]), datos).status_code
+            finally:
+                connection.close()
+
+        def leer(curso):
+            try:
+                return Client().get(reverse('gestionar_asistencia', args=[curso.id])).status_code
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            escrituras = [pool.submit(pasar_lista, c, f) for c in cursos for f in fechas]
+            lecturas = [pool.submit(leer, c) for c in cursos]
+            estados_escritura = [f.result() for f in escrituras]
+            estados_lectura = [f.result() for f in lecturas]
+
+        self.assertEqual(estados_escritura, [302] * len(escrituras))
+        self.assertEqual(estados_lectura, [200] * len(lecturas))
+        self.assertEqual(Asistencia.objects.count(), 4 * 10 * len(fechas))
+        self.assertEqual(Asistencia.objects.filter(presente=True).count(), 4 * 10 * len(fechas))
+
+
+class HistorialAsistenciaTests(TestCase):
+
+    def setUp(self):
+        curso = crear_curso_con_alumnos(1)
+        self.inscripcion = Inscripcion.objects.get(curso=curso)
+        hoy = date.today()
+        # 120 días: uno de cada cuatro ausente, y la mitad de esas ausencias justificadas
+        Asistencia.objects.bulk_create([
+            Asistencia(
+                inscripcion=self.inscripcion, fecha=hoy - timedelta(days=d),
+                presente=d % 4 != 0, justificacion_aprobada=d % 8 == 0,
+            )
+            for d in range(120)
+        ])
+        self.url = reverse('ver_historial_asistencia_estudiante', args=[self.inscripcion.id])
+
+    def test_primer_bloque_y_totales_del_rango(self):
+        # inscripción + bloque + totales (agregación condicional)
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.context['historial']), TAMANO_BLOQUE_HISTORIAL)
+        self.assertEqual(response.context['historial'][0].fecha, date.today())
+        resumen = response.context['resumen']
+        self.assertEqual((resumen['total'], resumen['presentes'], resumen['ausentes'], resumen['justificadas']),
+                         (120, 90, 30, 15))
+
+        desde = date.today() - timedelta(days=9)
+        response = self.client.get(self.url, {'desde': str(desde)})
+        self.assertEqual(response.context['resumen']['total'], 10)
+        self.assertIsNone(response.context['siguiente'])
+
+    def test_cargar_mas_recorre_todo_sin_repetir(self):
+        fechas = []
+        cursor = ''
+        while True:
+            response = self.client.get(self.url, {'fragmento': 1, 'cursor': cursor})
+            fechas.extend(r.fecha for r in response.context['historial'])
+            cursor = response['X-Siguiente-Cursor']
+            if not cursor:
+                break
+        self.assertEqual(len(fechas), 120)
+        self.assertEqual(len(set(fechas)), 120)
+        self.assertEqual(fechas, sorted(fechas, reverse=True))
+
+    def test_cursor_alterado_empieza_desde_el_principio(self):
+        for valor in (20240101, None, ['2024-01-01'], 'ayer'):
+            response = self.client.get(self.url, {'fragmento': 1, 'cursor': codificar_cursor(valor, 1, 'sig')})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.context['historial'][0].fecha, date.today())
+
+
+class ColaBoletasTests(TransactionTestCase):
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        configuracion = override_settings(BOLETAS_DIR=directorio.name)
+        configuracion.enable()
+        self.addCleanup(configuracion.disable)
+        self.curso = crear_curso_con_alumnos(5)
+        self.periodo = Inscripcion.objects.filter(curso=self.curso).first().periodo_academico
+
+    def test_lotes_sin_repetir_y_contadores(self):
+        trabajo = crear_trabajo(self.periodo, 'html')
+        self.assertEqual(trabajo.total, 5)
+
+        primero = tomar_lote(trabajo, 'w1', tamano=3)
+        segundo = tomar_lote(trabajo, 'w2', tamano=3)
+        self.assertEqual((len(primero), len(segundo)), (3, 2))
+        self.assertFalse(set(primero) & set(segundo))
+
+        self.assertEqual(procesar_lote(trabajo.pk, primero, 'w1'), (3, 0))
+        self.assertFalse(cerrar_trabajo_si_termino(trabajo.pk))
+        procesar_lote(trabajo.pk, segundo, 'w2')
+        self.assertTrue(cerrar_trabajo_si_termino(trabajo.pk))
+
+        trabajo.refresh_from_db()
+        self.assertEqual((trabajo.estado, trabajo.procesadas, trabajo.porcentaje), ('TERMINADO', 5, 100))
+        tarea = TareaBoleta.objects.select_related('estudiante').first()
+        with open(tarea.archivo, encoding='utf-8') as archivo:
+            contenido = archivo.read()
+        self.assertIn(tarea.estudiante.matricula, contenido)
+        # (8 * 25 + 10 * 75) / 100
+        self.assertIn('9.50', contenido)
+
+        estado = self.client.get(reverse('estado_trabajo_boletas', args=[trabajo.id]), {'formato': 'json'})
+        self.assertEqual(estado.json()['procesadas'], 5)
+        descarga = self.client.get(reverse('descargar_boleta', args=[trabajo.id, tarea.estudiante.matricula]))
+        self.assertEqual(descarga.status_code, 200)
+        descarga.close()
+
+    def test_lote_liberado_y_retomado_se_cuenta_una_sola_vez(self):
+        trabajo = crear_trabajo(self.periodo, 'html')
+        lento = tomar_lote(trabajo, 'lento', tamano=5)
+        TareaBoleta.objects.update(fecha_tomada=timezone.now() - timedelta(hours=1))
+        self.assertEqual(liberar_tareas_colgadas(), 5)
+        rapido = tomar_lote(trabajo, 'rapido', tamano=5)
+        self.assertEqual(sorted(rapido), sorted(lento))
+
+        self.assertEqual(procesar_lote(trabajo.pk, rapido, 'rapido'), (5, 0))
+        # El worker lento termina después: ya no registra nada
+        self.assertEqual(procesar_lote(trabajo.pk, lento, 'lento'), (0, 0))
+        trabajo.refresh_from_db()
+        self.assertEqual((trabajo.procesadas, trabajo.con_error), (5, 0))
+
+    def test_estudiante_eliminado_despues_de_encolar(self):
+        trabajo = crear_trabajo(self.periodo, 'html')
+        eliminado = TareaBoleta.objects.filter(trabajo=trabajo).first().estudiante
+        self.client.post(reverse('borrar_estudiante', args=[eliminado.id]))
+
+        self.assertEqual(procesar_lote(trabajo.pk, tomar_lote(trabajo, 'w1', tamano=5), 'w1'), (5, 0))
+        self.assertTrue(cerrar_trabajo_si_termino(trabajo.pk))
+
+    def test_worker_retoma_lotes_colgados(self):
+        trabajo = crear_trabajo(self.periodo, 'html')
+        tomar_lote(trabajo, 'caido', tamano=2)
+        TareaBoleta.objects.filter(trabajador='caido').update(fecha_tomada=timezone.now() - timedelta(hours=1))
+        self.assertEqual(ejecutar_worker(procesos=1, tamano_lote=2, una_vez=True), 5)
+        trabajo.refresh_from_db()
+        self.assertEqual((trabajo.estado, trabajo.procesadas), ('TERMINADO', 5))
+
+    def test_worker_con_pool_de_procesos(self):
+        trabajo = crear_trabajo(self.periodo, 'html')
+        self.assertEqual(ejecutar_worker(procesos=2, tamano_lote=2, una_vez=True), 5)
+        trabajo.refresh_from_db()
+        self.assertEqual((trabajo.estado, trabajo.procesadas, trabajo.con_error), ('TERMINADO', 5, 0))
+        self.assertFalse(TareaBoleta.objects.exclude(estado='LISTA').exists())
+
+
+class CupoCursoTests(TransactionTestCase):
+
+    def _estudiantes(self, cantidad, prefijo='NUE'):
+        return [
+            Estudiante.objects.create(
+                nombre_estudiante=f'Nuevo{i}', apellido_estudiante='Cupo', matricula=f'{prefijo}{i:05d}',
+                correo_estudiante=f'n{i}@prepa.mx', fecha_nacimiento=date(2008, 1, 1),
+            )
+            for i in range(cantidad)
+        ]
+
+    def test_contador_sigue_altas_bajas_y_borrados(self):
+        curso = crear_curso_con_alumnos(3)
+        curso.refresh_from_db()
+        self.assertEqual(curso.inscritos_activos, 3)
+
+        inscripcion = Inscripcion.objects.filter(curso=curso).first()
+        self.client.post(reverse('finalizar_inscripcion', args=[inscripcion.id]))
+        inscripcion.estudiante.delete()  # Ya inactiva: no descuenta otra vez
+        Inscripcion.objects.filter(curso=curso).first().estudiante.delete()
+        nuevo = self._estudiantes(1)[0]
+        nuevo.cursos.add(curso)
+        curso.refresh_from_db()
+        self.assertEqual(curso.inscritos_activos, 2)
+
+        Curso.objects.filter(pk=curso.pk).update(inscritos_activos=40)
+        self.assertEqual(reconciliar_inscritos(), {curso.pk: (40, 2)})
+        curso.refresh_from_db()
+        self.assertEqual(curso.inscritos_activos, 2)
+
+    def test_inscripciones_simultaneas_no_rebasan_el_cupo(self):
+        curso = crear_curso_con_alumnos(0)
+        Curso.objects.filter(pk=curso.pk).update(cupo_maximo=5)
+        estudiantes = self._estudiantes(12)
+
+        def inscribir(estudiante):
+            try:
+                return Client().post(reverse('agregar_inscripcion'), {
+                    'estudiante_id': estudiante.id, 'cursos': [curso.id], 'periodo_academico': '2025-2',
+                }).status_code
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            estados = list(pool.map(inscribir, estudiantes))
+
+        self.assertEqual(estados, [302] * len(estudiantes))
+        curso.refresh_from_db()
+        self.assertEqual(Inscripcion.objects.filter(curso=curso, esta_activo=True).count(), 5)
+        self.assertEqual(curso.inscritos_activos, 5)
+        self.assertEqual(curso.lugares_disponibles, 0)
+
+    def test_el_cupo_cuenta_todos_los_periodos_hasta_cerrar_el_anterior(self):
+        curso = crear_curso_con_alumnos(1)
+        Curso.objects.filter(pk=curso.pk).update(cupo_maximo=1)
+        nuevo = self._estudiantes(1)[0]
+
+        resultado = inscribir_en_cursos(nuevo, [curso.pk], '2026-1')
+        self.assertEqual(resultado.sin_cupo, [curso])
+        self.assertEqual(cerrar_periodo('2025-2'), 1)
+        curso.refresh_from_db()
+        self.assertEqual(curso.inscritos_activos, 0)
+
+        resultado = inscribir_en_cursos(nuevo, [curso.pk], '2026-1')
+        self.assertEqual(resultado.creadas, [curso])
+        self.assertEqual(reconciliar_inscritos(), {})
+
+    def test_cupo_maximo_capturado(self):
+        profesor = Profesor.objects.create(
+            nombre_profesor='Sara', apellido_profesor='Lugo', correo_profesor='sara@prepa.mx', telefono='555'
+        )
+        datos = {
+            'nombre_curso': 'Física', 'codigo': 'FIS101', 'descripcion': '', 'creditos': 4,
+            'horario': 'Lunes 8-10', 'aula': 'F1', 'profesor': profesor.id,
+        }
+        for invalido in ('cero', '0', '-3', '2.5'):
+            respuesta = self.client.post(reverse('agregar_curso'), {**datos, 'cupo_maximo': invalido})
+            self.assertRedirects(respuesta, reverse('agregar_curso'))
+        self.assertFalse(Curso.objects.filter(codigo='FIS101').exists())
+
+        self.client.post(reverse('agregar_curso'), {**datos, 'cupo_maximo': ' 30 '})
+        curso = Curso.objects.get(codigo='FIS101')
+        self.assertEqual(curso.cupo_maximo, 30)
+
+        url = reverse('realizar_actualizacion_curso', args=[curso.id])
+        respuesta = self.client.post(url, {**datos, 'cupo_maximo': 'treinta'})
+        self.assertRedirects(respuesta, reverse('actualizar_curso', args=[curso.id]))
+        curso.refresh_from_db()
+        self.assertEqual(curso.cupo_maximo, 30)
+        self.client.post(url, {**datos, 'cupo_maximo': ''})
+        curso.refresh_from_db()
+        self.assertIsNone(curso.cupo_maximo)
+
+
+class SincronizacionInscripcionesTests(TestCase):
+
+    def setUp(self):
+        self.curso_a = crear_curso_con_alumnos(1, codigo='SYA001')
+        self.curso_b = crear_curso_con_alumnos(0, codigo='SYB001')
+        self.estudiante = Inscripcion.objects.get(curso=self.curso_a).estudiante
+        self.estudiante.cursos.add(self.curso_b)
+        # Inscripción de otro periodo: la sincronización no debe tocarla
+        Inscripcion.objects.create(estudiante=self.estudiante, curso=self.curso_b, periodo_academico='2024-1')
+        self.url = reverse('realizar_actualizacion_estudiante', args=[self.estudiante.id])
+
+    def _datos(self, cursos, **cambios):
+        datos = {
+            'nombre_estudiante': 'Renombrado', 'apellido_estudiante': 'Prueba', 'matricula': self.estudiante.matricula,
+            'correo_estudiante': 'r@prepa.mx', 'fecha_nacimiento': '2008-01-01', 'periodo_academico': '2025-2',
+            'cursos': [c.id for c in cursos],
+        }
+        datos.update(cambios)
+        return datos
+
+    def test_editar_nombre_no_escribe_inscripciones(self):
+        with CaptureQueriesContext(connection) as consultas:
+            self.client.post(self.url, self._datos([self.curso_a, self.curso_b]))
+        escrituras = [
+            q['sql'] for q in consultas.captured_queries
+            if '"app_Preparatoria_inscripcion"' in q['sql'] and not q['sql'].startswith('SELECT')
+        ]
+        self.assertEqual(escrituras, [])
+        self.assertEqual(Inscripcion.objects.filter(estudiante=self.estudiante, esta_activo=True).count(), 3)
+
+    def test_quitar_curso_da_de_baja_sin_borrar_historial(self):
+        self.client.post(self.url, self._datos([self.curso_b]))
+        inscripcion = Inscripcion.objects.get(estudiante=self.estudiante, curso=self.curso_a)
+        self.assertFalse(inscripcion.esta_activo)
+        self.assertEqual(inscripcion.fecha_finalizacion, date.today())
+        self.assertEqual(Calificacion.objects.filter(inscripcion=inscripcion).count(), 2)
+        self.assertTrue(Inscripcion.objects.get(curso=self.curso_b, periodo_academico='2024-1').esta_activo)
+        self.curso_a.refresh_from_db()
+        self.assertEqual(self.curso_a.inscritos_activos, 0)
+
+        # Volver a elegirlo reactiva la misma fila
+        self.client.post(self.url, self._datos([self.curso_a, self.curso_b]))
+        inscripcion.refresh_from_db()
+        self.assertTrue(inscripcion.esta_activo)
+        self.assertIsNone(inscripcion.fecha_finalizacion)
+        self.curso_a.refresh_from_db()
+        self.assertEqual(self.curso_a.inscritos_activos, 1)
+
+
+class HorarioCursoTests(TestCase):
+
+    def setUp(self):
+        self.profesor = Profesor.objects.create(
+            nombre_profesor='Luis', apellido_profesor='Mora', correo_profesor='luis@prepa.mx', telefono='555'
+        )
+        self.otro_profesor = Profesor.objects.create(
+            nombre_profesor='Eva', apellido_profesor='Ruiz', correo_profesor='eva@prepa.mx', telefono='555'
+        )
+
+    def _agregar(self, codigo, horario, aula, profesor):
+        return self.client.post(reverse('agregar_curso'), {
+            'nombre_curso': codigo, 'codigo': codigo, 'descripcion': '', 'creditos': 4,
+            'horario': horario, 'aula': aula, 'profesor': profesor.id,
+        })
+
+    def test_interpretar_horario(self):
+        self.assertEqual(
+            [(d, f'{i:%H:%M}', f'{f:%H:%M}') for d, i, f in interpretar_horario('Lunes y Miércoles 8:30 a 10; Vie 12-14')],
+            [(0, '08:30', '10:00'), (2, '08:30', '10:00'), (4, '12:00', '14:00')],
+        )
+        self.assertEqual(len(interpretar_horario('Lunes a Viernes 07:00-08:00')), 5)
+        for invalido in ('Por definir', 'Martes', 'Lunes 10-8'):
+            with self.assertRaises(HorarioInvalido):
+                interpretar_horario(invalido)
+
+    def test_formatos_de_los_horarios_capturados(self):
+        def dias(texto):
+            return sorted({d for d, _, _ in interpretar_horario(texto)})
+        self.assertEqual(dias('L a V 9:30-11:00'), [0, 1, 2, 3, 4])
+        self.assertEqual(dias('L a Mi 8:30-10:00'), [0, 1, 2])
+        self.assertEqual(dias('Lun-Vie 8-10'), [0, 1, 2, 3, 4])
+        self.assertEqual(dias('M y J 7-9'), [1, 3])
+        self.assertEqual(
+            [(d, f'{i:%H:%M}') for d, i, _ in interpretar_horario('Lunes 8-10 y 12-14')],
+            [(0, '08:00'), (0, '12:00')],
+        )
+
+    def test_editar_curso_con_horario_guardado_no_interpretable(self):
+        curso = Curso.objects.create(
+            nombre_curso='Arte', codigo='ART001', descripcion='', creditos=2,
+            horario='Por definir', aula='A1', profesor=self.profesor,
+        )
+        datos = {
+            'nombre_curso': 'Arte II', 'codigo': 'ART001', 'descripcion': '', 'creditos': 2,
+            'horario': 'Por definir', 'aula': 'A1', 'profesor': self.profesor.id,
+        }
+        respuesta = self.client.post(reverse('realizar_actualizacion_curso', args=[curso.id]), datos)
+        self.assertRedirects(respuesta, reverse('ver_curso'))
+        curso.refresh_from_db()
+        self.assertEqual(curso.nombre_curso, 'Arte II')
+        self.assertFalse(curso.sesiones.exists())
+
+        # Cambiar el horario por otro texto inválido sí se rechaza
+        datos['horario'] = 'Cuando se pueda'
+        respuesta = self.client.post(reverse('realizar_actualizacion_curso', args=[curso.id]), datos)
+        self.assertRedirects(respuesta, reverse('actualizar_curso', args=[curso.id]))
+        curso.refresh_from_db()
+        self.assertEqual(curso.horario, 'Por definir')
+
+        datos['horario'] = 'L a V 9:30-11:00'
+        self.client.post(reverse('realizar_actualizacion_curso', args=[curso.id]), datos)
+        self.assertEqual(curso.sesiones.count(), 5)
+
+    def test_choques_de_aula_y_profesor_al_guardar(self):
+        self._agregar('HOR001', 'Lunes 08:00-10:00', 'A1', self.profesor)
+        self.assertEqual(SesionCurso.objects.count(), 1)
+
+        # Misma aula, traslape de una hora
+        respuesta = self._agregar('HOR002', 'Lunes 09:00-11:00', 'A1', self.otro_profesor)
+        self.assertRedirects(respuesta, reverse('agregar_curso'))
+        # Mismo profesor en otra aula
+        self._agregar('HOR003', 'Lunes 9-10', 'B2', self.profesor)
+        self.assertFalse(Curso.objects.filter(codigo__in=['HOR002', 'HOR003']).exists())
+
+        # Empieza justo cuando termina la otra sesión: no hay choque
+        self._agregar('HOR004', 'Lunes 10-12', 'A1', self.otro_profesor)
+        curso = Curso.objects.get(codigo='HOR004')
+        self.assertEqual(curso.sesiones.count(), 1)
+
+        # Al editar, el curso no choca consigo mismo
+        self.client.post(reverse('realizar_actualizacion_curso', args=[curso.id]), {
+            'nombre_curso': 'HOR004', 'codigo': 'HOR004', 'descripcion': '', 'creditos': 4,
+            'horario': 'Lunes 10:30-12:30', 'aula': 'A1', 'profesor': self.otro_profesor.id,
+        })
+        curso.refresh_from_db()
+        self.assertEqual(curso.horario, 'Lunes 10:30-12:30')
+
+    def test_reporte_de_barrido_igual_a_comparar_todos_contra_todos(self):
+        cursos = [
+            Curso.objects.create(
+                nombre_curso=f'C{i}', codigo=f'BAR{i:03d}', descripcion='', creditos=3, horario='', aula='',
+                profesor=(self.profesor, self.otro_profesor)[i % 2],
+            )
+            for i in range(12)
+        ]
+        SesionCurso.objects.bulk_create([
+            SesionCurso(
+                curso=curso, dia_semana=(i * 5 + k) % 3, aula=f'A{(i + k) % 3}',
+                hora_inicio=f'{7 + (i * 3 + k) % 8:02d}:00', hora_fin=f'{9 + (i * 3 + k) % 8:02d}:30',
+            )
+            for i, curso in enumerate(cursos)
+            for k in range(3)
+        ])
+        sesiones = list(SesionCurso.objects.select_related('curso'))
+        esperados = set()
+        for i, a in enumerate(sesiones):
+            for b in sesiones[i + 1:]:
+                if a.curso_id == b.curso_id or a.dia_semana != b.dia_semana:
+                    continue
+                if a.hora_inicio < b.hora_fin and b.hora_inicio < a.hora_fin:
+                    par = tuple(sorted((a.curso.codigo, b.curso.codigo)))
+                    if a.aula == b.aula:
+                        esperados.add(('aula', a.dia_semana) + par)
+                    if a.curso.profesor_id == b.curso.profesor_id:
+                        esperados.add(('profesor', a.dia_semana) + par)
+
+        dias = {nombre: valor for valor, nombre in SesionCurso._meta.get_field('dia_semana').choices}
+        with self.assertNumQueries(1):
+            reporte = reporte_conflictos()
+        obtenidos = {
+            (c['tipo'], dias[c['dia']]) + tuple(sorted((c['curso_a'], c['curso_b']))) for c in reporte
+        }
+        self.assertTrue(esperados)
+        self.assertEqual(obtenidos, esperados)
+
+
+class BorradoLogicoTests(TestCase):
+
+    def setUp(self):
+        self.curso = crear_curso_con_alumnos(3)
+        Asistencia.objects.bulk_create([
+            Asistencia(inscripcion=inscripcion, fecha=date.today() - timedelta(days=d), presente=d % 2 == 0)
+            for inscripcion in Inscripcion.objects.filter(curso=self.curso)
+            for d in range(4)
+        ])
+        reconstruir_todo()
+
+    def _filas_diarias(self):
+        return sorted(AsistenciaDiariaCurso.objects.values_list('curso_id', 'fecha', 'total', 'presentes'))
+
+    def test_borrar_estudiante_y_purgar_por_lotes(self):
+        estudiante = Inscripcion.objects.filter(curso=self.curso).first().estudiante
+        self.client.post(reverse('borrar_estudiante', args=[estudiante.id]))
+
+        self.assertFalse(Estudiante.objects.filter(pk=estudiante.pk).exists())
+        self.assertTrue(Estudiante.todos.filter(pk=estudiante.pk).exists())
+        self.assertFalse(Inscripcion.objects.get(estudiante=estudiante).esta_activo)
+        self.assertEqual(Calificacion.objects.filter(inscripcion__estudiante=estudiante).count(), 2)
+        self.curso.refresh_from_db()
+        self.assertEqual(self.curso.inscritos_activos, 2)
+        self.assertEqual(self.client.get(reverse('ver_detalle_estudiante', args=[estudiante.id])).status_code, 404)
+
+        borradas = purgar_eliminados(tamano=1)
+        self.assertEqual(borradas['app_Preparatoria_calificacion'], 2)
+        self.assertEqual(borradas['app_Preparatoria_asistencia'], 4)
+        self.assertFalse(Estudiante.todos.filter(pk=estudiante.pk).exists())
+        self.assertEqual(Asistencia.objects.count(), 8)
+        # Los acumulados diarios del curso ya no cuentan al estudiante purgado
+        incrementales = self._filas_diarias()
+        reconstruir_todo()
+        self.assertEqual(incrementales, self._filas_diarias())
+
+    def test_inscripciones_de_un_curso_eliminado_no_se_listan_ni_reactivan(self):
+        inscripcion = Inscripcion.objects.filter(curso=self.curso).first()
+        self.client.post(reverse('borrar_curso', args=[self.curso.id]))
+
+        response = self.client.get(reverse('ver_inscripciones'), {'activo': '0'})
+        self.assertEqual(list(response.context['inscripciones']), [])
+        response = self.client.post(
+            reverse('realizar_actualizacion_inscripcion', args=[inscripcion.id]),
+            {'periodo_academico': inscripcion.periodo_academico, 'esta_activo': 'on'},
+        )
+        self.assertEqual(response.status_code, 404)
+        inscripcion.refresh_from_db()
+        self.assertFalse(inscripcion.esta_activo)
+
+        response = self.client.get(reverse('exportar_calificaciones'), {'periodo': inscripcion.periodo_academico})
+        lineas = b''.join(response.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertEqual(len(lineas), 1)  # solo el encabezado
+
+    def test_borrar_profesor_elimina_sus_cursos(self):
+        self.client.post(reverse('borrar_profesor', args=[self.curso.profesor_id]))
+        self.assertFalse(Curso.objects.exists())
+        self.assertFalse(Inscripcion.objects.filter(esta_activo=True).exists())
+
+        purgar_eliminados(tamano=2)
+        self.assertFalse(Curso.todos.exists())
+        self.assertFalse(Profesor.todos.exists())
+        self.assertFalse(Inscripcion.objects.exists())
+        self.assertFalse(Calificacion.objects.exists())
+        self.assertFalse(AsistenciaDiariaCurso.objects.exists())
+        self.assertEqual(Estudiante.objects.count(), 3)
+
+    def test_claves_de_registros_eliminados_no_se_reutilizan_hasta_purgar(self):
+        estudiante = Inscripcion.objects.filter(curso=self.curso).first().estudiante
+        self.client.post(reverse('borrar_estudiante', args=[estudiante.id]))
+        self.client.post(reverse('borrar_curso', args=[self.curso.id]))
+
+        respuesta = self.client.post(reverse('agregar_estudiante'), {
+            'nombre_estudiante': 'Otro', 'apellido_estudiante': 'Alumno', 'matricula': estudiante.matricula,
+            'correo_estudiante': 'otro@prepa.mx', 'fecha_nacimiento': '2008-01-01',
+        })
+        self.assertRedirects(respuesta, reverse('agregar_estudiante'))
+        self.assertIn('purgar_eliminados', str(list(get_messages(respuesta.wsgi_request))[0]))
+        respuesta = self.client.post(reverse('agregar_curso'), {
+            'nombre_curso': 'Otra', 'codigo': self.curso.codigo, 'descripcion': '', 'creditos': 3,
+            'horario': '', 'aula': 'B1', 'profesor': self.curso.profesor_id,
+        })
+        self.assertRedirects(respuesta, reverse('agregar_curso'))
+        self.assertEqual(Estudiante.todos.filter(matricula=estudiante.matricula).count(), 1)
+        self.assertEqual(Curso.todos.filter(codigo=self.curso.codigo).count(), 1)
+
+        purgar_eliminados()
+        respuesta = self.client.post(reverse('agregar_estudiante'), {
+            'nombre_estudiante': 'Otro', 'apellido_estudiante': 'Alumno', 'matricula': estudiante.matricula,
+            'correo_estudiante': 'otro@prepa.mx', 'fecha_nacimiento': '2008-01-01',
+        })
+        self.assertRedirects(respuesta, reverse('ver_estudiante'), fetch_redirect_response=False)
+        self.assertTrue(Estudiante.objects.filter(matricula=estudiante.matricula).exists())
+
+
+class KardexTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        # 3 estudiantes con final 9.5 en un curso de 5 créditos (periodo 2025-2)
+        self.curso = crear_curso_con_alumnos(3)
+        self.estudiante = Estudiante.objects.order_by('pk').first()
+        otro = Curso.objects.create(
+            nombre_curso='Historia', codigo='HIS101', descripcion='', creditos=3,
+            horario='Martes 8-10', aula='A2', profesor=self.curso.profesor
+        )
+        self.inscripcion = Inscripcion.objects.create(estudiante=self.estudiante, curso=otro, periodo_academico='2026-1')
+        Calificacion.objects.create(
+            inscripcion=self.inscripcion, tipo_evaluacion='FINAL', puntaje=Decimal('6'), porcentaje_peso=100
+        )
+
+    def test_promedio_ponderado_por_creditos(self):
+        kardex = calcular_kardex(self.estudiante.pk)
+        self.assertEqual([p['periodo'] for p in kardex['periodos']], ['2025-2', '2026-1'])
+        self.assertEqual(kardex['periodos'][0]['cursos'][0]['final'], Decimal('9.50'))
+        self.assertEqual(kardex['periodos'][1]['promedio'], Decimal('6.00'))
+        # (9.5 * 5 + 6 * 3) / 8
+        self.assertEqual(kardex['promedio'], Decimal('8.19'))
+        self.assertEqual(kardex['creditos'], 8)
+
+    def test_cache_se_invalida_al_cambiar_una_calificacion(self):
+        kardex_estudiante(self.estudiante.pk)
+        with self.assertNumQueries(0):
+            kardex_estudiante(self.estudiante.pk)
+
+        calificacion = Calificacion.objects.get(inscripcion=self.inscripcion)
+        calificacion.puntaje = Decimal('10')
+        with self.captureOnCommitCallbacks(execute=True):
+            calificacion.save()
+        # (9.5 * 5 + 10 * 3) / 8
+        self.assertEqual(kardex_estudiante(self.estudiante.pk)['promedio'], Decimal('9.69'))
+
+    def test_cohorte_en_una_consulta_coincide_con_el_kardex(self):
+        with self.assertNumQueries(1):
+            promedios = promedios_cohorte()
+        self.assertEqual(len(promedios), 3)
+        for estudiante_id, datos in promedios.items():
+            kardex = calcular_kardex(estudiante_id)
+            self.assertEqual(datos['promedio'], kardex['promedio'])
+            self.assertEqual(datos['creditos'], kardex['creditos'])
+        self.assertEqual(promedios[self.estudiante.pk]['periodos']['2026-1'], (3, Decimal('6.00')))
+        self.assertEqual(promedios_cohorte(periodo='2026-1')[self.estudiante.pk]['promedio'], Decimal('6.00'))
+
+    def test_vista_kardex(self):
+        response = self.client.get(reverse('ver_kardex_estudiante', args=[self.estudiante.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'HIS101')
+        self.assertContains(response, '8.19')
+
+
+@skipUnless(numpy_disponible(), "Requiere numpy")
+class EstadisticasCalificacionesTests(TestCase):
+
+    def setUp(self):
+        self.curso = crear_curso_con_alumnos(4)
+        # Finales: (8 * 25 + final * 75) / 100 -> 9.5, 6.5, 6.5, 3.5
+        self.inscripciones = list(Inscripcion.objects.filter(curso=self.curso).order_by('pk'))
+        for inscripcion, puntaje in zip(self.inscripciones, (10, 6, 6, 2)):
+            Calificacion.objects.filter(inscripcion=inscripcion, tipo_evaluacion='FINAL').update(puntaje=puntaje)
+        # update() no envía señales: la página lee los promedios del resumen
+        recalcular_resumenes([i.pk for i in self.inscripciones])
+
+    def test_curso_en_una_consulta(self):
+        with self.assertNumQueries(1):
+            resultado = estadisticas_curso(self.curso.pk)
+        distribucion = resultado['distribucion']
+        self.assertEqual(distribucion['n'], 4)
+        self.assertEqual(distribucion['media'], 6.5)
+        self.assertEqual(distribucion['mediana'], 6.5)
+        self.assertEqual(distribucion['desviacion'], 2.12)
+        self.assertEqual(sum(clase['conteo'] for clase in distribucion['histograma']), 4)
+
+        por_inscripcion = {fila['inscripcion_id']: fila for fila in resultado['clasificacion']}
+        primera, segunda, tercera, ultima = (por_inscripcion[i.pk] for i in self.inscripciones)
+        self.assertEqual((primera['posicion'], primera['percentil']), (1, 100.0))
+        # Los empates comparten lugar
+        self.assertEqual((segunda['posicion'], tercera['posicion']), (2, 2))
+        self.assertEqual((ultima['posicion'], ultima['percentil']), (4, 25.0))
+
+    def test_periodo_pondera_por_creditos(self):
+        estudiante = self.inscripciones[0].estudiante
+        otro = Curso.objects.create(
+            nombre_curso='Historia', codigo='HIS101', descripcion='', creditos=3,
+            horario='Martes 8-10', aula='A2', profesor=self.curso.profesor
+        )
+        inscripcion = Inscripcion.objects.create(estudiante=estudiante, curso=otro)
+        Calificacion.objects.create(inscripcion=inscripcion, tipo_evaluacion='FINAL', puntaje=6, porcentaje_peso=100)
+
+        resultado = estadisticas_periodo('2025-2')
+        self.assertEqual(set(resultado['cursos']), {self.curso.pk, otro.pk})
+        self.assertEqual(resultado['cursos'][otro.pk]['n'], 1)
+        primero = resultado['clasificacion'][0]
+        # (9.5 * 5 + 6 * 3) / 8
+        self.assertEqual((primero['estudiante_id'], primero['promedio']), (estudiante.pk, 8.19))
+
+    def test_pagina_y_endpoint(self):
+        response = self.client.get(reverse('ver_calificaciones_por_curso', args=[self.curso.pk]))
+        self.assertEqual(response.context['estadisticas']['n'], 4)
+        self.assertEqual([i.posicion for i in response.context['inscripciones']], [1, 2, 2, 4])
+
+        url = reverse('estadisticas_calificaciones')
+        datos = self.client.get(url, {'curso': self.curso.pk}).json()
+        self.assertEqual(datos['distribucion']['cuartiles'], [5.75, 6.5, 7.25])
+        self.assertEqual(self.client.get(url).status_code, 400)
+        self.assertEqual(self.client.get(url, {'curso': 'MAT101'}).status_code, 400)
+        # Un formulario con el curso sin elegir envía 'curso' vacío: cuenta como ausente
+        datos = self.client.get(url, {'curso': '', 'periodo': '2025-2'}).json()
+        self.assertEqual((datos['periodo'], datos['distribucion']['n']), ('2025-2', 4))
@@ -20,6 +20,7 @@ urlpatterns = [
     path('curso/actualizar/<int:curso_id>/', views.actualizar_curso, name='actualizar_curso'),
     path('curso/actualizar_guardar/<int:curso_id>/', views.realizar_actualizacion_curso, name='realizar_actualizacion_curso'),
     path('curso/borrar/<int:curso_id>/', views.borrar_curso, name='borrar_curso'),
+    path('curso/horario/', views.horario_general, name='horario_general'),
 
     # Rutas para el modelo ESTUDIANTE (NUEVAS)
     path('estudiante/', views.inicio_estudiante, name='ver_estudiante'),
@@ -28,6 +29,7 @@ urlpatterns = [
     path('estudiante/actualizar/<int:estudiante_id>/', views.actualizar_estudiante, name='actualizar_estudiante'),
     path('estudiante/actualizar_guardar/<int:estudiante_id>/', views.realizar_actualizacion_estudiante, name='realizar_actualizacion_estudiante'),
     path('estudiante/borrar/<int:estudiante_id>/', views.borrar_estudiante, name='borrar_estudiante'),
+    path('estudiante/kardex/<int:estudiante_id>/', views.ver_kardex_estudiante, name='ver_kardex_estudiante'),
 
     # app_Preparatoria/urls.py (Fragmento - Añadir a las rutas existentes)
 
@@ -43,10 +45,29 @@ urlpatterns = [
     path('calificacion/', views.ver_calificaciones_curso, name='ver_calificaciones_curso'),
     path('calificacion/gestionar/<int:curso_id>/', views.ver_calificaciones_por_curso, name='ver_calificaciones_por_curso'),
     path('calificacion/agregar/<int:inscripcion_id>/', views.agregar_calificacion, name='agregar_calificacion'),
+    path('calificacion/captura/<int:curso_id>/', views.capturar_calificaciones, name='capturar_calificaciones'),
+    path('calificacion/estadisticas/', views.estadisticas_calificaciones, name='estadisticas_calificaciones'),
     path('inscripcion/actualizar_guardar/<int:inscripcion_id>/', views.realizar_actualizacion_inscripcion, name='realizar_actualizacion_inscripcion'),
 
     # Rutas para el modelo ASISTENCIA (NUEVAS)
     path('asistencia/', views.seleccionar_curso_asistencia, name='seleccionar_curso_asistencia'),
     path('asistencia/gestionar/<int:curso_id>/', views.gestionar_asistencia, name='gestionar_asistencia'),
     path('asistencia/historial/<int:inscripcion_id>/', views.ver_historial_asistencia_estudiante, name='ver_historial_asistencia_estudiante'),
+    path('asistencia/tablero/', views.dashboard_asistencia, name='dashboard_asistencia'),
+    path('api/asistencia/<int:curso_id>/', views.api_asistencia_lote, name='api_asistencia_lote'),
+
+    # Importación masiva (CSV / XLSX)
+    path('importar/', views.importar_datos, name='importar_datos'),
+
+    # Exportación CSV (streaming) por curso y/o periodo
+    path('exportar/calificaciones/', views.exportar_calificaciones, name='exportar_calificaciones'),
+    path('exportar/asistencias/', views.exportar_asistencias, name='exportar_asistencias'),
+
+    # Panel de perfilado (solo staff)
+    path('perfilado/', views.panel_perfilado, name='panel_perfilado'),
+
+    # Boletas por periodo (cola de trabajos; ver comando procesar_boletas)
+    path('boletas/', views.boletas_trabajos, name='boletas_trabajos'),
+    path('boletas/<int:trabajo_id>/', views.estado_trabajo_boletas, name='estado_trabajo_boletas'),
+    path('boletas/<int:trabajo_id>/<str:matricula>/', views.descargar_boleta, name='descargar_boleta'),
 ]
\ No newline at end of file
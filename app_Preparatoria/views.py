@@ -1,8 +1,48 @@
+from datetime import date, datetime # Importar datetime para el manejo de fechas
+from pathlib import Path
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Prefetch
+from django.http import FileResponse, Http404, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
-from .models import Profesor, Curso, Estudiante, Inscripcion, Calificacion, Asistencia
 from django.urls import reverse
-from datetime import date, datetime # Importar datetime para el manejo de fechas
-from django.db.models import Sum, Count, F, Case, When, FloatField # Importar elementos de agregación
+from django.utils.functional import SimpleLazyObject # La página solo se consulta si el fragmento no está en caché
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+
+from .models import Profesor, Curso, Estudiante, Inscripcion, Calificacion, Asistencia, TrabajoBoletas, TareaBoleta
+from .paginacion import paginar_por_cursor # Paginación por cursor (keyset) para los listados
+from .filtros import filtrar_estudiantes, filtrar_inscripciones # Búsqueda por query string
+from .inscripciones import ( # Inscripción masiva en una transacción; cursos de un estudiante por diferencia
+    inscribir_en_cursos, periodo_vigente, sincronizar_inscripciones,
+)
+from .cupos import bloquear_cursos, tiene_cupo, validar_cupo_maximo # Cupo por curso con contador mantenido
+from . import horarios # Sesiones estructuradas del horario y choques de aula/profesor
+from .eliminacion import ( # Borrado lógico (purga por lotes)
+    eliminar_curso, eliminar_estudiante, eliminar_profesor, validar_clave_libre,
+)
+from .kardex import kardex_estudiante # Calificaciones finales y promedio ponderado por créditos
+from .asistencias import guardar_asistencias # Guardado de asistencia en bloque (upsert)
+from .importacion import importar_archivo, formato_por_nombre # Importación masiva CSV/XLSX
+from .exportacion import filas_calificaciones, filas_asistencias # Exportación CSV en flujo
+from .calificaciones import ( # Carga de calificaciones en una pasada y captura en bloque
+    inscripciones_con_calificaciones, registrar_calificaciones_en_bloque, validar_peso,
+)
+from . import estadisticas # Distribución, posición y percentil con NumPy (opcional)
+from . import rollups_asistencia # Tablero de asistencia sobre tablas acumuladas
+from .historial import bloque_historial, rango_fechas, resumen_asistencia # Historial por bloques
+from .boletas import crear_trabajo, directorio_boletas, formatos_disponibles # Cola de generación de boletas
+from .api_asistencia import leer_lote, procesar_lote, token_valido, LoteInvalido, ConflictoLote # API JSON de asistencia
+from .perfilado import registros_recientes # Buffer del middleware de perfilado
+from .listas_cache import (  # Listas de selección cacheadas
+    opciones_profesores_activos, opciones_cursos, opciones_cursos_con_profesor, opciones_estudiantes,
+    contexto_fragmento,
+)
 
 # --------------------------------------------------------------------------
 # 1. FUNCIÓN AUXILIAR: GENERACIÓN DINÁMICA DE PERIODOS (CORREGIDA)
@@ -35,8 +75,11 @@ def inicio_sistema(request):
 
 def inicio_profesor(request):
     """Muestra la lista de todos los profesores."""
-    profesores = Profesor.objects.all()
-    context = {'profesores': profesores}
+    profesores = SimpleLazyObject(lambda: paginar_por_cursor(
+        Profesor.objects.all(), request,
+        columnas_orden=('id', 'apellido_profesor', 'especialidad', 'fecha_contratacion')
+    ))
+    context = {'profesores': profesores, 'pagina': profesores, **contexto_fragmento('profesor')}
     return render(request, 'profesor/ver_profesor.html', context)
 
 def agregar_profesor(request):
@@ -83,7 +126,8 @@ def borrar_profesor(request, profesor_id):
     """Gestiona la eliminación de un profesor."""
     profesor = get_object_or_404(Profesor, pk=profesor_id)
     if request.method == 'POST':
-        profesor.delete()
+        # Borrado lógico: la fila, sus cursos y dependientes se purgan después por lotes
+        eliminar_profesor(profesor)
         return redirect('ver_profesor')
     context = {'profesor': profesor}
     return render(request, 'profesor/borrar_profesor.html', context)
@@ -102,13 +146,39 @@ def inicio_curso(request):
 # ... (vistas de curso sin cambios)
 # ...
     """Muestra la lista de todos los cursos, incluyendo el profesor asociado."""
-    cursos = Curso.objects.all().select_related('profesor')
-    context = {'cursos': cursos}
+    cursos = SimpleLazyObject(lambda: paginar_por_cursor(
+        Curso.objects.all().select_related('profesor'), request,
+        columnas_orden=('id', 'codigo', 'nombre_curso')
+    ))
+    context = {'cursos': cursos, 'pagina': cursos, **contexto_fragmento('curso', 'profesor')}
     return render(request, 'curso/ver_curso.html', context)
 
+def _sesiones_sin_conflictos(request, horario, aula, profesor_id, curso_id=None,
+                             horario_cambio=True, ubicacion_cambio=True):
+    """
+    Interpreta el horario y busca choques de aula y de profesor. Devuelve las
+    sesiones a guardar, o None después de registrar los errores en messages.
+    Al editar, lo que no cambió no impide guardar: un horario guardado que no se
+    puede interpretar deja el curso sin sesiones y los choques que ya existían
+    se guardan igual, ambos con una advertencia.
+    """
+    try:
+        sesiones = horarios.construir_sesiones(horario, aula)
+    except horarios.HorarioInvalido as exc:
+        if horario_cambio:
+            messages.error(request, str(exc))
+            return None
+        messages.warning(request, f"{exc}. El curso se guardó sin sesiones en el horario.")
+        return []
+    conflictos = horarios.buscar_conflictos(sesiones, profesor_id, excluir_curso_id=curso_id)
+    bloquea = horario_cambio or ubicacion_cambio
+    for conflicto in conflictos:
+        (messages.error if bloquea else messages.warning)(request, horarios.describir_conflicto(*conflicto))
+    return None if conflictos and bloquea else sesiones
+
 def agregar_curso(request):
     """Gestiona la adición de un nuevo curso con selección de profesor."""
-    profesores = Profesor.objects.filter(activo=True) 
+    profesores = opciones_profesores_activos()
     
     if request.method == 'POST':
         nombre = request.POST.get('nombre_curso')
@@ -118,18 +188,32 @@ def agregar_curso(request):
         horario = request.POST.get('horario')
         aula = request.POST.get('aula')
         profesor_id = request.POST.get('profesor')
+        try:
+            cupo_maximo = validar_cupo_maximo(request.POST.get('cupo_maximo'))
+            validar_clave_libre(Curso, 'codigo', codigo)
+        except ValidationError as exc:
+            messages.error(request, ' '.join(exc.messages))
+            return redirect('agregar_curso')
         
         profesor_obj = get_object_or_404(Profesor, pk=profesor_id)
         
-        Curso.objects.create(
-            nombre_curso=nombre,
-            codigo=codigo,
-            descripcion=descripcion,
-            creditos=creditos,
-            horario=horario,
-            aula=aula,
-            profesor=profesor_obj
-        )
+        # La validación del horario y el guardado van en la misma transacción
+        with transaction.atomic():
+            sesiones = _sesiones_sin_conflictos(request, horario, aula, profesor_obj.id)
+            if sesiones is not None:
+                curso = Curso.objects.create(
+                    nombre_curso=nombre,
+                    codigo=codigo,
+                    descripcion=descripcion,
+                    creditos=creditos,
+                    horario=horario,
+                    aula=aula,
+                    cupo_maximo=cupo_maximo,
+                    profesor=profesor_obj
+                )
+                horarios.guardar_sesiones(curso, sesiones)
+        if sesiones is None:
+            return redirect('agregar_curso')
         return redirect('ver_curso') 
 
     context = {'profesores': profesores}
@@ -138,7 +222,7 @@ def agregar_curso(request):
 def actualizar_curso(request, curso_id):
     """Muestra el formulario para editar un curso."""
     curso = get_object_or_404(Curso, pk=curso_id)
-    profesores = Profesor.objects.filter(activo=True)
+    profesores = opciones_profesores_activos()
     context = {'curso': curso, 'profesores': profesores}
     return render(request, 'curso/actualizar_curso.html', context)
 
@@ -146,26 +230,69 @@ def realizar_actualizacion_curso(request, curso_id):
     """Procesa el formulario de actualización de un curso."""
     curso = get_object_or_404(Curso, pk=curso_id)
     if request.method == 'POST':
+        horario_anterior, ubicacion_anterior = curso.horario, (curso.aula, curso.profesor_id)
         curso.nombre_curso = request.POST.get('nombre_curso')
         curso.codigo = request.POST.get('codigo')
         curso.descripcion = request.POST.get('descripcion')
         curso.creditos = request.POST.get('creditos')
         curso.horario = request.POST.get('horario')
         curso.aula = request.POST.get('aula')
+        # El cupo puede quedar debajo de los inscritos actuales: solo bloquea nuevas inscripciones.
+        try:
+            curso.cupo_maximo = validar_cupo_maximo(request.POST.get('cupo_maximo'))
+            validar_clave_libre(Curso, 'codigo', curso.codigo, excluir_pk=curso.pk)
+        except ValidationError as exc:
+            messages.error(request, ' '.join(exc.messages))
+            return redirect('actualizar_curso', curso_id=curso_id)
         profesor_id = request.POST.get('profesor')
         
         curso.profesor = get_object_or_404(Profesor, pk=profesor_id)
         
-        curso.save()
+        with transaction.atomic():
+            sesiones = _sesiones_sin_conflictos(
+                request, curso.horario, curso.aula, curso.profesor_id, curso.id,
+                horario_cambio=curso.horario != horario_anterior,
+                ubicacion_cambio=(curso.aula, curso.profesor_id) != ubicacion_anterior,
+            )
+            if sesiones is not None:
+                # inscritos_activos no se escribe aquí: lo mantienen las inscripciones con F()
+                curso.save(update_fields=[
+                    'nombre_curso', 'codigo', 'descripcion', 'creditos', 'horario', 'aula', 'cupo_maximo', 'profesor',
+                ])
+                horarios.guardar_sesiones(curso, sesiones)
+        if sesiones is None:
+            return redirect('actualizar_curso', curso_id=curso_id)
         return redirect('ver_curso')
 
     return redirect('actualizar_curso', curso_id=curso_id)
 
+def horario_general(request):
+    """Reporte de choques de todo el horario y consulta de aulas libres en un día y hora."""
+    context = {
+        'conflictos': horarios.reporte_conflictos(),
+        'dias': horarios.DIAS_SEMANA,
+        'consulta': None,
+    }
+    dia, inicio, fin = request.GET.get('dia'), request.GET.get('inicio'), request.GET.get('fin')
+    if dia and inicio and fin:
+        try:
+            consulta = {
+                'dia': int(dia),
+                'inicio': datetime.strptime(inicio, '%H:%M').time(),
+                'fin': datetime.strptime(fin, '%H:%M').time(),
+            }
+        except ValueError:
+            messages.error(request, "Día u horas inválidos.")
+        else:
+            consulta['aulas'] = horarios.aulas_libres(consulta['dia'], consulta['inicio'], consulta['fin'])
+            context['consulta'] = consulta
+    return render(request, 'curso/horario_general.html', context)
+
 def borrar_curso(request, curso_id):
     """Gestiona la eliminación de un curso."""
     curso = get_object_or_404(Curso, pk=curso_id)
     if request.method == 'POST':
-        curso.delete()
+        eliminar_curso(curso) # Borrado lógico; ver purgar_eliminados
         return redirect('ver_curso')
     context = {'curso': curso}
     return render(request, 'curso/borrar_curso.html', context)
@@ -184,19 +311,30 @@ def inicio_estudiante(request):
 # ... (vistas de estudiante sin cambios)
 # ...
     """Muestra la lista de todos los estudiantes."""
-    estudiantes = Estudiante.objects.all()
-    context = {'estudiantes': estudiantes}
+    queryset, filtros = filtrar_estudiantes(Estudiante.objects.all(), request.GET)
+    estudiantes = SimpleLazyObject(lambda: paginar_por_cursor(
+        queryset, request,
+        columnas_orden=('id', 'matricula', 'apellido_estudiante', 'fecha_inscripcion')
+    ))
+    context = {
+        'estudiantes': estudiantes, 'pagina': estudiantes, 'filtros': filtros,
+        **contexto_fragmento('estudiante'),
+    }
     return render(request, 'estudiante/ver_estudiante.html', context)
 
 def ver_detalle_estudiante(request, estudiante_id):
     """Muestra los detalles completos de un estudiante específico."""
-    estudiante = get_object_or_404(Estudiante.objects.prefetch_related('cursos'), pk=estudiante_id)
+    # Solo las columnas de curso que muestra la plantilla
+    cursos = Curso.objects.only('id', 'nombre_curso', 'codigo').order_by('nombre_curso')
+    estudiante = get_object_or_404(
+        Estudiante.objects.prefetch_related(Prefetch('cursos', queryset=cursos)), pk=estudiante_id
+    )
     context = {'estudiante': estudiante}
     return render(request, 'estudiante/ver_detalle_estudiante.html', context)
 
 def agregar_estudiante(request):
     """Gestiona la adición de un nuevo estudiante con asignación de cursos."""
-    cursos = Curso.objects.all()
+    cursos = opciones_cursos()
     
     if request.method == 'POST':
         nombre = request.POST.get('nombre_estudiante')
@@ -205,32 +343,58 @@ def agregar_estudiante(request):
         correo = request.POST.get('correo_estudiante')
         fecha_nacimiento = request.POST.get('fecha_nacimiento')
         cursos_seleccionados = request.POST.getlist('cursos')
+        periodo = request.POST.get('periodo_academico') or periodo_vigente()
+        try:
+            validar_clave_libre(Estudiante, 'matricula', matricula)
+        except ValidationError as exc:
+            messages.error(request, ' '.join(exc.messages))
+            return redirect('agregar_estudiante')
 
-        nuevo_estudiante = Estudiante.objects.create(
-            nombre_estudiante=nombre,
-            apellido_estudiante=apellido,
-            matricula=matricula,
-            correo_estudiante=correo,
-            fecha_nacimiento=fecha_nacimiento 
-        )
-        nuevo_estudiante.cursos.set(cursos_seleccionados) 
+        with transaction.atomic():
+            nuevo_estudiante = Estudiante.objects.create(
+                nombre_estudiante=nombre,
+                apellido_estudiante=apellido,
+                matricula=matricula,
+                correo_estudiante=correo,
+                fecha_nacimiento=fecha_nacimiento 
+            )
+            resultado = sincronizar_inscripciones(nuevo_estudiante, cursos_seleccionados, periodo)
+            if resultado.invalidos:
+                raise Http404(f"Cursos inexistentes: {resultado.invalidos}")
+        _mensajes_sincronizacion(request, resultado)
         
         return redirect('ver_estudiante')
 
-    context = {'cursos': cursos}
+    context = {'cursos': cursos, 'periodo': periodo_vigente()}
     return render(request, 'estudiante/agregar_estudiante.html', context)
 
+def _mensajes_sincronizacion(request, resultado):
+    """Informa las altas, bajas y cursos sin cupo de una sincronización de inscripciones."""
+    altas = resultado.creadas + resultado.reactivadas
+    if altas:
+        messages.success(request, "Inscrito en: " + ", ".join(c.codigo for c in altas))
+    if resultado.dadas_de_baja:
+        messages.info(request, "Baja (se conserva el historial) en: " + ", ".join(c.codigo for c in resultado.dadas_de_baja))
+    if resultado.sin_cupo:
+        messages.warning(request, "Sin cupo disponible en: " + ", ".join(c.codigo for c in resultado.sin_cupo))
+
 def actualizar_estudiante(request, estudiante_id):
     """Muestra el formulario para editar un estudiante."""
-    estudiante = get_object_or_404(Estudiante.objects.prefetch_related('cursos'), pk=estudiante_id)
-    cursos = Curso.objects.all()
+    estudiante = get_object_or_404(Estudiante, pk=estudiante_id)
+    cursos = opciones_cursos()
+    # La selección de cursos se edita por periodo (?periodo=...); por omisión, el más reciente.
+    periodo = request.GET.get('periodo') or periodo_vigente(estudiante)
     
-    cursos_actuales_ids = list(estudiante.cursos.values_list('id', flat=True))
+    cursos_actuales_ids = list(
+        Inscripcion.objects.filter(estudiante=estudiante, periodo_academico=periodo, esta_activo=True)
+        .values_list('curso_id', flat=True)
+    )
     
     context = {
         'estudiante': estudiante,
         'cursos': cursos,
-        'cursos_actuales_ids': cursos_actuales_ids
+        'cursos_actuales_ids': cursos_actuales_ids,
+        'periodo': periodo,
     }
     return render(request, 'estudiante/actualizar_estudiante.html', context)
 
@@ -244,9 +408,20 @@ def realizar_actualizacion_estudiante(request, estudiante_id):
         estudiante.correo_estudiante = request.POST.get('correo_estudiante')
         estudiante.fecha_nacimiento = request.POST.get('fecha_nacimiento')
         cursos_seleccionados = request.POST.getlist('cursos')
+        periodo = request.POST.get('periodo_academico') or periodo_vigente(estudiante)
+        try:
+            validar_clave_libre(Estudiante, 'matricula', estudiante.matricula, excluir_pk=estudiante.pk)
+        except ValidationError as exc:
+            messages.error(request, ' '.join(exc.messages))
+            return redirect('actualizar_estudiante', estudiante_id=estudiante_id)
         
-        estudiante.save()
-        estudiante.cursos.set(cursos_seleccionados)
+        with transaction.atomic():
+            estudiante.save()
+            # Solo se escribe la diferencia del periodo; las bajas conservan calificaciones y asistencias.
+            resultado = sincronizar_inscripciones(estudiante, cursos_seleccionados, periodo)
+            if resultado.invalidos:
+                raise Http404(f"Cursos inexistentes: {resultado.invalidos}")
+        _mensajes_sincronizacion(request, resultado)
         
         return redirect('ver_estudiante')
 
@@ -256,25 +431,46 @@ def borrar_estudiante(request, estudiante_id):
     """Gestiona la eliminación de un estudiante."""
     estudiante = get_object_or_404(Estudiante, pk=estudiante_id)
     if request.method == 'POST':
-        estudiante.delete()
+        eliminar_estudiante(estudiante) # Borrado lógico; ver purgar_eliminados
         return redirect('ver_estudiante')
     context = {'estudiante': estudiante}
     return render(request, 'estudiante/borrar_estudiante.html', context)
 
+def ver_kardex_estudiante(request, estudiante_id):
+    """Kardex del estudiante: finales por curso y promedio por periodo y acumulado (cacheado)."""
+    estudiante = get_object_or_404(
+        Estudiante.objects.only('id', 'nombre_estudiante', 'apellido_estudiante', 'matricula'), pk=estudiante_id
+    )
+    context = {'estudiante': estudiante, 'kardex': kardex_estudiante(estudiante.pk)}
+    return render(request, 'estudiante/kardex_estudiante.html', context)
+
 # --------------------------------------------------------------------------
 # 5. VISTAS INSCRIPCIÓN (CRUD)
 # --------------------------------------------------------------------------
 
 def ver_inscripciones(request):
-    """Muestra la lista de todas las inscripciones activas."""
-    inscripciones = Inscripcion.objects.filter(esta_activo=True).select_related('estudiante', 'curso')
-    context = {'inscripciones': inscripciones}
+    """Muestra la lista de inscripciones (activas por defecto) con filtros por query string."""
+    queryset, filtros = filtrar_inscripciones(
+        Inscripcion.objects.vigentes().select_related('estudiante', 'curso'), request.GET
+    )
+    inscripciones = paginar_por_cursor(
+        queryset, request,
+        columnas_orden=('id', 'periodo_academico', 'fecha_inscripcion_curso')
+    )
+    context = {
+        'inscripciones': inscripciones,
+        'pagina': inscripciones,
+        'filtros': filtros,
+        'cursos': opciones_cursos(),
+        'periodos_disponibles': get_periodos_disponibles(duracion_ciclo=4),
+    }
     return render(request, 'inscripcion/ver_inscripciones.html', context)
 
 def agregar_inscripcion(request):
     """Permite inscribir un estudiante en uno o varios cursos, usando periodos dinámicos."""
-    estudiantes = Estudiante.objects.all()
-    cursos = Curso.objects.all()
+    # Listas de selección cacheadas: solo tuplas (id, etiqueta)
+    estudiantes = opciones_estudiantes()
+    cursos = opciones_cursos_con_profesor()
     # 🎯 Ajuste la llamada para usar 4 años de ciclo (ej: 2025-2029)
     periodos_disponibles = get_periodos_disponibles(duracion_ciclo=4) 
     
@@ -287,17 +483,17 @@ def agregar_inscripcion(request):
         # ⚠️ Nota: Ya no se usa f'{date.today().year}-2' como fallback.
         periodo_a_usar = periodo_seleccionado 
         
-        for curso_id in cursos_seleccionados:
-            curso = get_object_or_404(Curso, pk=curso_id)
-            
-            Inscripcion.objects.get_or_create(
-                estudiante=estudiante,
-                curso=curso,
-                periodo_academico=periodo_a_usar,
-                defaults={
-                    'es_obligatorio': True 
-                }
-            )
+        # Validación de cursos e inserción en bloque (una transacción, un INSERT)
+        resultado = inscribir_en_cursos(estudiante, cursos_seleccionados, periodo_a_usar)
+        if resultado.invalidos:
+            raise Http404(f"Cursos inexistentes: {resultado.invalidos}")
+
+        if resultado.creadas:
+            messages.success(request, f"{estudiante.matricula} inscrito en: " + ", ".join(c.codigo for c in resultado.creadas))
+        if resultado.existentes:
+            messages.info(request, "Ya estaba inscrito en: " + ", ".join(c.codigo for c in resultado.existentes))
+        if resultado.sin_cupo:
+            messages.warning(request, "Sin cupo disponible en: " + ", ".join(c.codigo for c in resultado.sin_cupo))
         return redirect('ver_inscripciones')
 
     context = {
@@ -309,7 +505,7 @@ def agregar_inscripcion(request):
 
 def actualizar_inscripcion(request, inscripcion_id):
     """Muestra el formulario para editar una inscripción."""
-    inscripcion = get_object_or_404(Inscripcion.objects.select_related('estudiante', 'curso'), pk=inscripcion_id)
+    inscripcion = get_object_or_404(Inscripcion.objects.vigentes().select_related('estudiante', 'curso'), pk=inscripcion_id)
     # 🎯 Ajuste la llamada para usar 4 años de ciclo (ej: 2025-2029)
     periodos_disponibles = get_periodos_disponibles(duracion_ciclo=4) 
     
@@ -321,9 +517,10 @@ def actualizar_inscripcion(request, inscripcion_id):
 
 def realizar_actualizacion_inscripcion(request, inscripcion_id):
     """Procesa el formulario de actualización de una inscripción."""
-    inscripcion = get_object_or_404(Inscripcion, pk=inscripcion_id)
+    inscripcion = get_object_or_404(Inscripcion.objects.vigentes(), pk=inscripcion_id)
     
     if request.method == 'POST':
+        estaba_activo = inscripcion.esta_activo
         inscripcion.periodo_academico = request.POST.get('periodo_academico')
         inscripcion.es_obligatorio = request.POST.get('es_obligatorio') == 'on'
         
@@ -343,7 +540,19 @@ def realizar_actualizacion_inscripcion(request, inscripcion_id):
             except ValueError:
                 inscripcion.fecha_finalizacion = None
 
-        inscripcion.save()
+        # El contador inscritos_activos del curso se ajusta en la señal post_save.
+        with transaction.atomic():
+            if inscripcion.esta_activo and not estaba_activo:
+                # Reactivar ocupa un lugar: se valida con la fila del curso bloqueada.
+                curso = bloquear_cursos([inscripcion.curso_id]).get(inscripcion.curso_id)
+                if curso is None:
+                    # El curso se eliminó mientras se editaba la inscripción
+                    messages.error(request, "El curso de esta inscripción fue eliminado; no se puede reactivar.")
+                    return redirect('ver_inscripciones')
+                if not tiene_cupo(curso):
+                    messages.error(request, f"{curso.codigo} no tiene cupo disponible para reactivar la inscripción.")
+                    return redirect('actualizar_inscripcion', inscripcion_id=inscripcion_id)
+            inscripcion.save()
         return redirect('ver_inscripciones')
 
     return redirect('actualizar_inscripcion', inscripcion_id=inscripcion_id)
@@ -352,12 +561,12 @@ def finalizar_inscripcion(request, inscripcion_id):
 # ... (vistas de inscripción sin cambios)
 # ...
     """Marca una inscripción como inactiva (finalizada)."""
-    inscripcion = get_object_or_404(Inscripcion, pk=inscripcion_id)
+    inscripcion = get_object_or_404(Inscripcion.objects.vigentes(), pk=inscripcion_id)
     
     if request.method == 'POST':
         inscripcion.esta_activo = False
         inscripcion.fecha_finalizacion = date.today()
-        inscripcion.save()
+        inscripcion.save() # Libera el lugar: la señal post_save descuenta inscritos_activos
         return redirect('ver_inscripciones')
     
     context = {'inscripcion': inscripcion}
@@ -378,37 +587,48 @@ def ver_calificaciones_curso(request):
 
 def ver_calificaciones_por_curso(request, curso_id):
     """Muestra las inscripciones activas de un curso, calcula y muestra el promedio."""
-    curso = get_object_or_404(Curso, pk=curso_id)
+    curso = get_object_or_404(Curso.objects.select_related('profesor'), pk=curso_id)
     
-    # Obtener inscripciones, prefetch calificaciones y realizar cálculos de promedio
-    inscripciones = Inscripcion.objects.filter(
-        curso=curso, 
-        esta_activo=True
-    ).select_related('estudiante').prefetch_related('calificaciones').annotate(
-        # 1. Suma de todos los puntajes
-        total_puntaje=Sum('calificaciones__puntaje'),
-        # 2. Conteo de calificaciones
-        conteo_calificaciones=Count('calificaciones'),
-        # 3. Calcular el promedio, evitando división por cero con Case/When
-        promedio_simple=Case(
-            When(conteo_calificaciones__gt=0, 
-                 then=F('total_puntaje') / F('conteo_calificaciones')),
-            default=0.0,
-            output_field=FloatField()
-        )
-    )
+    # Una sola lectura de las calificaciones del curso (Prefetch ordenado); conteo y
+    # promedios (simple y ponderado) vienen del resumen materializado, en el mismo JOIN.
+    inscripciones = inscripciones_con_calificaciones(curso)
     
     opciones_tipo = Calificacion.tipo_evaluacion.field.choices
     
     context = {
         'curso': curso,
-        # Las inscripciones ahora incluyen 'total_puntaje', 'conteo_calificaciones' y 'promedio_simple'
+        # Cada inscripción trae 'calificaciones_ordenadas', 'conteo_calificaciones',
+        # 'promedio_simple' y 'promedio_ponderado'
         'inscripciones': inscripciones, 
-        'opciones_tipo': opciones_tipo 
+        'opciones_tipo': opciones_tipo,
+        # Sobre los promedios ya calculados (sin otra consulta); None sin NumPy.
+        # También agrega 'posicion' y 'percentil' a cada inscripción.
+        'estadisticas': estadisticas.estadisticas_de_inscripciones(inscripciones),
     }
     return render(request, 'calificacion/gestionar_calificaciones.html', context)
 
 
+def estadisticas_calificaciones(request):
+    """
+    JSON con la distribución y la clasificación de un curso (?curso=ID, opcional
+    ?periodo=) o de un periodo completo (?periodo=).
+    """
+    curso_id = request.GET.get('curso') or None
+    periodo = request.GET.get('periodo') or None
+    if curso_id is not None and not curso_id.isdigit():
+        return JsonResponse({'error': "El parámetro 'curso' debe ser un ID numérico."}, status=400)
+    if not curso_id and not periodo:
+        return JsonResponse({'error': "Indique 'curso' o 'periodo'."}, status=400)
+    try:
+        if curso_id:
+            resultado = estadisticas.estadisticas_curso(int(curso_id), periodo)
+        else:
+            resultado = estadisticas.estadisticas_periodo(periodo)
+    except estadisticas.EstadisticasNoDisponibles as exc:
+        return JsonResponse({'error': str(exc)}, status=503)
+    return JsonResponse(resultado)
+
+
 def agregar_calificacion(request, inscripcion_id):
     """Añade una calificación a una inscripción específica."""
     inscripcion = get_object_or_404(Inscripcion, pk=inscripcion_id)
@@ -429,6 +649,85 @@ def agregar_calificacion(request, inscripcion_id):
     
     return redirect('ver_calificaciones_por_curso', curso_id=inscripcion.curso.id)
 
+
+def capturar_calificaciones(request, curso_id):
+    """
+    Captura tipo hoja de cálculo: un puntaje por alumno para un tipo de evaluación,
+    todos en un solo envío y guardados con un bulk_create.
+    """
+    curso = get_object_or_404(Curso.objects.select_related('profesor'), pk=curso_id)
+    opciones_tipo = Calificacion.tipo_evaluacion.field.choices
+    tipos_validos = {clave for clave, _ in opciones_tipo}
+
+    datos = request.POST if request.method == 'POST' else request.GET
+    tipo_evaluacion = datos.get('tipo_evaluacion') or opciones_tipo[0][0]
+    if tipo_evaluacion not in tipos_validos:
+        return HttpResponseBadRequest("Tipo de evaluación inválido.")
+
+    inscripciones = list(
+        Inscripcion.objects.filter(curso=curso, esta_activo=True)
+        .select_related('estudiante')
+        .order_by('estudiante__apellido_estudiante', 'estudiante__nombre_estudiante')
+    )
+    # Puntajes ya registrados de este tipo (para no capturar dos veces por error)
+    registradas = {}
+    for inscripcion_id, puntaje in Calificacion.objects.filter(
+        inscripcion__in=[i.id for i in inscripciones], tipo_evaluacion=tipo_evaluacion
+    ).values_list('inscripcion_id', 'puntaje'):
+        registradas.setdefault(inscripcion_id, []).append(puntaje)
+
+    # Por omisión el profesor asignador es el titular del curso
+    profesor_param = datos.get('profesor_asignador', '')
+    profesor_id = int(profesor_param) if profesor_param.isdigit() else None
+    if request.method == 'GET':
+        profesor_id = profesor_id or curso.profesor_id
+    profesores = opciones_profesores_activos()
+    if profesor_id not in {pk for pk, _ in profesores}:
+        profesor_id = None
+
+    errores = {}
+    error_peso = None
+    if request.method == 'POST':
+        puntajes = {i.id: request.POST.get(f'puntaje_{i.id}', '') for i in inscripciones}
+        comentarios = {i.id: request.POST.get(f'comentarios_{i.id}', '') for i in inscripciones}
+        try:
+            porcentaje_peso = validar_peso(request.POST.get('porcentaje_peso', ''))
+        except ValidationError as exc:
+            error_peso = ' '.join(exc.messages)
+
+        if error_peso is None:
+            creadas, errores = registrar_calificaciones_en_bloque(
+                [i.id for i in inscripciones], tipo_evaluacion, puntajes, porcentaje_peso,
+                profesor_asignador_id=profesor_id,
+                comentarios=comentarios,
+            )
+            if creadas:
+                messages.success(request, f"Se registraron {len(creadas)} calificaciones.")
+                return redirect('ver_calificaciones_por_curso', curso_id=curso.id)
+            if not errores:
+                messages.warning(request, "No se capturó ningún puntaje.")
+        if errores or error_peso:
+            messages.error(request, "Hay valores inválidos; no se guardó ninguna calificación.")
+
+    for inscripcion in inscripciones:
+        inscripcion.puntajes_registrados = registradas.get(inscripcion.id, [])
+        inscripcion.error_puntaje = errores.get(inscripcion.id)
+        if request.method == 'POST':
+            inscripcion.valor_puntaje = request.POST.get(f'puntaje_{inscripcion.id}', '')
+            inscripcion.valor_comentarios = request.POST.get(f'comentarios_{inscripcion.id}', '')
+
+    context = {
+        'curso': curso,
+        'inscripciones': inscripciones,
+        'opciones_tipo': opciones_tipo,
+        'tipo_evaluacion': tipo_evaluacion,
+        'profesores': profesores,
+        'profesor_seleccionado': profesor_id,
+        'porcentaje_peso': datos.get('porcentaje_peso', 100),
+        'error_peso': error_peso,
+    }
+    return render(request, 'calificacion/capturar_calificaciones.html', context)
+
 # --------------------------------------------------------------------------
 # 7. VISTAS ASISTENCIA
 # --------------------------------------------------------------------------
@@ -439,7 +738,7 @@ def agregar_calificacion(request, inscripcion_id):
 def seleccionar_curso_asistencia(request):
     """Muestra la lista de cursos para que el usuario seleccione uno y registre la asistencia."""
     cursos = Curso.objects.all().select_related('profesor')
-    context = {'cursos': cursos}
+    context = {'cursos': cursos, **contexto_fragmento('curso', 'profesor')}
     return render(request, 'asistencia/seleccionar_curso_asistencia.html', context)
 
 
@@ -489,28 +788,16 @@ def gestionar_asistencia(request, curso_id):
 
     # --- Procesamiento POST (Guardar datos) ---
     if request.method == 'POST':
+        registros = {}
         for inscripcion in inscripciones:
-            presente = request.POST.get(f'presente_{inscripcion.id}') == 'on'
-            observaciones = request.POST.get(f'observaciones_{inscripcion.id}', '')
-            justificada = request.POST.get(f'justificada_{inscripcion.id}') == 'on' 
-            
-            asistencia_obj = inscripcion.registro_asistencia 
-
-            if asistencia_obj:
-                # Actualizar asistencia existente
-                asistencia_obj.presente = presente
-                asistencia_obj.observaciones = observaciones
-                asistencia_obj.justificacion_aprobada = justificada
-                asistencia_obj.save()
-            else:
-                # Crear nueva asistencia
-                Asistencia.objects.create(
-                    inscripcion=inscripcion,
-                    fecha=fecha_a_usar,
-                    presente=presente,
-                    observaciones=observaciones,
-                    justificacion_aprobada=justificada
-                )
+            registros[inscripcion.id] = (
+                request.POST.get(f'presente_{inscripcion.id}') == 'on',
+                request.POST.get(f'observaciones_{inscripcion.id}', ''),
+                request.POST.get(f'justificada_{inscripcion.id}') == 'on',
+            )
+
+        # Un solo upsert en una transacción; solo se escriben las filas que cambiaron
+        guardar_asistencias(fecha_a_usar, registros, existentes=asistencias_hoy, curso_id=curso.id)
         
         return redirect(f"{reverse('gestionar_asistencia', args=[curso_id])}?fecha={fecha_a_usar}")
 
@@ -523,12 +810,228 @@ def gestionar_asistencia(request, curso_id):
     return render(request, 'asistencia/gestionar_asistencia.html', context)
 
 def ver_historial_asistencia_estudiante(request, inscripcion_id):
-    """Muestra el historial completo de asistencia para un estudiante en un curso."""
+    """
+    Muestra el historial de asistencia de un estudiante en un curso por bloques
+    ("cargar más"), dentro de un rango de fechas opcional, con los totales del rango.
+    Con ?fragmento=1 devuelve solo las filas del siguiente bloque.
+    """
+    desde, hasta = rango_fechas(request.GET)
+    historial, siguiente = bloque_historial(inscripcion_id, desde, hasta, request.GET.get('cursor'))
+
+    if request.GET.get('fragmento'):
+        if not historial and not Inscripcion.objects.filter(pk=inscripcion_id).exists():
+            raise Http404
+        response = render(request, 'asistencia/filas_historial_asistencia.html', {'historial': historial})
+        response['X-Siguiente-Cursor'] = siguiente or ''
+        return response
+
     inscripcion = get_object_or_404(Inscripcion.objects.select_related('estudiante', 'curso'), pk=inscripcion_id)
-    historial = Asistencia.objects.filter(inscripcion=inscripcion).order_by('-fecha')
-    
+    parametros = request.GET.copy()
+    parametros.pop('cursor', None)
     context = {
         'inscripcion': inscripcion,
-        'historial': historial
+        'historial': historial,
+        'siguiente': siguiente,
+        'parametros': parametros.urlencode(),
+        'resumen': resumen_asistencia(inscripcion_id, desde, hasta),
+        'desde': desde,
+        'hasta': hasta,
+    }
+    return render(request, 'asistencia/historial_asistencia_estudiante.html', context)
+
+def dashboard_asistencia(request):
+    """
+    Tablero de asistencia por curso, semana, tipo de sesión y estudiante.
+    Lee solo las tablas acumuladas (rollups), nunca la tabla Asistencia completa.
+    """
+    curso_id = request.GET.get('curso') or None
+    if curso_id and not curso_id.isdigit():
+        curso_id = None
+    try:
+        umbral = float(request.GET.get('umbral', rollups_asistencia.UMBRAL_RIESGO_DEFAULT))
+    except ValueError:
+        umbral = rollups_asistencia.UMBRAL_RIESGO_DEFAULT
+    umbral = min(max(umbral, 0), 100)
+
+    curso = get_object_or_404(Curso, pk=curso_id) if curso_id else None
+
+    context = {
+        'curso': curso,
+        'cursos': opciones_cursos(),
+        'umbral': umbral,
+        'por_curso': rollups_asistencia.tasa_por_curso(),
+        'por_semana': rollups_asistencia.tasa_por_semana(curso_id),
+        'por_tipo_sesion': rollups_asistencia.tasa_por_tipo_sesion(curso_id),
+        'por_estudiante': rollups_asistencia.tasa_por_estudiante(curso_id) if curso else [],
+        'en_riesgo': rollups_asistencia.estudiantes_en_riesgo(umbral, curso_id),
+        'limite_en_riesgo': rollups_asistencia.LIMITE_EN_RIESGO,
+    }
+    return render(request, 'asistencia/dashboard_asistencia.html', context)
+
+# --------------------------------------------------------------------------
+# 8. IMPORTACIÓN MASIVA
+# --------------------------------------------------------------------------
+
+def importar_datos(request):
+    """Importa profesores, cursos o estudiantes desde un archivo CSV o XLSX por lotes."""
+    resultado = None
+
+    if request.method == 'POST':
+        modelo = request.POST.get('modelo')
+        archivo = request.FILES.get('archivo')
+
+        if not archivo:
+            messages.error(request, "Seleccione un archivo para importar.")
+        else:
+            try:
+                resultado = importar_archivo(modelo, archivo.file, formato_por_nombre(archivo.name))
+            except (ValueError, UnicodeDecodeError) as exc:
+                messages.error(request, f"No se pudo importar el archivo: {exc}")
+
+    context = {'resultado': resultado}
+    return render(request, 'importacion/importar_datos.html', context)
+
+
+# --------------------------------------------------------------------------
+# 9. EXPORTACIÓN CSV (STREAMING)
+# --------------------------------------------------------------------------
+
+def _respuesta_csv_en_flujo(request, generador, prefijo):
+    """Valida el alcance (?curso=ID y/o ?periodo=...) y devuelve la descarga en flujo."""
+    curso_id = request.GET.get('curso')
+    periodo = request.GET.get('periodo')
+
+    if curso_id:
+        if not curso_id.isdigit():
+            return HttpResponseBadRequest("Parámetro 'curso' inválido.")
+        curso_id = int(curso_id)
+    else:
+        curso_id = None
+
+    if curso_id is None and not periodo:
+        return HttpResponseBadRequest("Indique un curso (?curso=ID) o un periodo (?periodo=YYYY-YYYY).")
+
+    nombre = "_".join(str(p) for p in (prefijo, curso_id and f"curso{curso_id}", periodo) if p)
+    response = StreamingHttpResponse(generador(curso_id, periodo), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{nombre}.csv"'
+    return response
+
+def exportar_calificaciones(request):
+    """Descarga en CSV todas las calificaciones de un curso y/o periodo académico."""
+    return _respuesta_csv_en_flujo(request, filas_calificaciones, 'calificaciones')
+
+def exportar_asistencias(request):
+    """Descarga en CSV todos los registros de asistencia de un curso y/o periodo académico."""
+    return _respuesta_csv_en_flujo(request, filas_asistencias, 'asistencias')
+
+
+# --------------------------------------------------------------------------
+# 10. PANEL DE PERFILADO (SOLO STAFF)
+# --------------------------------------------------------------------------
+
+@staff_member_required
+def panel_perfilado(request):
+    """Muestra las últimas peticiones perfiladas por PerfiladoMiddleware."""
+    context = {
+        'registros': registros_recientes(),
+        'activo': getattr(settings, 'PERFILADO_ACTIVO', False),
     }
-    return render(request, 'asistencia/historial_asistencia_estudiante.html', context)
\ No newline at end of file
+    return render(request, 'perfilado/panel_perfilado.html', context)
+
+
+# --------------------------------------------------------------------------
+# 11. API JSON DE ASISTENCIA (ASÍNCRONA, PARA TABLETAS)
+# --------------------------------------------------------------------------
+
+@csrf_exempt  # Sin sesión ni cookie: la tableta se autentica con token
+@require_POST
+async def api_asistencia_lote(request, curso_id):
+    """
+    Recibe un lote JSON con los cambios de asistencia de un curso y una fecha y
+    responde solo el resultado por fila. Ver api_asistencia.py para el formato.
+    """
+    if not token_valido(request.headers.get('Authorization')):
+        return JsonResponse({'error': 'Token inválido o ausente.'}, status=401)
+    if not await Curso.objects.filter(pk=curso_id).aexists():
+        return JsonResponse({'error': 'Curso no encontrado.'}, status=404)
+    try:
+        clave, fecha, registros = leer_lote(request.body)
+        resultados, repetido = await sync_to_async(procesar_lote)(curso_id, clave, fecha, registros)
+    except LoteInvalido as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    except ConflictoLote as exc:
+        return JsonResponse({'error': str(exc)}, status=409)
+
+    return JsonResponse({
+        'clave_lote': clave,
+        'repetido': repetido,
+        'resultados': resultados,
+    })
+
+
+# --------------------------------------------------------------------------
+# 12. BOLETAS (COLA DE TRABAJOS EN SEGUNDO PLANO)
+# --------------------------------------------------------------------------
+
+MAX_TRABAJOS_LISTADOS = 20
+MAX_ERRORES_LISTADOS = 50
+
+def boletas_trabajos(request):
+    """Encola la generación de boletas de un periodo y lista los trabajos recientes."""
+    periodos = list(
+        Inscripcion.objects.order_by('-periodo_academico')
+        .values_list('periodo_academico', flat=True).distinct()
+    )
+    formatos = formatos_disponibles()
+
+    if request.method == 'POST':
+        periodo = request.POST.get('periodo_academico')
+        formato = request.POST.get('formato') or formatos[0]
+        if periodo not in periodos or formato not in formatos:
+            messages.error(request, "Seleccione un periodo y un formato válidos.")
+        else:
+            trabajo = crear_trabajo(periodo, formato)
+            messages.success(
+                request,
+                f"Se encolaron {trabajo.total} boletas. Se generan con: python manage.py procesar_boletas",
+            )
+            return redirect('estado_trabajo_boletas', trabajo_id=trabajo.id)
+
+    context = {
+        'periodos': periodos,
+        'formatos': formatos,
+        'trabajos': TrabajoBoletas.objects.order_by('-fecha_creacion')[:MAX_TRABAJOS_LISTADOS],
+    }
+    return render(request, 'boletas/trabajos_boletas.html', context)
+
+def estado_trabajo_boletas(request, trabajo_id):
+    """Avance de un trabajo de boletas; con ?formato=json responde solo los contadores."""
+    trabajo = get_object_or_404(TrabajoBoletas, pk=trabajo_id)
+    if request.GET.get('formato') == 'json':
+        return JsonResponse({
+            'id': trabajo.id,
+            'estado': trabajo.estado,
+            'total': trabajo.total,
+            'procesadas': trabajo.procesadas,
+            'con_error': trabajo.con_error,
+            'porcentaje': trabajo.porcentaje,
+        })
+
+    context = {
+        'trabajo': trabajo,
+        'en_curso': trabajo.estado in ('PENDIENTE', 'EN_PROCESO'),
+        'errores': TareaBoleta.objects.filter(trabajo=trabajo, estado='ERROR')
+                   .select_related('estudiante')[:MAX_ERRORES_LISTADOS],
+    }
+    return render(request, 'boletas/estado_trabajo_boletas.html', context)
+
+def descargar_boleta(request, trabajo_id, matricula):
+    """Descarga la boleta ya generada de un estudiante."""
+    tarea = get_object_or_404(
+        TareaBoleta, trabajo_id=trabajo_id, estudiante__matricula=matricula, estado='LISTA'
+    )
+    ruta = Path(tarea.archivo).resolve()
+    if directorio_boletas().resolve() not in ruta.parents or not ruta.is_file():
+        raise Http404
+    return FileResponse(open(ruta, 'rb'), as_attachment=True, filename=ruta.name)
+
@@ -10,6 +10,9 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import hashlib
+import os
+import tempfile
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -50,6 +53,16 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Perfilado por petición (SQL, plantillas y tiempo total). Desactivado por defecto;
+# con PERFILADO_MUESTREO < 1 se puede dejar activo en producción.
+# El panel está en /perfilado/ (solo usuarios staff).
+PERFILADO_ACTIVO = os.environ.get('PERFILADO_ACTIVO', '0') == '1'
+PERFILADO_MUESTREO = float(os.environ.get('PERFILADO_MUESTREO', '1.0'))
+PERFILADO_TAMANO_BUFFER = int(os.environ.get('PERFILADO_TAMANO_BUFFER', '200'))
+
+if PERFILADO_ACTIVO:
+    MIDDLEWARE.insert(0, 'app_Preparatoria.perfilado.PerfiladoMiddleware')
+
 ROOT_URLCONF = 'backend_Preparatoria.urls'
 
 TEMPLATES = [
@@ -74,10 +87,74 @@ WSGI_APPLICATION = 'backend_Preparatoria.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
-DATABASES = {
+# Perfil elegido con DB_PERFIL: 'sqlite' (por defecto) o 'postgresql'.
+DB_PERFIL = os.environ.get('DB_PERFIL', 'sqlite')
+
+if DB_PERFIL == 'postgresql':
+    # Conexiones persistentes (CONN_MAX_AGE) verificadas antes de reutilizarse.
+    # Con DB_POOL=1 se usa el pool de psycopg 3 (requiere psycopg[pool]) en lugar
+    # de conexiones persistentes.
+    DB_POOL = os.environ.get('DB_POOL', '0') == '1'
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NOMBRE', 'preparatoria'),
+            'USER': os.environ.get('DB_USUARIO', 'preparatoria'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PUERTO', '5432'),
+            'CONN_MAX_AGE': 0 if DB_POOL else int(os.environ.get('DB_CONN_MAX_AGE', '600')),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'connect_timeout': int(os.environ.get('DB_CONNECT_TIMEOUT', '5')),
+                **({'pool': {'min_size': 2, 'max_size': int(os.environ.get('DB_POOL_MAXIMO', '10'))}}
+                   if DB_POOL else {}),
+            },
+        }
+    }
+else:
+    # SQLite afinado: los PRAGMA de SQLITE_PRAGMAS se aplican a cada conexión nueva
+    # (ver app_Preparatoria/base_datos.py). BEGIN IMMEDIATE toma el bloqueo de
+    # escritura al iniciar la transacción, así los escritores concurrentes esperan
+    # busy_timeout en lugar de fallar con "database is locked".
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NOMBRE', BASE_DIR / 'db.sqlite3'),
+            'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', '60')),
+            'OPTIONS': {
+                'transaction_mode': 'IMMEDIATE',
+            },
+            # Las pruebas usan un archivo (no memoria) para poder probar WAL y concurrencia;
+            # va al directorio temporal para no dejar el archivo ni su -wal/-shm en el repositorio,
+            # con un nombre por checkout para que dos copias del proyecto no compartan la base.
+            'TEST': {
+                'NAME': Path(tempfile.gettempdir()) / (
+                    f"preparatoria_test_{hashlib.sha1(str(BASE_DIR).encode()).hexdigest()[:10]}.sqlite3"
+                ),
+            },
+        }
+    }
+
+SQLITE_PRAGMAS = {
+    'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', '5000')),
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024))),
+    'cache_size': -20000,  # ~20 MB
+    'temp_store': 'MEMORY',
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+# Caché (listas de selección y contadores de versión por modelo).
+# Memoria local por defecto; en producción con varios procesos conviene un backend compartido.
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'preparatoria'),
     }
 }
 
@@ -118,6 +195,14 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Tokens de las tabletas para la API JSON de asistencia, separados por comas.
+# Se envían en el encabezado 'Authorization: Token <token>'. Sin tokens la API
+# rechaza todas las peticiones.
+API_ASISTENCIA_TOKENS = [t.strip() for t in os.environ.get('API_ASISTENCIA_TOKENS', '').split(',') if t.strip()]
+
+# Carpeta donde el comando procesar_boletas escribe las boletas generadas
+BOLETAS_DIR = Path(os.environ.get('BOLETAS_DIR', BASE_DIR / 'boletas'))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 